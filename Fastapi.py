@@ -3,6 +3,7 @@ import axios from "axios";
 
 function App() {
   const API_BASE = process.env.REACT_APP_API_URL || "http://127.0.0.1:80";
+  const PAGE_SIZE = 200;
 
   const [record, setRecord] = useState({
     Time_of_Booking: "Afternoon",
@@ -19,6 +20,7 @@ function App() {
   const [batchResult, setBatchResult] = useState(null);
   const [isLoading, setIsLoading] = useState(false);
   const [batchLoading, setBatchLoading] = useState(false);
+  const [pageLoading, setPageLoading] = useState(false);
   const [uploadedFileName, setUploadedFileName] = useState("");
 
   // Handle input change
@@ -67,7 +69,7 @@ function App() {
       console.log("Uploading file:", file.name);
       const startTime = Date.now();
       
-      const res = await axios.post(`${API_BASE}/recommend_batch`, formData, {
+      const res = await axios.post(`${API_BASE}/recommend_batch?limit=${PAGE_SIZE}`, formData, {
         headers: { "Content-Type": "multipart/form-data" },
         timeout: 300000,
       });
@@ -131,6 +133,27 @@ function App() {
     return "#06b6d4";
   };
 
+  // Fetch the next window of a scored batch from /results
+  const loadMoreResults = async () => {
+    if (!batchResult || !batchResult.result_id) return;
+    setPageLoading(true);
+    try {
+      const offset = batchResult.recommendations.length;
+      const res = await axios.get(`${API_BASE}/results/${batchResult.result_id}`, {
+        params: { offset, limit: PAGE_SIZE },
+      });
+      setBatchResult({
+        ...batchResult,
+        recommendations: [...batchResult.recommendations, ...res.data.recommendations],
+      });
+    } catch (err) {
+      console.error("Page Error:", err);
+      alert("Could not load more results: " + (err.response?.data?.detail || err.message));
+    } finally {
+      setPageLoading(false);
+    }
+  };
+
   const downloadResults = () => {
     if (!batchResult) return;
     const dataStr = JSON.stringify(batchResult, null, 2);
@@ -669,7 +692,7 @@ function App() {
                     fontSize: "22px",
                     fontWeight: "700"
                   }}>
-                    📋 Individual Recommendations ({batchResult.recommendations.length} records)
+                    📋 Individual Recommendations (showing {batchResult.recommendations.length} of {batchResult.total ?? batchResult.recommendations.length} records)
                   </h3>
                   <div style={{ 
                     maxHeight: "600px", 
@@ -732,6 +755,24 @@ function App() {
                       </div>
                     ))}
                   </div>
+                  {batchResult.total > batchResult.recommendations.length && (
+                    <button
+                      onClick={loadMoreResults}
+                      disabled={pageLoading}
+                      style={{
+                        marginTop: "15px",
+                        padding: "12px 24px",
+                        borderRadius: "10px",
+                        border: "none",
+                        background: "#10b981",
+                        color: "white",
+                        fontWeight: "700",
+                        cursor: pageLoading ? "wait" : "pointer"
+                      }}
+                    >
+                      {pageLoading ? "Loading..." : `Load ${Math.min(PAGE_SIZE, batchResult.total - batchResult.recommendations.length)} more`}
+                    </button>
+                  )}
                 </div>
               )}
             </div>
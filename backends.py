@@ -0,0 +1,185 @@
+"""Model backends: how each kind of regressor is trained on, saved from and served over the feature pipeline.
+
+Every serving path hands an engine the ``FeaturePipeline`` matrix (scaled
+numeric block, then the one-hot categories) and calls ``predict``; an engine
+also reports a ``fingerprint()`` of the model and the ``split_features()``
+it depends on, which the price table uses.  A backend turns a fitted
+estimator into such an engine and knows how to fit and save it:
+
+``gbr``
+    ``GradientBoostingRegressor`` on the one-hot matrix, compiled to
+    ``tree_engine.CompiledEnsemble`` and saved as a ``.apo`` artifact.
+``hgb``
+    ``HistGradientBoostingRegressor`` with native categorical splits: each
+    one-hot group is folded back into a single code column (unknown values
+    become missing), so a split can send any subset of a category's values
+    left.  Served by sklearn, which bins and predicts multithreaded, and
+    saved as a joblib bundle holding the estimator and its pipeline state.
+
+``load`` opens either kind of file, picking the backend from its contents.
+"""
+import hashlib
+
+import numpy as np
+
+from features import CATEGORICAL, NUMERIC, FeaturePipeline
+
+
+class HistGradientBoostingEngine:
+    def __init__(self, model, pipeline):
+        self.model = model
+        self.n_features = pipeline.n_features
+        self._groups = []
+        offset = len(NUMERIC)
+        for col in CATEGORICAL:
+            size = len(pipeline.categories[col])
+            self._groups.append((offset, size))
+            offset += size
+
+    @staticmethod
+    def categorical_mask():
+        return np.arange(len(NUMERIC) + len(CATEGORICAL)) >= len(NUMERIC)
+
+    def native(self, X):
+        """Numeric block followed by one category code per CATEGORICAL column (NaN when unknown)."""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"X has {X.shape[1]} features, but the model expects {self.n_features}")
+        out = np.empty((len(X), len(NUMERIC) + len(CATEGORICAL)))
+        out[:, :len(NUMERIC)] = X[:, :len(NUMERIC)]
+        for i, (offset, size) in enumerate(self._groups):
+            block = X[:, offset:offset + size]
+            codes = block.argmax(axis=1).astype(np.float64)
+            codes[block.max(axis=1) <= 0.0] = np.nan
+            out[:, len(NUMERIC) + i] = codes
+        return out
+
+    def predict(self, X):
+        return self.model.predict(self.native(X))
+
+    def fingerprint(self):
+        # The fitted trees, not a pickle of the estimator: pickling a reloaded estimator gives other bytes.
+        digest = hashlib.sha256(np.asarray(self.model._baseline_prediction, dtype=np.float64).tobytes())
+        for predictors in self.model._predictors:
+            for predictor in predictors:
+                digest.update(predictor.nodes.tobytes())
+                digest.update(predictor.raw_left_cat_bitsets.tobytes())
+        for categories in getattr(self._encoder(), "categories_", []):
+            digest.update(np.asarray(categories, dtype=np.float64).tobytes())
+        return digest.hexdigest()[:32]
+
+    def _encoder(self):
+        preprocessor = getattr(self.model, "_preprocessor", None)
+        return preprocessor.named_transformers_.get("encoder") if preprocessor is not None else None
+
+    def _inputs(self):
+        """Native column of each feature the trees index; newer sklearn moves categorical columns first."""
+        preprocessor = getattr(self.model, "_preprocessor", None)
+        if preprocessor is None:
+            return np.arange(self.model.n_features_in_)
+        return np.concatenate([np.flatnonzero(columns) for _, transformer, columns in preprocessor.transformers_
+                               if not isinstance(transformer, str)])
+
+    def split_features(self):
+        used = set()
+        inputs = self._inputs()
+        for predictors in self.model._predictors:
+            for predictor in predictors:
+                nodes = predictor.nodes
+                used.update(inputs[np.unique(nodes["feature_idx"][nodes["is_leaf"] == 0])].tolist())
+        columns = []
+        for index in sorted(used):
+            if index < len(NUMERIC):
+                columns.append(index)
+            else:
+                offset, size = self._groups[index - len(NUMERIC)]
+                columns.extend(range(offset, offset + size))
+        return columns
+
+
+class GradientBoostingBackend:
+    name = "gbr"
+    estimator = "GradientBoostingRegressor"
+    suffix = ".apo"
+
+    def make(self, **params):
+        from sklearn.ensemble import GradientBoostingRegressor
+
+        return GradientBoostingRegressor(**params)
+
+    def fit(self, model, X, y, pipeline):
+        return model.fit(X, y)
+
+    def engine(self, model, pipeline):
+        from tree_engine import CompiledEnsemble
+
+        engine = CompiledEnsemble.from_sklearn(model)
+        if engine.n_features != pipeline.n_features:
+            raise ValueError(
+                f"model expects {engine.n_features} features but the pipeline produces {pipeline.n_features}"
+            )
+        return engine
+
+    def save(self, model, pipeline, path, metadata=None):
+        import model_artifact
+
+        model_artifact.export(model, pipeline, path, metadata)
+
+
+class HistGradientBoostingBackend:
+    name = "hgb"
+    estimator = "HistGradientBoostingRegressor"
+    suffix = ".joblib"
+
+    def make(self, **params):
+        from sklearn.ensemble import HistGradientBoostingRegressor
+
+        return HistGradientBoostingRegressor(categorical_features=HistGradientBoostingEngine.categorical_mask(),
+                                             **params)
+
+    def fit(self, model, X, y, pipeline):
+        return model.fit(HistGradientBoostingEngine(model, pipeline).native(X), y)
+
+    def engine(self, model, pipeline):
+        if model.n_features_in_ != len(NUMERIC) + len(CATEGORICAL):
+            raise ValueError(f"model expects {model.n_features_in_} features, "
+                             f"not {len(NUMERIC)} numeric + {len(CATEGORICAL)} categorical")
+        return HistGradientBoostingEngine(model, pipeline)
+
+    def save(self, model, pipeline, path, metadata=None):
+        import joblib
+
+        joblib.dump({"backend": self.name, "model": model, "pipeline": pipeline.state(),
+                     "metadata": metadata or {}}, path)
+
+
+BACKENDS = {backend.name: backend for backend in (GradientBoostingBackend(), HistGradientBoostingBackend())}
+
+
+def for_estimator(name):
+    """The backend serving estimators of class ``name``, or None."""
+    for backend in BACKENDS.values():
+        if backend.estimator == name:
+            return backend
+    return None
+
+
+def load(path, pipeline_path):
+    """(engine, pipeline) from a joblib bundle, or from a bare pickled estimator plus a pipeline JSON."""
+    import joblib
+
+    obj = joblib.load(path)
+    if isinstance(obj, dict):
+        backend, model = BACKENDS[obj["backend"]], obj["model"]
+        pipeline = FeaturePipeline.from_state(obj["pipeline"], path)
+    else:
+        backend, model = for_estimator(type(obj).__name__), obj
+        if backend is None:
+            raise ValueError(f"{path} holds a {type(obj).__name__}, which no backend can serve")
+        pipeline = FeaturePipeline.load(pipeline_path)
+    try:
+        return backend.engine(model, pipeline), pipeline
+    except ValueError as e:
+        raise RuntimeError(f"{path}: {e}") from None
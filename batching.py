@@ -0,0 +1,78 @@
+"""Dynamic micro-batching for single-record scoring.
+
+Concurrent ``/recommend`` calls are held for at most ``max_wait`` seconds (or
+until ``max_rows`` are waiting), scored with one vectorized predict on the
+default executor, and their results fanned back out to the waiting
+coroutines.
+"""
+import asyncio
+import time
+
+import numpy as np
+
+
+class MicroBatcher:
+    def __init__(self, score, max_wait=0.002, max_rows=256):
+        self.score = score
+        self.max_wait = max_wait
+        self.max_rows = max_rows
+        self._pending = []
+        self._timer = None
+        self._inflight = set()
+
+        self.batches = 0
+        self.rows = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    async def submit(self, row):
+        """Score one (1, n_features) row; returns (prediction, queue_wait_s, batch_size)."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((row, future, time.perf_counter()))
+        if len(self._pending) >= self.max_rows:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _run(self, batch):
+        started = time.perf_counter()
+        rows = np.vstack([row for row, _, _ in batch])
+        try:
+            predictions = await asyncio.get_running_loop().run_in_executor(None, self.score, rows)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.rows += len(batch)
+        for (_, future, enqueued), prediction in zip(batch, predictions.tolist()):
+            wait = started - enqueued
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            if not future.done():
+                future.set_result((prediction, wait, len(batch)))
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch_size": self.rows / self.batches if self.batches else 0.0,
+            "mean_queue_wait_ms": 1e3 * self.wait_total / self.rows if self.rows else 0.0,
+            "max_queue_wait_ms": 1e3 * self.wait_max,
+            "queued": len(self._pending),
+            "inflight_batches": len(self._inflight),
+        }
@@ -0,0 +1,98 @@
+"""Fit time, predict latency and memory per model backend on synthetic ride logs.
+
+Rides are drawn from dynamic_pricing.csv's distributions: categories by
+their observed frequencies, numeric columns by resampling observed values
+with a little Gaussian jitter (counts rounded back to whole numbers).  Each
+backend is fitted in its own spawned process so peak RSS is its own; the
+reported fit memory is the peak above the RSS with the data already loaded.
+GBR uses the notebook's settings (300 trees, depth 5), HGB sklearn's
+defaults with native categoricals.
+
+Usage: python benchmarks/bench_backends.py [n_rows] [gbr_trees]
+"""
+import multiprocessing
+import os
+import pickle
+import resource
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import backends  # noqa: E402
+import ingest  # noqa: E402
+from features import CATEGORICAL, RAW_NUMERIC, FeaturePipeline  # noqa: E402
+from train import TARGET  # noqa: E402
+
+PARAMS = {
+    "gbr": {"max_depth": 5, "learning_rate": 0.1},
+    "hgb": {},
+}
+LATENCY_CALLS = 200
+BATCH = 100_000
+
+
+def synthesize(df, n, seed=0):
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for col in CATEGORICAL:
+        freq = df[col].value_counts(normalize=True)
+        columns[col] = rng.choice(freq.index.to_numpy(), n, p=freq.to_numpy())
+    for col in RAW_NUMERIC:
+        observed = df[col].to_numpy(dtype=np.float64)
+        values = rng.choice(observed, n) + rng.normal(0.0, 0.05 * observed.std(), n)
+        values = np.clip(values, observed.min(), observed.max())
+        columns[col] = values.round() if ingest.SCHEMA[col] == ingest.COUNT else values
+    return columns
+
+
+def rss_mib():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(name, n, trees, queue):
+    columns = synthesize(pd.read_csv("dynamic_pricing.csv"), n)
+    pipeline = FeaturePipeline.fit(columns)
+    X, y = pipeline.encode_columns(columns), columns[TARGET]
+    backend = backends.BACKENDS[name]
+    params = {**PARAMS[name], **({"n_estimators": trees} if name == "gbr" else {})}
+    loaded = rss_mib()
+
+    start = time.perf_counter()
+    model = backend.fit(backend.make(random_state=0, **params), X, y, pipeline)
+    fit_s = time.perf_counter() - start
+    fit_mib = rss_mib() - loaded
+
+    engine = backend.engine(model, pipeline)
+    single = []
+    for i in range(LATENCY_CALLS):
+        start = time.perf_counter()
+        engine.predict(X[i:i + 1])
+        single.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    engine.predict(X[:BATCH])
+    batch_s = time.perf_counter() - start
+    size = sum(a.nbytes for a in (engine.feature, engine.threshold, engine.value)) if name == "gbr" \
+        else len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+    queue.put((name, fit_s, fit_mib, float(np.median(single)), batch_s, size))
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    trees = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    print(f"{n:,} synthetic rides, {os.cpu_count()} CPUs")
+    print(f"{'backend':8} {'fit s':>8} {'fit MiB':>8} {'batch 1 us':>11} {'batch 100k ms':>14} {'model KiB':>10}")
+    for name in backends.BACKENDS:
+        proc = ctx.Process(target=run, args=(name, n, trees, queue))
+        proc.start()
+        name, fit_s, fit_mib, single_s, batch_s, size = queue.get()
+        proc.join()
+        print(f"{name:8} {fit_s:8.1f} {fit_mib:8.0f} {single_s * 1e6:11.0f} {batch_s * 1e3:14.0f} {size / 1024:10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Time-to-first-prediction and RSS of a fresh process, pickle vs model artifact.
+
+Each path runs in its own interpreter so import costs are counted:
+
+  pickle   joblib.load + sklearn predict (what main.py originally did)
+  compile  joblib.load + CompiledEnsemble.from_sklearn (the pickle path today)
+  artifact model_artifact.load (memory-mapped, NumPy only)
+
+Usage: python benchmarks/bench_cold_start.py [model.pkl] [model.apo] [runs]
+
+Without model paths a default GBR is trained on dynamic_pricing.csv (see ``demo_model``).
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import demo_model
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+CHILD = """
+import time
+start = time.perf_counter()
+import resource, sys
+sys.path.insert(0, {root!r})
+kind, path = {kind!r}, {path!r}
+if kind == "artifact":
+    import model_artifact
+    engine, pipeline, _ = model_artifact.load(path)
+    predict = engine.predict
+else:
+    import joblib
+    from features import FeaturePipeline
+    model = joblib.load(path)
+    pipeline = FeaturePipeline.load({pipeline!r})
+    if kind == "compile":
+        from tree_engine import CompiledEnsemble
+        predict = CompiledEnsemble.from_sklearn(model).predict
+    else:
+        predict = model.predict
+record = {{"Location_Category": "Urban", "Vehicle_Type": "Economy", "Time_of_Booking": "Night",
+          "Customer_Loyalty_Status": "Gold", "Number_of_Riders": 50, "Number_of_Drivers": 20,
+          "Expected_Ride_Duration": 30, "Historical_Cost_of_Ride": 200}}
+predict(pipeline.encode_record(record))
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print({{"first_prediction_ms": elapsed * 1e3, "max_rss_mb": rss / 1024, "modules": len(sys.modules)}})
+"""
+
+
+def run(kind, path, pipeline):
+    code = CHILD.format(root=ROOT, kind=kind, path=path, pipeline=pipeline)
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    result = json.loads(out.strip().replace("'", '"'))
+    result["process_ms"] = (time.perf_counter() - start) * 1e3
+    return result
+
+
+def main():
+    if len(sys.argv) > 2:
+        pickle_path, artifact_path = sys.argv[1:3]
+    else:
+        pickle_path, artifact_path = demo_model.built_in_child()
+        pickle_path = sys.argv[1] if len(sys.argv) > 1 else pickle_path
+    runs = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    pipeline = os.path.join(ROOT, "feature_pipeline.json")
+
+    print(f"{'path':10} {'first pred ms':>14} {'process ms':>11} {'max RSS MB':>11} {'modules':>8}")
+    for kind, path in (("pickle", pickle_path), ("compile", pickle_path), ("artifact", artifact_path)):
+        results = [run(kind, path, pipeline) for _ in range(runs)]
+        row = {key: statistics.median(r[key] for r in results) for key in results[0]}
+        print(f"{kind:10} {row['first_prediction_ms']:14.1f} {row['process_ms']:11.1f} "
+              f"{row['max_rss_mb']:11.1f} {row['modules']:8.0f}")
+
+
+if __name__ == "__main__":
+    main()
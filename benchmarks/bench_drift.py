@@ -0,0 +1,61 @@
+"""Request-path cost of drift monitoring, and background drain throughput.
+
+Times ``submit_record`` per /recommend call and ``submit_columns`` for batch
+uploads of growing size (both should stay flat), then how long the
+background ``drain`` takes to fold a full queue into the windows.  The
+baseline is built from dynamic_pricing.csv against the model at MODEL_PATH.
+
+Usage: python benchmarks/bench_drift.py [model.apo] [calls]
+Without a model path or MODEL_PATH a default GBR is trained on dynamic_pricing.csv (see ``demo_model``).
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import demo_model  # noqa: E402
+import drift  # noqa: E402
+from bench_backends import synthesize  # noqa: E402
+from model_artifact import load_engine  # noqa: E402
+
+
+def main():
+    model_path = sys.argv[1] if len(sys.argv) > 1 else os.environ.get("MODEL_PATH") or demo_model.artifact_path()
+    calls = int(sys.argv[2]) if len(sys.argv) > 2 else 4096
+    engine, pipeline = load_engine(model_path, "feature_pipeline.json")
+    df = pd.read_csv("dynamic_pricing.csv")
+    X = pipeline.encode_columns(df)
+    baseline = drift.snapshot(pipeline, X, engine.predict(X))
+    record = df.iloc[0].to_dict()
+    X1 = pipeline.encode_record(record)
+    prediction = float(engine.predict(X1)[0])
+
+    monitor = drift.DriftMonitor(baseline, pipeline, max_items=calls)
+    start = time.perf_counter()
+    for _ in range(calls):
+        monitor.submit_record(record, prediction, X1)
+    print(f"submit_record:        {(time.perf_counter() - start) / calls * 1e6:8.2f} us/call")
+    start = time.perf_counter()
+    rows = monitor.drain()
+    print(f"drain {rows:>9,} records {time.perf_counter() - start:8.3f} s")
+
+    for n in (1_000, 100_000, 1_000_000):
+        columns = synthesize(df, n)
+        predictions = np.resize(engine.predict(X), n)
+        monitor = drift.DriftMonitor(baseline, pipeline)
+        repeat = 20
+        start = time.perf_counter()
+        for _ in range(repeat):
+            monitor.submit_columns(columns, predictions)
+        per_call = (time.perf_counter() - start) / repeat
+        start = time.perf_counter()
+        rows = monitor.drain()
+        print(f"submit_columns {n:>9,} rows {per_call * 1e6:8.0f} us/call; "
+              f"drain {rows:,} rows {time.perf_counter() - start:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
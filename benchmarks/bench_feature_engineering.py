@@ -0,0 +1,76 @@
+"""Training-time feature engineering: FeaturePipeline against the notebook's pandas cells.
+
+The notebook path caps outliers with a quantile pair per column, builds each
+engineered column with its own ``replace([inf, -inf], 0)``/``fillna``,
+maps loyalty with ``Series.map`` and one-hot encodes with ``get_dummies``.
+The pipeline fits its bounds and scaling in one pass over a stacked NumPy
+block and encodes in chunks.  Both run over the same synthetic rides (see
+bench_backends); the unscaled numeric blocks are checked to match.
+
+Usage: python benchmarks/bench_feature_engineering.py [n_rows] [chunk_rows]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from bench_backends import synthesize  # noqa: E402
+from features import COST_RATIO, EPS, IQR_K, LOYALTY_MAP, NUMERIC, RAW_NUMERIC, FeaturePipeline  # noqa: E402
+
+
+def notebook(df):
+    for col in RAW_NUMERIC:
+        q1, q3 = df[col].quantile(0.25), df[col].quantile(0.75)
+        lower, upper = q1 - IQR_K * (q3 - q1), q3 + IQR_K * (q3 - q1)
+        df[col] = np.where(df[col] < lower, lower, np.where(df[col] > upper, upper, df[col]))
+    df["Rider_Driver_Ratio"] = (df["Number_of_Riders"] / (df["Number_of_Drivers"] + EPS)).replace(
+        [np.inf, -np.inf], 0).fillna(0)
+    df["Driver_to_Rider_Ratio"] = (df["Number_of_Drivers"] / (df["Number_of_Riders"] + EPS)).replace(
+        [np.inf, -np.inf], 0).fillna(0)
+    df["Supply_Tightness"] = (df["Number_of_Riders"] > df["Number_of_Drivers"]).astype(float)
+    df["Loyalty_Score"] = df["Customer_Loyalty_Status"].map(LOYALTY_MAP).fillna(0)
+    df["Cost_per_Min"] = (COST_RATIO * df["Historical_Cost_of_Ride"] / (df["Expected_Ride_Duration"] + EPS)).replace(
+        [np.inf, -np.inf], 0).fillna(0)
+    df["Inventory_Health_Index"] = df["Number_of_Drivers"] / (df["Number_of_Drivers"].mean() + EPS)
+    numeric = df[NUMERIC].to_numpy()
+    dummies = pd.get_dummies(df[["Location_Category", "Customer_Loyalty_Status", "Time_of_Booking", "Vehicle_Type"]])
+    scaled = (numeric - numeric.mean(axis=0)) / numeric.std(axis=0)
+    return numeric, scaled, dummies
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    chunk = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+    columns = synthesize(pd.read_csv("dynamic_pricing.csv"), n)
+    print(f"{n:,} synthetic rides")
+
+    start = time.perf_counter()
+    pipeline = FeaturePipeline.fit(columns)
+    fit_s = time.perf_counter() - start
+    start = time.perf_counter()
+    for lo in range(0, n, chunk):
+        X, numeric = pipeline.encode_columns({col: values[lo:lo + chunk] for col, values in columns.items()},
+                                             with_numeric=True)
+        if lo == 0:
+            first = numeric
+    encode_s = time.perf_counter() - start
+    del X, numeric
+    df = pd.DataFrame(columns)
+    del columns
+
+    start = time.perf_counter()
+    expected, _, _ = notebook(df)
+    notebook_s = time.perf_counter() - start
+    assert np.allclose(expected[:len(first)], first), "pipeline and notebook features differ"
+
+    print(f"notebook cells:   {notebook_s:8.2f} s  {n / notebook_s:12,.0f} rows/s")
+    print(f"pipeline fit:     {fit_s:8.2f} s")
+    print(f"pipeline encode:  {encode_s:8.2f} s  {n / encode_s:12,.0f} rows/s ({chunk:,}-row chunks)")
+    print(f"pipeline total:   {fit_s + encode_s:8.2f} s  ({notebook_s / (fit_s + encode_s):.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
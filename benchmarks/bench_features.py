@@ -0,0 +1,46 @@
+"""Single-record and batch encoding cost of FeaturePipeline.
+
+Usage: python benchmarks/bench_features.py [feature_pipeline.json] [dynamic_pricing.csv]
+"""
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from features import FeaturePipeline  # noqa: E402
+
+RECORD = {
+    "Time_of_Booking": "Afternoon",
+    "Location_Category": "Urban",
+    "Vehicle_Type": "Economy",
+    "Customer_Loyalty_Status": "Regular",
+    "Expected_Ride_Duration": 30,
+    "Historical_Cost_of_Ride": 200,
+    "Number_of_Riders": 50,
+    "Number_of_Drivers": 20,
+}
+
+
+def per_call_us(fn, calls):
+    fn()
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    pipeline = FeaturePipeline.load(sys.argv[1] if len(sys.argv) > 1 else "feature_pipeline.json")
+    df = pd.read_csv(sys.argv[2] if len(sys.argv) > 2 else "dynamic_pricing.csv")
+    big = pd.concat([df] * 100, ignore_index=True)
+
+    print(f"encode_record:          {per_call_us(lambda: pipeline.encode_record(RECORD), 20000):8.1f} us")
+    print(f"pd.DataFrame([record]): {per_call_us(lambda: pd.DataFrame([RECORD]), 2000):8.1f} us")
+    us = per_call_us(lambda: pipeline.encode_columns(big), 20)
+    print(f"encode_columns:         {us / len(big) * 1e3:8.1f} ns/row ({len(big):,} rows)")
+
+
+if __name__ == "__main__":
+    main()
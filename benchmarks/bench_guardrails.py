@@ -0,0 +1,43 @@
+"""Per-row cost of the guardrail stage at large batch sizes.
+
+Usage: python benchmarks/bench_guardrails.py [n_rows]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from features import NUMERIC  # noqa: E402
+from guardrails import Guardrails, ViolationCounter  # noqa: E402
+from optimizer import PriceOptimizer  # noqa: E402
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    rng = np.random.default_rng(0)
+    numeric = np.zeros((n, len(NUMERIC)))
+    numeric[:, NUMERIC.index("Number_of_Riders")] = rng.integers(20, 100, n)
+    numeric[:, NUMERIC.index("Number_of_Drivers")] = rng.integers(5, 90, n)
+    numeric[:, NUMERIC.index("Historical_Cost_of_Ride")] = rng.uniform(25, 840, n)
+    optimizer = PriceOptimizer(n_points=8)
+    reference = numeric[:, NUMERIC.index("Historical_Cost_of_Ride")] * rng.uniform(0.7, 1.3, n)
+    competitor = reference * rng.uniform(0.7, 1.3, n)
+
+    for mode in ("flag", "clip"):
+        guardrails = Guardrails(optimizer, mode)
+        result = optimizer.optimize(reference, numeric)
+        result["policy_baseline"] = result["baseline_price"]
+        result["p_complete_policy_baseline"] = result["p_complete_baseline"]
+        start = time.perf_counter()
+        guardrails.apply(result, numeric, competitor)
+        counts = ViolationCounter(mode).update(result).result()
+        elapsed = time.perf_counter() - start
+        print(f"{mode}: {elapsed / n * 1e9:.0f} ns/row over {n:,} rows; clipped {counts['clipped']:,}")
+        print(f"  violations {counts['violations']}")
+        print(f"  remaining  {counts['remaining']}")
+
+
+if __name__ == "__main__":
+    main()
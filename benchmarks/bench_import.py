@@ -0,0 +1,83 @@
+"""Import time, first-request latency and RSS of the API process.
+
+Imports ``main`` in fresh interpreters, scores one record through the
+/recommend path and reports which heavy libraries got loaded.  With budgets
+given it exits non-zero when the median exceeds them, or when pandas or
+sklearn were imported while serving from a model artifact, so cold-start
+regressions can be caught locally without CI.
+
+Usage: python benchmarks/bench_import.py [model] [runs] [max_import_ms] [max_rss_mb]
+
+Without a model path a default GBR artifact is built from dynamic_pricing.csv (see ``demo_model``).
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+import demo_model  # noqa: E402
+from model_artifact import is_artifact  # noqa: E402
+
+HEAVY = ["pandas", "sklearn", "scipy", "joblib"]
+
+CHILD = """
+import json, resource, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+main.models.champion.scorer.score_record({"Location_Category": "Urban", "Vehicle_Type": "Economy",
+                                         "Time_of_Booking": "Night", "Customer_Loyalty_Status": "Gold",
+                                         "Number_of_Riders": 50, "Number_of_Drivers": 20,
+                                         "Expected_Ride_Duration": 30, "Historical_Cost_of_Ride": 200})
+done = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1e3,
+    "first_request_ms": (done - imported) * 1e3,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "heavy": [name for name in %r if name in sys.modules],
+}))
+""" % (HEAVY,)
+
+
+def run(model):
+    env = dict(os.environ, MODEL_PATH=model)
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD], cwd=ROOT, env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(out.splitlines()[-1])
+
+
+def main():
+    model = sys.argv[1] if len(sys.argv) > 1 else demo_model.built_in_child()[1]
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    max_import_ms = float(sys.argv[3]) if len(sys.argv) > 3 else None
+    max_rss_mb = float(sys.argv[4]) if len(sys.argv) > 4 else None
+
+    results = [run(model) for _ in range(runs)]
+    import_ms = statistics.median(r["import_ms"] for r in results)
+    first_ms = statistics.median(r["first_request_ms"] for r in results)
+    rss_mb = statistics.median(r["max_rss_mb"] for r in results)
+    heavy = results[-1]["heavy"]
+    print(f"model: {model} ({runs} runs, medians)")
+    print(f"import main:   {import_ms:8.1f} ms")
+    print(f"first request: {first_ms:8.1f} ms")
+    print(f"max RSS:       {rss_mb:8.1f} MB")
+    print(f"heavy modules: {', '.join(heavy) or 'none'}")
+
+    failures = []
+    if max_import_ms is not None and import_ms > max_import_ms:
+        failures.append(f"import took {import_ms:.0f} ms, budget {max_import_ms:.0f} ms")
+    if max_rss_mb is not None and rss_mb > max_rss_mb:
+        failures.append(f"RSS {rss_mb:.0f} MB, budget {max_rss_mb:.0f} MB")
+    if is_artifact(os.path.join(ROOT, model)) and {"pandas", "sklearn"} & set(heavy):
+        failures.append("pandas/sklearn imported on the artifact serving path")
+    for failure in failures:
+        print("FAIL:", failure)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
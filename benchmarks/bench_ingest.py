@@ -0,0 +1,47 @@
+"""Upload-to-feature-matrix cost: schema-checked ingestion vs inferred read_csv.
+
+Usage: python benchmarks/bench_ingest.py [copies of dynamic_pricing.csv]
+"""
+import io
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import ingest  # noqa: E402
+from features import FeaturePipeline  # noqa: E402
+
+
+def best_of(fn, runs=3):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    pipeline = FeaturePipeline.load("feature_pipeline.json")
+    with open("dynamic_pricing.csv", "rb") as f:
+        header, body = f.read().split(b"\n", 1)
+    data = header + b"\n" + body * copies
+    n = len(data.splitlines()) - 1
+
+    def inferred():
+        pipeline.encode_columns(pd.read_csv(io.StringIO(data.decode("utf-8"))))
+
+    def schema():
+        pipeline.encode_columns(ingest.read(data, pipeline).columns)
+
+    old, new = best_of(inferred), best_of(schema)
+    print(f"{n:,} rows, {len(data) / 2**20:.0f} MiB")
+    print(f"decode + inferred read_csv + encode: {old:6.2f} s ({n / old:10,.0f} rows/s)")
+    print(f"ingest.read + encode:                {new:6.2f} s ({n / new:10,.0f} rows/s, {old / new:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""KPI accumulation: one pass vs chunked and merged, and sketch quantile error.
+
+Usage: python benchmarks/bench_kpis.py [n_rows] [chunk_rows]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from features import NUMERIC  # noqa: E402
+from kpis import QUANTILES, KpiAccumulator  # noqa: E402
+from optimizer import PriceOptimizer  # noqa: E402
+
+
+def scored(n, seed=0):
+    rng = np.random.default_rng(seed)
+    numeric = np.zeros((n, len(NUMERIC)))
+    numeric[:, NUMERIC.index("Number_of_Riders")] = rng.integers(20, 100, n)
+    numeric[:, NUMERIC.index("Number_of_Drivers")] = rng.integers(5, 90, n)
+    numeric[:, NUMERIC.index("Historical_Cost_of_Ride")] = rng.uniform(25, 840, n)
+    reference = numeric[:, NUMERIC.index("Historical_Cost_of_Ride")] * rng.uniform(0.7, 1.3, n)
+    result = PriceOptimizer(n_points=8).optimize(reference, numeric)
+    result["policy_baseline"] = result["baseline_price"]
+    result["p_complete_policy_baseline"] = result["p_complete_baseline"]
+    return result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    chunk = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    result = scored(n)
+
+    start = time.perf_counter()
+    full = KpiAccumulator().update(result).result()
+    one_pass = time.perf_counter() - start
+
+    start = time.perf_counter()
+    total = KpiAccumulator()
+    for i in range(0, n, chunk):
+        part = KpiAccumulator().update({key: values[i:i + chunk] for key, values in result.items()})
+        total.merge(part)
+    merged = total.result()
+    chunked = time.perf_counter() - start
+
+    print(f"one pass: {one_pass * 1e3:.0f} ms; {-(-n // chunk)} chunks merged: {chunked * 1e3:.0f} ms "
+          f"({chunked / n * 1e9:.0f} ns/row)")
+    differs = {key: (full[key], merged[key]) for key in full if full[key] != merged[key]}
+    print(f"chunked == one pass: {not differs}" + (f" {differs}" if differs else ""))
+    price = result["price_recommended"]
+    for q in QUANTILES:
+        exact = np.quantile(price, q)
+        estimate = total.quantiles.quantile(q)
+        print(f"p{round(q * 100)}: exact {exact:.2f} sketch {estimate:.2f} "
+              f"(rel. error {abs(estimate - exact) / exact:.4f}, bound {total.quantiles.relative_accuracy})")
+
+
+if __name__ == "__main__":
+    main()
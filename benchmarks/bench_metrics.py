@@ -0,0 +1,59 @@
+"""Cost of recording a metric, against a /recommend request.
+
+Usage: python benchmarks/bench_metrics.py [n_observations] [threads]
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import metrics  # noqa: E402
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    n_threads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    registry = metrics.Registry()
+    counter = registry.counter("bench_total", "Benchmark counter.").labels()
+    histogram = registry.histogram("bench_seconds", "Benchmark histogram.").labels()
+    values = [1e-5 * (1 + i % 1000) for i in range(n)]
+
+    start = time.perf_counter()
+    for _ in range(n):
+        counter.inc()
+    inc_s = time.perf_counter() - start
+    start = time.perf_counter()
+    for value in values:
+        histogram.observe(value)
+    observe_s = time.perf_counter() - start
+
+    def record():
+        for value in values[:n // n_threads]:
+            counter.inc()
+            histogram.observe(value)
+
+    threads = [threading.Thread(target=record) for _ in range(n_threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    threaded_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    text = registry.render()
+    render_s = time.perf_counter() - start
+
+    count, _, quantiles = histogram.snapshot()
+    assert counter.value == n + n_threads * (n // n_threads) == count
+    print(f"counter.inc:        {inc_s / n * 1e9:.0f} ns")
+    print(f"histogram.observe:  {observe_s / n * 1e9:.0f} ns")
+    print(f"{n_threads} threads, inc + observe: {threaded_s / (n_threads * (n // n_threads)) * 1e9:.0f} ns")
+    print(f"scrape: {render_s * 1e3:.2f} ms, {len(text)} bytes")
+    print("p50/p95/p99: " + ", ".join(f"{quantiles[q] * 1e3:.3f} ms" for q in metrics.QUANTILES)
+          + "  (exact 5.005 / 9.505 / 9.905 ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Single-record throughput with and without MicroBatcher on one event loop.
+
+Usage: python benchmarks/bench_microbatch.py [model.pkl] [concurrency]
+
+Without a model path a default GBR is trained on dynamic_pricing.csv (see ``demo_model``).
+"""
+import asyncio
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import demo_model  # noqa: E402
+from batching import MicroBatcher  # noqa: E402
+from tree_engine import CompiledEnsemble  # noqa: E402
+
+REQUESTS = 20000
+
+
+async def drive(call, rows, concurrency):
+    queue = iter(rows)
+
+    async def client():
+        for row in queue:
+            await call(row)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return len(rows) / (time.perf_counter() - start)
+
+
+async def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else demo_model.pickle_path()
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+    engine = CompiledEnsemble.from_sklearn(joblib.load(path))
+    rows = list(np.random.default_rng(0).normal(size=(REQUESTS, 1, engine.n_features)))
+    loop = asyncio.get_running_loop()
+
+    async def direct(row):
+        return await loop.run_in_executor(None, engine.predict, row)
+
+    batcher = MicroBatcher(engine.predict)
+    base = await drive(direct, rows, concurrency)
+    batched = await drive(batcher.submit, rows, concurrency)
+    print(f"concurrency {concurrency}")
+    print(f"per-request predict: {base:10,.0f} req/s")
+    print(f"micro-batched:       {batched:10,.0f} req/s ({batched / base:.1f}x)")
+    for key, value in batcher.stats().items():
+        print(f"  {key}: {value:.3f}" if isinstance(value, float) else f"  {key}: {value}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
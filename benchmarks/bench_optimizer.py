@@ -0,0 +1,37 @@
+"""Time PriceOptimizer.optimize on a synthetic 10k-ride batch.
+
+Usage: python benchmarks/bench_optimizer.py [n_rides] [n_points]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from features import NUMERIC  # noqa: E402
+from optimizer import PriceOptimizer  # noqa: E402
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    points = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    rng = np.random.default_rng(0)
+    numeric = np.zeros((n, len(NUMERIC)))
+    numeric[:, NUMERIC.index("Number_of_Riders")] = rng.integers(20, 100, n)
+    numeric[:, NUMERIC.index("Number_of_Drivers")] = rng.integers(5, 90, n)
+    numeric[:, NUMERIC.index("Historical_Cost_of_Ride")] = rng.uniform(25, 840, n)
+    reference = numeric[:, NUMERIC.index("Historical_Cost_of_Ride")] * rng.uniform(0.9, 1.1, n)
+
+    optimizer = PriceOptimizer(n_points=points)
+    optimizer.optimize(reference, numeric)
+    runs = 20
+    start = time.perf_counter()
+    for _ in range(runs):
+        optimizer.optimize(reference, numeric)
+    elapsed = (time.perf_counter() - start) / runs
+    print(f"{n:,} rides x {points} candidates: {elapsed * 1e3:.1f} ms ({n / elapsed:,.0f} rides/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Predict-stage latency for /recommend with and without the prediction cache.
+
+Requests are drawn Zipf-style from a pool of distinct records (the CSV's
+category combinations with rider/driver counts in a narrow range), which is
+the repetition the cache is meant for.
+
+Usage: python benchmarks/bench_prediction_cache.py [model.pkl] [step]
+
+Without a model path a default GBR is trained on dynamic_pricing.csv (see ``demo_model``).
+"""
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import demo_model  # noqa: E402
+from features import FeaturePipeline  # noqa: E402
+from prediction_cache import PredictionCache  # noqa: E402
+from tree_engine import CompiledEnsemble  # noqa: E402
+
+REQUESTS = 50000
+POOL = 2000
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else demo_model.pickle_path()
+    step = float(sys.argv[2]) if len(sys.argv) > 2 else 0.01
+    engine = CompiledEnsemble.from_sklearn(joblib.load(path))
+    pipeline = FeaturePipeline.load("feature_pipeline.json")
+    rng = np.random.default_rng(0)
+
+    records = pd.read_csv("dynamic_pricing.csv").sample(POOL, replace=True, random_state=0)
+    records["Number_of_Riders"] = rng.integers(40, 60, POOL)
+    records["Number_of_Drivers"] = rng.integers(15, 25, POOL)
+    pool = [pipeline.encode_record(r) for r in records.to_dict("records")]
+    traffic = [pool[i % POOL] for i in rng.zipf(1.3, REQUESTS)]
+
+    start = time.perf_counter()
+    for X in traffic:
+        engine.predict(X)[0]
+    uncached = (time.perf_counter() - start) / REQUESTS * 1e6
+
+    cache = PredictionCache(path, step=step)
+    hit_s = miss_s = 0.0
+    for X in traffic:
+        start = time.perf_counter()
+        key = cache.key(X[0])
+        prediction = cache.get(key)
+        if prediction is None:
+            cache.put(key, engine.predict(X)[0])
+            miss_s += time.perf_counter() - start
+        else:
+            hit_s += time.perf_counter() - start
+    stats = cache.stats()
+
+    print(f"engine.predict per request: {uncached:8.2f} us")
+    print(f"cache hit (key + get):      {hit_s / max(stats['hits'], 1) * 1e6:8.2f} us")
+    print(f"cache miss (+ predict/put): {miss_s / max(stats['misses'], 1) * 1e6:8.2f} us")
+    print(f"mean with cache:            {(hit_s + miss_s) / REQUESTS * 1e6:8.2f} us")
+    print(f"hit ratio {stats['hit_ratio']:.3f}, {stats['entries']} entries, {stats['memory_bytes'] / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Per-record price from the compiled table vs full model inference.
+
+Usage: python benchmarks/bench_price_table.py [model] [price_table.npz] [n_records]
+Without a model path a default GBR is trained on dynamic_pricing.csv (see ``demo_model``);
+without a table one is compiled from the model.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import demo_model  # noqa: E402
+from model_artifact import load_engine  # noqa: E402
+from price_table import PriceTable  # noqa: E402
+
+
+def main():
+    model = sys.argv[1] if len(sys.argv) > 1 else demo_model.artifact_path()
+    n = int(sys.argv[3]) if len(sys.argv) > 3 else 1000
+    engine, pipeline = load_engine(model, "feature_pipeline.json")
+    df = pd.read_csv("dynamic_pricing.csv")
+    if len(sys.argv) > 2:
+        table = PriceTable.load(sys.argv[2], engine, pipeline)
+    else:
+        table = PriceTable.compile(engine, pipeline, df)
+    records = df.to_dict("records")[:n]
+    encoded = [pipeline.encode_record(record, with_numeric=True) for record in records]
+
+    start = time.perf_counter()
+    looked_up = [table.lookup(record, numeric[0]) for record, (_, numeric) in zip(records, encoded)]
+    lookup_s = time.perf_counter() - start
+    start = time.perf_counter()
+    predicted = [engine.predict(X)[0] for X, _ in encoded]
+    predict_s = time.perf_counter() - start
+
+    hits = np.array([value is not None for value in looked_up])
+    error = np.abs(np.array([v for v in looked_up if v is not None]) - np.array(predicted)[hits])
+    print(f"table {' x '.join(map(str, table.values.shape))}, {table.values.nbytes / 2**20:.1f} MiB")
+    print(f"lookup:  {lookup_s / len(records) * 1e6:.1f} us/record, {hits.mean():.1%} inside the grid")
+    print(f"predict: {predict_s / len(records) * 1e6:.1f} us/record")
+    print(f"error on these records: max {error.max():.4f}, mean {error.mean():.4f}; "
+          f"compiled report max {table.max_error:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Read-path latency of the reference-data cache, single-threaded and under contention.
+
+Usage: python benchmarks/bench_reference_data.py [n_lookups] [n_threads]
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from reference_data import ReferenceStore  # noqa: E402
+
+
+def lookups(store, keys, n):
+    for i in range(n):
+        store.get(keys[i % len(keys)])
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    n_threads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    src = os.path.join(os.path.dirname(__file__), "..", "dynamic_pricing.csv")
+
+    start = time.perf_counter()
+    store = ReferenceStore.from_csv(src)
+    print(f"preload: {len(store._table)} segments in {(time.perf_counter() - start) * 1e3:.1f} ms")
+    keys = list(store._table)
+
+    start = time.perf_counter()
+    lookups(store, keys, n)
+    elapsed = time.perf_counter() - start
+    print(f"1 thread: {elapsed / n * 1e9:.0f} ns/lookup")
+
+    threads = [threading.Thread(target=lookups, args=(store, keys, n // n_threads)) for _ in range(n_threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    print(f"{n_threads} threads: {elapsed / n * 1e9:.0f} ns/lookup (wall, all threads)")
+
+    small = ReferenceStore(store._table, max_entries=len(keys) // 2)
+    lookups(small, keys, n // 10)
+    print("cache half the size of the key space:", small.stats())
+
+
+if __name__ == "__main__":
+    main()
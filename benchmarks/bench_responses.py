@@ -0,0 +1,59 @@
+"""Encoding cost and size of a batch result in each response format.
+
+"dicts" is the old path: one dict per row, then json.dumps (FastAPI's
+jsonable_encoder, which the old endpoint also paid for, is not included).
+
+Usage: python benchmarks/bench_responses.py [n_rows]
+"""
+import importlib.util
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import responses  # noqa: E402
+from scoring import BATCH_DECIMALS, BATCH_FIELDS  # noqa: E402
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = np.random.default_rng(0)
+    result = {
+        "row": np.arange(n),
+        "price_recommended": rng.uniform(25, 900, n),
+        "p_complete_recommended": rng.uniform(0, 1, n),
+        "gm_pct": rng.uniform(-20, 60, n),
+        "policy_flags": rng.integers(0, 64, n).astype(np.uint8),
+        "segment_k4": rng.integers(0, 4, n),
+    }
+    summary = {"kpis": {"total_records": n}}
+
+    def dicts():
+        columns = [
+            (np.round(result[key], d) if d else result[key]).tolist() for key, d in BATCH_DECIMALS.items()
+        ]
+        rows = [dict(zip(BATCH_FIELDS, values)) for values in zip(*columns)]
+        return json.dumps({"recommendations": rows, **summary}).encode()
+
+    def encoder(fmt):
+        def run():
+            columns = responses.result_columns(result)
+            window, meta = responses.page(columns, summary, "x")
+            return responses.encode(window, meta, fmt)
+        return run
+
+    formats = ["json", "columns", "msgpack"] + (["arrow"] if importlib.util.find_spec("pyarrow") else [])
+    cases = [("dicts", dicts)] + [(fmt, encoder(fmt)) for fmt in formats]
+    print(f"{n:,} rows")
+    for name, fn in cases:
+        start = time.perf_counter()
+        body = fn()
+        elapsed = time.perf_counter() - start
+        print(f"{name:8} {elapsed * 1e3:8.0f} ms {len(body) / 2**20:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
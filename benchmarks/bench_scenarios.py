@@ -0,0 +1,72 @@
+"""Scenario sweep: one stacked pass vs uploading a perturbed CSV per scenario.
+
+The per-scenario baseline is what analysts did before /scenarios: edit the
+CSV (counts rounded back to whole numbers), then ingest, encode and score it
+again.  Model evaluation costs the same per row either way; the sweep saves
+the repeated parsing and encoding, and its larger stacks are what lets
+``ShardedEngine`` spread them over processes.
+
+Usage: python benchmarks/bench_scenarios.py [model] [copies] [n_scenarios]
+Without a model path a default GBR is trained on dynamic_pricing.csv (see ``demo_model``).
+"""
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import demo_model  # noqa: E402
+import ingest  # noqa: E402
+import scenarios  # noqa: E402
+from features import RAW_NUMERIC  # noqa: E402
+from model_artifact import load_engine  # noqa: E402
+from optimizer import PriceOptimizer  # noqa: E402
+from scoring import Scorer  # noqa: E402
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else demo_model.artifact_path()
+    copies = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    k = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    engine, pipeline = load_engine(path, "feature_pipeline.json")
+    scorer = Scorer(engine, pipeline, PriceOptimizer())
+    with open("dynamic_pricing.csv", "rb") as f:
+        header, body = f.read().split(b"\n", 1)
+    data = header + b"\n" + body * copies
+    rng = np.random.default_rng(0)
+    specs = [
+        {col: float(rng.choice([0.8, 0.9, 1.1, 1.2])) for col in rng.choice(scenarios.PERTURBABLE, 2, replace=False)}
+        for _ in range(k)
+    ]
+
+    start = time.perf_counter()
+    batch = ingest.read(data, pipeline)
+    scenarios.run(scorer, batch.columns, specs)
+    stacked_s = time.perf_counter() - start
+
+    _, factors = scenarios.parse(specs)
+    uploads = []
+    for row in factors:
+        df = pd.read_csv(io.BytesIO(data))
+        for i, col in enumerate(RAW_NUMERIC):
+            if row[i] != 1.0:
+                values = df[col] * row[i]
+                df[col] = values.round() if ingest.SCHEMA[col] == ingest.COUNT else values
+        uploads.append(df.to_csv(index=False).encode())
+
+    start = time.perf_counter()
+    for upload in uploads:
+        columns = ingest.read(upload, pipeline).columns
+        scorer.summary().update(scorer.score_columns(columns))
+    separate_s = time.perf_counter() - start
+
+    print(f"{k} scenarios + base over {batch.n_accepted:,} rows")
+    print(f"sweep:            {stacked_s * 1e3:.0f} ms")
+    print(f"upload per case:  {separate_s * 1e3:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
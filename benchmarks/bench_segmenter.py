@@ -0,0 +1,49 @@
+"""Batched nearest-centroid segment assignment vs sklearn KMeans.predict.
+
+Usage: python benchmarks/bench_segmenter.py [n_rows]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from features import NUMERIC  # noqa: E402
+from segmenter import FEATURES, Segmenter  # noqa: E402
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    root = os.path.join(os.path.dirname(__file__), "..")
+    segmenter = Segmenter.load(os.path.join(root, "segmenter.json"))
+    rng = np.random.default_rng(0)
+    numeric = np.zeros((n, len(NUMERIC)))
+    columns = [NUMERIC.index(col) for col in FEATURES]
+    numeric[:, columns] = segmenter.mean + segmenter.scale * rng.standard_normal((n, len(FEATURES)))
+
+    start = time.perf_counter()
+    segments = segmenter.assign(numeric)
+    batched = time.perf_counter() - start
+    print(f"assign: {batched * 1e3:.0f} ms for {n:,} rows ({batched / n * 1e9:.0f} ns/row)")
+
+    from sklearn.cluster import KMeans
+
+    kmeans = KMeans(n_clusters=segmenter.n_clusters, n_init=1, max_iter=1)
+    kmeans.fit(segmenter.centroids)
+    kmeans.cluster_centers_ = segmenter.centroids
+    X = (numeric[:, columns] - segmenter.mean) / segmenter.scale
+    start = time.perf_counter()
+    expected = kmeans.predict(X)
+    print(f"KMeans.predict, one call: {(time.perf_counter() - start) * 1e3:.0f} ms; "
+          f"agreement {np.mean(expected == segments):.6f}")
+    rows = min(n, 2000)
+    start = time.perf_counter()
+    for i in range(rows):
+        kmeans.predict(X[i:i + 1])
+    per_row = (time.perf_counter() - start) / rows
+    print(f"KMeans.predict per row: {per_row * 1e6:.0f} us/row (~{per_row * n:.0f} s for {n:,} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Segment roll-ups from a precomputed cube vs pandas groupby on a scored dataset.
+
+Usage: python benchmarks/bench_segments.py [n_rows]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from features import FeaturePipeline  # noqa: E402
+from segments import DIMENSIONS, INVENTORY, SegmentCube, inventory_band  # noqa: E402
+
+QUERIES = [
+    DIMENSIONS,
+    ["Location_Category", "Vehicle_Type"],
+    [INVENTORY],
+    [],
+]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    root = os.path.join(os.path.dirname(__file__), "..")
+    pipeline = FeaturePipeline.load(os.path.join(root, "feature_pipeline.json"))
+    rng = np.random.default_rng(0)
+    # Integer codes, as ingest hands them to the scorer.
+    columns = {
+        col: rng.integers(0, len(pipeline.categories[col]), n)
+        for col in DIMENSIONS if col != INVENTORY
+    }
+    columns["Number_of_Riders"] = rng.integers(20, 100, n).astype(np.float64)
+    columns["Number_of_Drivers"] = rng.integers(5, 90, n).astype(np.float64)
+    result = {
+        "price_recommended": rng.uniform(25, 900, n),
+        "p_complete_recommended": rng.uniform(0, 1, n),
+        "expected_revenue": rng.uniform(0, 50_000, n),
+    }
+
+    start = time.perf_counter()
+    cube = SegmentCube(pipeline).update(columns, result)
+    print(f"cube build over {n:,} rows: {(time.perf_counter() - start) * 1e3:.0f} ms "
+          f"({cube.sums.nbytes / 1024:.0f} KiB)")
+
+    df = pd.DataFrame({col: columns[col] for col in DIMENSIONS if col != INVENTORY})
+    df[INVENTORY] = inventory_band(columns, pipeline)
+    for key, values in result.items():
+        df[key] = values
+    for by in QUERIES:
+        start = time.perf_counter()
+        segments = cube.query(by)
+        cube_ms = (time.perf_counter() - start) * 1e3
+        start = time.perf_counter()
+        if by:
+            df.groupby(by, observed=True).agg(
+                count=("price_recommended", "size"), avg_price=("price_recommended", "mean"),
+                conversion=("p_complete_recommended", "mean"), revenue=("expected_revenue", "sum"),
+            )
+        else:
+            df[list(result)].agg(["size", "mean", "sum"])
+        pandas_ms = (time.perf_counter() - start) * 1e3
+        print(f"by {by or 'nothing'}: {len(segments)} segments, cube {cube_ms:.2f} ms, groupby {pandas_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
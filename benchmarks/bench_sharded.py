@@ -0,0 +1,46 @@
+"""Batch throughput of ShardedEngine against single-process CompiledEnsemble.
+
+Usage: python benchmarks/bench_sharded.py [model] [n_rows] [max_workers]
+
+Without a model path a default GBR artifact is built from dynamic_pricing.csv (see ``demo_model``).
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import demo_model  # noqa: E402
+from model_artifact import load_engine  # noqa: E402
+from sharded import ShardedEngine  # noqa: E402
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else demo_model.artifact_path()
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+    max_workers = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count()
+    engine, _ = load_engine(path, "feature_pipeline.json")
+    X = np.random.default_rng(0).normal(size=(n, engine.n_features))
+
+    start = time.perf_counter()
+    expected = engine.predict(X)
+    single = n / (time.perf_counter() - start)
+    print(f"{os.cpu_count()} CPUs, {n:,} rows")
+    print(f"in-process:  {single:12,.0f} rows/s")
+
+    workers = 2
+    while workers <= max_workers:
+        sharded = ShardedEngine(engine, workers, min_rows=1)
+        sharded.predict(X[:workers * 1000])  # start the pool outside the timing
+        start = time.perf_counter()
+        out = sharded.predict(X)
+        rate = n / (time.perf_counter() - start)
+        sharded.close()
+        assert np.array_equal(out, expected)
+        print(f"{workers:2d} workers: {rate:12,.0f} rows/s ({rate / single:.2f}x)")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
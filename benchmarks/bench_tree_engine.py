@@ -0,0 +1,50 @@
+"""Rows/sec of CompiledEnsemble against GradientBoostingRegressor.predict.
+
+Usage: python benchmarks/bench_tree_engine.py [model.pkl]
+
+Without a model path a default GBR is trained on dynamic_pricing.csv (see ``demo_model``).
+"""
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import demo_model  # noqa: E402
+from tree_engine import CompiledEnsemble  # noqa: E402
+
+BATCH_SIZES = [1, 64, 4096, 1_000_000]
+
+
+def rows_per_sec(fn, X, min_time=1.0):
+    fn(X)
+    calls, start = 0, time.perf_counter()
+    while True:
+        fn(X)
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return calls * len(X) / elapsed
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else demo_model.pickle_path()
+    model = joblib.load(path)
+    engine = CompiledEnsemble.from_sklearn(model)
+    rng = np.random.default_rng(0)
+
+    print(f"{engine.n_trees} trees, depth {engine.depth}, {engine.n_features} features")
+    print(f"{'batch':>9} {'sklearn rows/s':>16} {'engine rows/s':>16} {'speedup':>8}")
+    for n in BATCH_SIZES:
+        X = rng.normal(size=(n, engine.n_features))
+        if not np.array_equal(model.predict(X), engine.predict(X)):
+            raise SystemExit(f"prediction mismatch at batch size {n}")
+        sk = rows_per_sec(model.predict, X)
+        en = rows_per_sec(engine.predict, X)
+        print(f"{n:>9} {sk:>16,.0f} {en:>16,.0f} {en / sk:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""Online drift monitoring of scoring inputs and predicted prices against the training data.
+
+At export time ``snapshot`` records the training distribution.  It bins each
+numeric feature at ``BINS`` training quantiles; that is the unscaled NUMERIC
+block, i.e. the raw inputs after capping plus the engineered features.  It
+also counts each category, with a slot for unknown values, and bins the
+model's own predictions on the training rows.  train.py writes the snapshot
+next to the model as ``<model>.baseline.json``.  For a model that has none:
+
+    python drift.py dynamic_pricing.csv model.apo
+
+While serving, the request path only appends to a bounded deque.  A
+/recommend call adds its record, encoded row and prediction.  A batch upload
+adds at most ``SAMPLE_ROWS`` rows drawn from it.  So the per-request cost
+does not grow with traffic or batch size.  When the queue fills faster than
+it drains, the oldest samples are dropped and counted.
+
+A background task calls ``drain`` every few seconds.  ``drain`` decodes the
+queued rows from what the model saw, so they are capped like the baseline,
+folds them into counts over the baseline's bins and into a QuantileSketch
+per numeric feature, then recomputes PSI and KS per feature.  Windows roll
+every ``window_seconds`` and the finished window is kept for comparison, so
+memory is two windows of fixed-size arrays whatever the traffic.
+
+PSI sums (live - base) * ln(live / base) over bins, with both shares
+floored at ``PSI_FLOOR``.  Above 0.1 is usually read as a moderate shift
+and above 0.25 as a major one.  KS is the largest gap between the binned
+CDFs, which is a lower bound on the exact statistic.
+
+Shadow scoring: while a challenger is live, the champion's drained rows are
+also scored by the challenger, off the request path, after re-encoding
+them from the raw inputs if its feature pipeline differs.  Its prices are
+then compared with what the champion served for the same rows.
+"""
+import collections
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from features import CATEGORICAL, NUMERIC, RAW_NUMERIC
+from kpis import QuantileSketch
+
+BINS = 20
+SAMPLE_ROWS = 1024
+QUEUE_ITEMS = 4096
+WINDOW_SECONDS = 3600.0
+PSI_FLOOR = 1e-4
+QUANTILES = (0.1, 0.5, 0.9)
+# Smaller values count as zero in the sketches, which otherwise grow a bucket per power of gamma.
+SKETCH_FLOOR = 1e-6
+# Values are binned as float32: the baseline is decoded from the scaled training matrix, and
+# the last-bit error would otherwise move values that sit exactly on an edge (counts, ties).
+BIN_DTYPE = np.float32
+PRICE = "predicted_price"
+
+
+def baseline_path(model_path):
+    return os.path.splitext(model_path)[0] + ".baseline.json"
+
+
+def decode(pipeline, X):
+    """(unscaled numeric block, {column: codes}) from encoded rows; unknown categories get len(vocabulary)."""
+    X = np.asarray(X, dtype=np.float64)
+    numeric = X[:, :len(NUMERIC)] * pipeline.scale + pipeline.mean
+    codes, offset = {}, len(NUMERIC)
+    for col in CATEGORICAL:
+        size = len(pipeline.categories[col])
+        block = X[:, offset:offset + size]
+        codes[col] = np.where(block.max(axis=1) > 0, block.argmax(axis=1), size)
+        offset += size
+    return numeric, codes
+
+
+def _binned(values, bins):
+    values = np.asarray(values, dtype=BIN_DTYPE)
+    edges = np.unique(np.quantile(values, np.linspace(0.0, 1.0, bins + 1)[1:-1]))
+    counts = np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+    return {
+        "edges": edges.tolist(),
+        "counts": counts.tolist(),
+        "quantiles": dict(zip(map(str, QUANTILES), np.quantile(values, QUANTILES).tolist())),
+    }
+
+
+def snapshot(pipeline, X, predictions, bins=BINS, source=None):
+    """Baseline distributions of encoded training rows ``X`` and the model's ``predictions`` on them."""
+    numeric, codes = decode(pipeline, X)
+    features = {col: _binned(numeric[:, i], bins) for i, col in enumerate(NUMERIC)}
+    for col in CATEGORICAL:
+        size = len(pipeline.categories[col])
+        features[col] = {"categories": pipeline.categories[col],
+                         "counts": np.bincount(codes[col], minlength=size + 1).tolist()}
+    features[PRICE] = _binned(predictions, bins)
+    return {"rows": len(X), "source": source, "bins": bins, "features": features}
+
+
+def save(baseline, path):
+    with open(path, "w") as f:
+        json.dump(baseline, f)
+
+
+def load(path):
+    """The baseline at ``path``, or None when there is none."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def psi(expected, actual):
+    expected = np.maximum(expected / expected.sum(), PSI_FLOOR)
+    actual = np.maximum(actual / actual.sum(), PSI_FLOOR)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def ks(expected, actual):
+    return float(np.abs(np.cumsum(expected) / expected.sum() - np.cumsum(actual) / actual.sum()).max())
+
+
+class _Window:
+    def __init__(self, monitor, started):
+        self.started = started
+        self.rows = 0
+        self.counts = {name: np.zeros(len(counts)) for name, counts in monitor.base.items()}
+        self.sketches = {name: QuantileSketch() for name in monitor.edges}
+
+    def update(self, monitor, values):
+        self.rows += len(values[PRICE])
+        for name, column in values.items():
+            edges = monitor.edges.get(name)
+            index = column if edges is None else np.searchsorted(edges, column.astype(BIN_DTYPE), side="right")
+            self.counts[name] += np.bincount(index, minlength=len(self.counts[name]))
+            if edges is not None:
+                self.sketches[name].update(np.where(column < SKETCH_FLOOR, 0.0, column))
+
+    def report(self, monitor):
+        features = {}
+        if self.rows:
+            for name, base in monitor.base.items():
+                entry = {"psi": psi(base, self.counts[name])}
+                if name in monitor.edges:
+                    entry["ks"] = ks(base, self.counts[name])
+                    entry["quantiles"] = {str(q): self.sketches[name].quantile(q) for q in QUANTILES}
+                features[name] = entry
+        return {"started": self.started, "rows": self.rows, "features": features}
+
+
+class DriftMonitor:
+    """Streaming comparison of one model version's traffic with its training ``baseline``."""
+
+    def __init__(self, baseline, pipeline, window_seconds=WINDOW_SECONDS, sample_rows=SAMPLE_ROWS,
+                 max_items=QUEUE_ITEMS, clock=time.time, seed=0):
+        self.baseline = baseline
+        self.pipeline = pipeline
+        self.window_seconds = window_seconds
+        self.sample_rows = sample_rows
+        self.clock = clock
+        features = baseline["features"]
+        if any(features[col]["categories"] != pipeline.categories[col] for col in CATEGORICAL):
+            raise ValueError("baseline was recorded with different category vocabularies")
+        self.base = {name: np.asarray(features[name]["counts"], dtype=np.float64)
+                     for name in NUMERIC + CATEGORICAL + [PRICE]}
+        self.edges = {name: np.asarray(features[name]["edges"], dtype=BIN_DTYPE) for name in NUMERIC + [PRICE]}
+        self._queue = collections.deque(maxlen=max_items)
+        self._rng = np.random.default_rng(seed)
+        self.submitted = 0
+        self.drained = 0
+        self.current = _Window(self, clock())
+        self.previous = None
+        self.shadow = None
+        self._report = None
+
+    def submit_record(self, record, prediction, X):
+        """Queue one /recommend row: its record, prediction and encoded (1, n_features) row."""
+        self._queue.append((record, prediction, X))
+        self.submitted += 1
+
+    def submit_columns(self, columns, predictions):
+        """Queue up to ``sample_rows`` rows of a scored batch (decoded columns, model predictions)."""
+        n = len(predictions)
+        needed = [col for col in RAW_NUMERIC + CATEGORICAL if col in columns]
+        if n > self.sample_rows:
+            index = self._rng.integers(0, n, self.sample_rows)
+            columns = {col: np.asarray(columns[col])[index] for col in needed}
+            predictions = np.asarray(predictions)[index]
+        else:
+            columns = {col: columns[col] for col in needed}
+        self._queue.append((columns, predictions))
+        self.submitted += 1
+
+    def _collect(self):
+        """Drain the queue into ({feature: values or codes}, encoded rows, records, blocks)."""
+        records, blocks = [], []
+        while True:
+            try:
+                item = self._queue.popleft()
+            except IndexError:
+                break
+            (records if len(item) == 3 else blocks).append(item)
+        self.drained += len(records) + len(blocks)
+        X, predictions = [], []
+        if records:
+            X.append(np.vstack([item[2] for item in records]))
+            predictions.append(np.asarray([item[1] for item in records], dtype=np.float64))
+        for columns, block_predictions in blocks:
+            X.append(self.pipeline.encode_columns(columns))
+            predictions.append(np.asarray(block_predictions, dtype=np.float64))
+        if not predictions:
+            return None
+        X = np.concatenate(X)
+        numeric, codes = decode(self.pipeline, X)
+        values = {col: numeric[:, i] for i, col in enumerate(NUMERIC)}
+        values.update(codes)
+        values[PRICE] = np.concatenate(predictions)
+        return values, X, records, blocks
+
+    def drain(self, shadow=None):
+        """Fold queued rows into the current window and refresh the report; returns the rows folded.
+
+        ``shadow`` is a challenger (anything with ``name``, ``engine`` and
+        ``pipeline``) to score the same rows with.
+        """
+        now = self.clock()
+        if now - self.current.started >= self.window_seconds:
+            self.previous, self.current = self.current, _Window(self, now)
+        collected = self._collect()
+        rows = 0
+        if collected is not None:
+            values, X, records, blocks = collected
+            rows = len(X)
+            self.current.update(self, values)
+            if shadow is not None:
+                if shadow.pipeline.state() != self.pipeline.state():
+                    # The challenger encodes differently; rebuild its rows from the raw inputs, in the same order.
+                    X = np.vstack([shadow.pipeline.encode_record(item[0]) for item in records]
+                                  + [shadow.pipeline.encode_columns(self._labelled(columns))
+                                     for columns, _ in blocks])
+                self._shadow(shadow, X, values[PRICE])
+        if shadow is None:
+            self.shadow = None
+        self._report = {
+            "baseline": {"rows": self.baseline["rows"], "source": self.baseline.get("source")},
+            "submitted": self.submitted,
+            "dropped": self.submitted - self.drained - len(self._queue),
+            "queued": len(self._queue),
+            "current": self.current.report(self),
+            "previous": self.previous.report(self) if self.previous is not None else None,
+            "shadow": self._shadow_report(),
+        }
+        return rows
+
+    def _labelled(self, columns):
+        """``columns`` with category codes (see ``ingest``) turned back into labels for another vocabulary."""
+        columns = dict(columns)
+        for col in CATEGORICAL:
+            values = np.asarray(columns[col])
+            if values.dtype.kind in "iu":
+                columns[col] = np.array(self.pipeline.categories[col] + [None], dtype=object)[values]
+        return columns
+
+    def _shadow(self, shadow, X, served):
+        if self.shadow is None or self.shadow["version"] != shadow.name:
+            size = len(self.base[PRICE])
+            self.shadow = {"version": shadow.name, "rows": 0, "diff": 0.0, "abs_diff": 0.0,
+                           "served": np.zeros(size), "shadow": np.zeros(size)}
+        prices = np.asarray(shadow.engine.predict(X), dtype=np.float64)
+        edges = self.edges[PRICE]
+        state = self.shadow
+        state["rows"] += len(prices)
+        state["diff"] += float((prices - served).sum())
+        state["abs_diff"] += float(np.abs(prices - served).sum())
+        state["served"] += np.bincount(np.searchsorted(edges, served.astype(BIN_DTYPE), side="right"), minlength=len(edges) + 1)
+        state["shadow"] += np.bincount(np.searchsorted(edges, prices.astype(BIN_DTYPE), side="right"), minlength=len(edges) + 1)
+
+    def _shadow_report(self):
+        state = self.shadow
+        if state is None:
+            return None
+        report = {"version": state["version"], "rows": state["rows"]}
+        if state["rows"]:
+            report.update(mean_diff=state["diff"] / state["rows"], mean_abs_diff=state["abs_diff"] / state["rows"],
+                          psi=psi(state["served"], state["shadow"]), ks=ks(state["served"], state["shadow"]))
+        return report
+
+    def report(self):
+        """The report as of the last ``drain`` (None before the first)."""
+        return self._report
+
+
+if __name__ == "__main__":
+    from ingest import read
+    from model_artifact import load_engine
+
+    src = sys.argv[1] if len(sys.argv) > 1 else "dynamic_pricing.csv"
+    model_path = sys.argv[2] if len(sys.argv) > 2 else "model.apo"
+    pipeline_path = sys.argv[3] if len(sys.argv) > 3 else "feature_pipeline.json"
+    engine, pipeline = load_engine(model_path, pipeline_path)
+    with open(src, "rb") as f:
+        X = pipeline.encode_columns(read(f.read(), pipeline).columns)
+    dst = baseline_path(model_path)
+    save(snapshot(pipeline, X, engine.predict(X), source=os.path.basename(src)), dst)
+    print(f"wrote {dst}")
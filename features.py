@@ -0,0 +1,317 @@
+"""Serving-side feature pipeline for the pricing model.
+
+Mirrors the notebook's preprocessing -- IQR outlier capping of the raw
+numeric columns, engineered ratios and scores, a StandardScaler over the
+numeric block and a OneHotEncoder over the ride categories -- with every
+fitted parameter frozen into plain NumPy arrays.  Output columns are laid
+out like the notebook's ColumnTransformer: scaled numeric features first,
+then the one-hot block.
+
+The same object encodes training data (``train.py``) and requests, and it
+travels inside the model artifact, so the capping bounds, scaling and
+vocabularies a model was trained with are the ones it is served with.
+Capping only shapes what the model sees: the unscaled numeric block handed
+back for pricing, guardrails and KPIs keeps the values the caller sent.
+Everything works column-at-a-time on NumPy arrays; no code runs per row
+except ``encode_record``, which handles one request.
+
+Rebuild the shipped parameters from the training data with:
+
+    python features.py dynamic_pricing.csv feature_pipeline.json
+"""
+import itertools
+import json
+import math
+import sys
+
+import numpy as np
+
+RAW_NUMERIC = [
+    "Number_of_Riders",
+    "Number_of_Drivers",
+    "Number_of_Past_Rides",
+    "Average_Ratings",
+    "Expected_Ride_Duration",
+    "Historical_Cost_of_Ride",
+]
+ENGINEERED = [
+    "Rider_Driver_Ratio",
+    "Driver_to_Rider_Ratio",
+    "Supply_Tightness",
+    "Loyalty_Score",
+    "Cost_per_Min",
+    "Inventory_Health_Index",
+]
+NUMERIC = RAW_NUMERIC + ENGINEERED
+# Raw inputs each engineered feature is computed from (see _engineer).
+ENGINEERED_INPUTS = {
+    "Rider_Driver_Ratio": ["Number_of_Riders", "Number_of_Drivers"],
+    "Driver_to_Rider_Ratio": ["Number_of_Riders", "Number_of_Drivers"],
+    "Supply_Tightness": ["Number_of_Riders", "Number_of_Drivers"],
+    "Loyalty_Score": ["Customer_Loyalty_Status"],
+    "Cost_per_Min": ["Historical_Cost_of_Ride", "Expected_Ride_Duration"],
+    "Inventory_Health_Index": ["Number_of_Drivers"],
+}
+CATEGORICAL = [
+    "Location_Category",
+    "Customer_Loyalty_Status",
+    "Time_of_Booking",
+    "Vehicle_Type",
+]
+
+LOYALTY_MAP = {"Regular": 0, "Silver": 1, "Gold": 2}
+IQR_K = 1.5  # caps at Q1 - 1.5 IQR and Q3 + 1.5 IQR, like the notebook
+FIT_CHUNK_ROWS = 1_000_000
+COST_RATIO = 0.7  # assume 70% of fare is operating cost
+EPS = 1e-6
+
+
+def _engineer(riders, drivers, duration, cost, loyalty_score, driver_mean):
+    """Engineered block in ENGINEERED order; works on floats or arrays."""
+    return [
+        riders / (drivers + EPS),
+        drivers / (riders + EPS),
+        1.0 * (riders > drivers),
+        loyalty_score,
+        COST_RATIO * cost / (duration + EPS),
+        drivers / (driver_mean + EPS),
+    ]
+
+
+class FeaturePipeline:
+    def __init__(self, mean, scale, categories, defaults, driver_mean, bounds=None):
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.categories = {col: list(categories[col]) for col in CATEGORICAL}
+        self.defaults = {col: float(defaults[col]) for col in RAW_NUMERIC}
+        self.driver_mean = float(driver_mean)
+        # (2, len(RAW_NUMERIC)) lower/upper caps for the raw numeric columns; None leaves them uncapped.
+        self.bounds = None if bounds is None else np.asarray(bounds, dtype=np.float64)
+
+        # One-hot lookups: value -> output column for single records, and the code
+        # range each batch column is compared against (unknown codes match nothing).
+        self._slots = {}
+        self._codes = {}
+        offset = len(NUMERIC)
+        for col in CATEGORICAL:
+            vocab = self.categories[col]
+            self._slots[col] = {value: offset + i for i, value in enumerate(vocab)}
+            self._codes[col] = np.arange(len(vocab))
+            offset += len(vocab)
+        self._loyalty_by_code = np.asarray(
+            [LOYALTY_MAP.get(v, 0) for v in self.categories["Customer_Loyalty_Status"]] + [0],
+            dtype=np.float64,
+        )
+        self.n_features = offset
+        self.feature_names = NUMERIC + [
+            f"{col}_{value}" for col in CATEGORICAL for value in self.categories[col]
+        ]
+
+    @classmethod
+    def fit(cls, columns, cap_outliers=True):
+        """Fit on a mapping of column name -> array (a DataFrame works).
+
+        With ``cap_outliers`` the IQR bounds of each raw numeric column are
+        frozen and every later encode clips to them.  Scaling statistics are
+        accumulated ``FIT_CHUNK_ROWS`` at a time, so fitting never holds the
+        whole engineered block.
+        """
+        arrays = {col: np.asarray(columns[col]) for col in RAW_NUMERIC + CATEGORICAL}
+        # One row per column, so every quantile works on contiguous memory.
+        raw = np.stack([arrays[col].astype(np.float64, copy=False) for col in RAW_NUMERIC])
+        q1, median, q3 = np.quantile(raw, [0.25, 0.5, 0.75], axis=1)
+        defaults = dict(zip(RAW_NUMERIC, median.tolist()))
+        bounds = None
+        drivers = raw[RAW_NUMERIC.index("Number_of_Drivers")]
+        if cap_outliers:
+            bounds = np.stack([q1 - IQR_K * (q3 - q1), q3 + IQR_K * (q3 - q1)])
+            drivers = np.clip(drivers, *bounds[:, RAW_NUMERIC.index("Number_of_Drivers")])
+        driver_mean = float(drivers.mean())
+        categories = {
+            col: sorted({str(v) for v in set(arrays[col].astype(object, copy=False).tolist())})
+            for col in CATEGORICAL
+        }
+        del raw
+        unfitted = cls(np.zeros(len(NUMERIC)), np.ones(len(NUMERIC)), categories, defaults, driver_mean, bounds)
+
+        # Per-chunk means and squared deviations, combined with Chan's formula.
+        count, mean, m2 = 0, np.zeros(len(NUMERIC)), np.zeros(len(NUMERIC))
+        for start in range(0, len(drivers), FIT_CHUNK_ROWS):
+            block = unfitted._numeric_block({col: a[start:start + FIT_CHUNK_ROWS] for col, a in arrays.items()})
+            k = len(block)
+            block_mean = block.mean(axis=0)
+            delta = block_mean - mean
+            m2 += np.square(block - block_mean).sum(axis=0) + np.square(delta) * count * k / (count + k)
+            mean += delta * k / (count + k)
+            count += k
+        scale = np.sqrt(m2 / count)
+        scale[scale == 0.0] = 1.0
+        return cls(mean, scale, categories, defaults, driver_mean, bounds)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_state(json.load(f), path)
+
+    @classmethod
+    def from_state(cls, state, source="pipeline state"):
+        if state["numeric"] != NUMERIC or list(state["categories"]) != CATEGORICAL:
+            raise ValueError(f"{source} was built for a different feature layout")
+        return cls(state["mean"], state["scale"], state["categories"], state["defaults"], state["driver_mean"],
+                   state.get("bounds"))
+
+    def state(self):
+        return {
+            "numeric": NUMERIC,
+            "mean": self.mean.tolist(),
+            "scale": self.scale.tolist(),
+            "categories": self.categories,
+            "defaults": self.defaults,
+            "driver_mean": self.driver_mean,
+            "bounds": None if self.bounds is None else self.bounds.tolist(),
+        }
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.state(), f, indent=2)
+
+    def encode_record(self, record, with_numeric=False):
+        """Encode one request record into a (1, n_features) float64 row.
+
+        With ``with_numeric`` also return the unscaled, uncapped (1, len(NUMERIC)) block.
+        """
+        raw = []
+        for col in RAW_NUMERIC:
+            value = record.get(col)
+            if value is None or value == "":
+                raw.append(self.defaults[col])
+                continue
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{col} must be numeric, got {value!r}") from None
+            # NaN is a missing value, imputed like encode_columns does.
+            raw.append(self.defaults[col] if math.isnan(value) else value)
+        loyalty = LOYALTY_MAP.get(record.get("Customer_Loyalty_Status"), 0)
+        capped = raw
+        if self.bounds is not None:
+            capped = [min(max(v, lo), hi) for v, lo, hi in zip(raw, *self.bounds.tolist())]
+
+        out = np.zeros((1, self.n_features))
+        out[0, :len(NUMERIC)] = self._engineered_record(capped, loyalty)
+        numeric = None
+        if with_numeric:
+            numeric = (out[:, :len(NUMERIC)].copy() if capped is raw
+                       else np.array([self._engineered_record(raw, loyalty)]))
+        out[0, :len(NUMERIC)] -= self.mean
+        out[0, :len(NUMERIC)] /= self.scale
+        for col in CATEGORICAL:
+            slot = self._slots[col].get(record.get(col))
+            if slot is not None:
+                out[0, slot] = 1.0
+        return (out, numeric) if with_numeric else out
+
+    def encode_columns(self, columns, with_numeric=False):
+        """Encode a mapping of column name -> array into an (n, n_features) matrix.
+
+        With ``with_numeric`` also return the unscaled, uncapped (n, len(NUMERIC)) block.
+        """
+        codes = {col: self.category_codes(col, columns[col]) for col in CATEGORICAL}
+        raw = self._raw_numeric(columns)
+        loyalty = self._loyalty_by_code[codes["Customer_Loyalty_Status"]]
+        capped = self._engineered(self._capped(raw), loyalty)
+        out = np.empty((len(capped), self.n_features))
+        np.subtract(capped, self.mean, out=out[:, :len(NUMERIC)])
+        out[:, :len(NUMERIC)] /= self.scale
+        self._one_hot(codes, out[:, len(NUMERIC):])
+        if not with_numeric:
+            return out
+        return out, capped if self.bounds is None else self._engineered(raw, loyalty)
+
+    def encode_perturbed(self, columns, factors):
+        """Encode one copy of ``columns`` per row of ``factors``, stacked copy after copy.
+
+        ``factors`` is a (k, len(RAW_NUMERIC)) array of multipliers for the raw
+        numeric columns.  The one-hot block is the same for every copy, so it is
+        encoded once and broadcast; only the numeric block is rebuilt.  Returns
+        the (k * n, n_features) matrix and the unscaled, uncapped numeric block.
+        """
+        factors = np.asarray(factors, dtype=np.float64)
+        codes = {col: self.category_codes(col, columns[col]) for col in CATEGORICAL}
+        raw = np.column_stack(self._raw_numeric(columns))
+        k, n = len(factors), len(raw)
+        stacked = (raw[None, :, :] * factors[:, None, :]).reshape(k * n, len(RAW_NUMERIC))
+        loyalty = np.tile(self._loyalty_by_code[codes["Customer_Loyalty_Status"]], k)
+        numeric = self._engineered(list(stacked.T), loyalty)
+        capped = numeric
+        if self.bounds is not None:
+            capped = self._engineered(list(np.clip(stacked, self.bounds[0], self.bounds[1]).T), loyalty)
+
+        out = np.empty((k * n, self.n_features))
+        np.subtract(capped, self.mean, out=out[:, :len(NUMERIC)])
+        out[:, :len(NUMERIC)] /= self.scale
+        one_hot = np.empty((n, self.n_features - len(NUMERIC)))
+        self._one_hot(codes, one_hot)
+        out.reshape(k, n, self.n_features)[:, :, len(NUMERIC):] = one_hot
+        return out, numeric
+
+    def _one_hot(self, codes, out):
+        offset = 0
+        for col in CATEGORICAL:
+            width = len(self.categories[col])
+            out[:, offset:offset + width] = codes[col][:, None] == self._codes[col]
+            offset += width
+
+    def category_codes(self, col, values):
+        """Vocabulary index per value; unknown values get len(vocabulary).
+
+        Integer arrays are taken to be codes already (see ``ingest``) and pass through.
+        """
+        values = np.asarray(values)
+        if values.dtype.kind in "iu":
+            return values.astype(np.intp, copy=False)
+        # dict.get mapped in C over the list is about twice as fast as one comparison pass per value.
+        index = {value: i for i, value in enumerate(self.categories[col])}
+        unknown = itertools.repeat(len(index))
+        return np.fromiter(map(index.get, values.tolist(), unknown), dtype=np.intp, count=len(values))
+
+    def _raw_numeric(self, columns):
+        n = len(columns[CATEGORICAL[0]])
+        raw = []
+        for col in RAW_NUMERIC:
+            if col in columns:
+                values = np.asarray(columns[col], dtype=np.float64)
+                raw.append(np.where(np.isnan(values), self.defaults[col], values))
+            else:
+                raw.append(np.full(n, self.defaults[col]))
+        return raw
+
+    def _capped(self, raw):
+        if self.bounds is None:
+            return raw
+        return [np.clip(values, lo, hi) for values, lo, hi in zip(raw, *self.bounds)]
+
+    def _numeric_block(self, columns, loyalty_codes=None):
+        """The capped engineered block the model sees, before scaling."""
+        if loyalty_codes is None:
+            loyalty_codes = self.category_codes("Customer_Loyalty_Status", columns["Customer_Loyalty_Status"])
+        return self._engineered(self._capped(self._raw_numeric(columns)), self._loyalty_by_code[loyalty_codes])
+
+    def _engineered_record(self, raw, loyalty):
+        riders, drivers, _, _, duration, cost = raw
+        values = raw + _engineer(riders, drivers, duration, cost, loyalty, self.driver_mean)
+        return [v if math.isfinite(v) else 0.0 for v in values]
+
+    def _engineered(self, raw, loyalty):
+        riders, drivers, _, _, duration, cost = raw
+        block = np.column_stack(raw + _engineer(riders, drivers, duration, cost, loyalty, self.driver_mean))
+        block[~np.isfinite(block)] = 0.0
+        return block
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    src = sys.argv[1] if len(sys.argv) > 1 else "dynamic_pricing.csv"
+    dst = sys.argv[2] if len(sys.argv) > 2 else "feature_pipeline.json"
+    FeaturePipeline.fit(pd.read_csv(src)).save(dst)
+    print(f"wrote {dst}")
@@ -0,0 +1,125 @@
+"""Serving-side pricing guardrails from the notebook's ``run_policy_audit``.
+
+Every rule is a NumPy boolean mask over the batch; violations are packed into
+a per-row ``uint8`` bitmask (bit ``i`` set means ``RULES[i]`` failed).  In
+``clip`` mode prices are first pulled into the interval allowed by the
+stability band, the GM floor and the competitor cap/floor (where they cross,
+the GM floor wins, so a clipped price never loses money), then re-audited;
+``gm_base_ok`` and ``cancel_ok`` pull in opposite directions (GM rises with
+price, completion falls) so they are only ever flagged.
+"""
+import numpy as np
+
+RULES = ["stab_ok", "gm12_ok", "gm_base_ok", "cancel_ok", "comp_up_ok", "comp_lo_ok"]
+MODES = ("clip", "flag")
+
+STABILITY = 0.15
+MIN_GM_PCT = 12.0
+COMPETITOR_CAP = 1.2
+COMPETITOR_FLOOR = 0.8
+# Slack so prices sitting exactly on a band edge are not flagged over rounding.
+TOLERANCE = 1e-9
+
+
+class Guardrails:
+    def __init__(self, optimizer, mode="clip", stability=STABILITY, min_gm_pct=MIN_GM_PCT,
+                 competitor_cap=COMPETITOR_CAP, competitor_floor=COMPETITOR_FLOOR):
+        if mode not in MODES:
+            raise ValueError(f"guardrail mode must be one of {MODES}, got {mode!r}")
+        self.optimizer = optimizer
+        self.mode = mode
+        self.stability = stability
+        self.min_gm_pct = min_gm_pct
+        self.competitor_cap = competitor_cap
+        self.competitor_floor = competitor_floor
+
+    def audit(self, price, baseline, cost, p_complete, p_baseline, competitor):
+        """Bitmask of violated rules; a NaN competitor price passes both competitor rules."""
+        gm = 1.0 - cost / price
+        gm_baseline = 1.0 - cost / baseline
+        masks = [
+            np.abs(price - baseline) > (self.stability + TOLERANCE) * baseline,
+            gm * 100.0 < self.min_gm_pct - TOLERANCE,
+            gm < gm_baseline,
+            p_complete < p_baseline,
+            price > competitor * self.competitor_cap,
+            price < competitor * self.competitor_floor,
+        ]
+        flags = np.zeros(len(price), dtype=np.uint8)
+        for bit, mask in enumerate(masks):
+            flags |= mask.view(np.uint8) << np.uint8(bit)
+        return flags
+
+    def apply(self, result, numeric, competitor=None):
+        """Audit (and in clip mode adjust) a scoring result in place.
+
+        Rules are checked against the result's ``policy_baseline`` price and
+        its completion probability.  Clipping also narrows ``bounds_low`` and
+        ``bounds_high`` to the allowed interval.
+        """
+        n = len(result["price_recommended"])
+        if competitor is None:
+            competitor = np.full(n, np.nan)
+        competitor = np.asarray(competitor, dtype=np.float64)
+        cost = result["cost"]
+        baseline = result["policy_baseline"]
+        p_baseline = result["p_complete_policy_baseline"]
+
+        flags = self.audit(result["price_recommended"], baseline, cost,
+                           result["p_complete_recommended"], p_baseline, competitor)
+        result["policy_violations"] = flags
+        if self.mode == "clip" and flags.any():
+            floor = cost / (1.0 - self.min_gm_pct / 100.0)
+            low = np.fmax(np.maximum(baseline * (1.0 - self.stability), floor), competitor * self.competitor_floor)
+            high = np.fmin(baseline * (1.0 + self.stability), competitor * self.competitor_cap)
+            # Where the floors cross the caps the caps win, except over the GM floor: clip mode never
+            # sells below cost.  Such rows stay flagged for the rule they break.
+            high = np.maximum(high, floor)
+            low = np.minimum(low, high)
+            price = np.clip(result["price_recommended"], low, high)
+            result["policy_clipped"] = price != result["price_recommended"]
+            self.optimizer.reprice(result, price, numeric)
+            # The search band is narrowed to what the guardrails allow, so it still contains the price.
+            result["bounds_low"] = np.clip(result["bounds_low"], low, high)
+            result["bounds_high"] = np.clip(result["bounds_high"], low, high)
+            flags = self.audit(price, baseline, cost, result["p_complete_recommended"], p_baseline, competitor)
+        else:
+            result["policy_clipped"] = np.zeros(n, dtype=bool)
+        result["policy_flags"] = flags
+        return result
+
+
+class ViolationCounter:
+    """Mergeable per-rule counts of violations before and after guardrails."""
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.rows = 0
+        self.clipped = 0
+        self.before = np.zeros(len(RULES), dtype=np.int64)
+        self.after = np.zeros(len(RULES), dtype=np.int64)
+
+    def update(self, result):
+        before, after = result["policy_violations"], result["policy_flags"]
+        self.rows += len(before)
+        self.clipped += int(np.count_nonzero(result["policy_clipped"]))
+        for bit in range(len(RULES)):
+            mask = np.uint8(1 << bit)
+            self.before[bit] += np.count_nonzero(before & mask)
+            self.after[bit] += np.count_nonzero(after & mask)
+        return self
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.clipped += other.clipped
+        self.before += other.before
+        self.after += other.after
+        return self
+
+    def result(self):
+        return {
+            "mode": self.mode,
+            "violations": dict(zip(RULES, self.before.tolist())),
+            "remaining": dict(zip(RULES, self.after.tolist())),
+            "clipped": self.clipped,
+        }
@@ -0,0 +1,235 @@
+"""Schema-checked ingestion of batch uploads into NumPy columns.
+
+CSV is parsed straight from the upload bytes with fixed dtypes for the ten
+``dynamic_pricing.csv`` columns (plus an optional ``competitor_price``).  The
+four ride categories come out of the parser as categoricals and are mapped
+onto the feature pipeline's vocabulary codes, so the scorer never compares
+strings.  Parquet and Arrow IPC uploads, recognised by their magic bytes,
+are read with pyarrow when it is installed.
+
+Rows that break the schema -- unparseable, negative or non-integer numbers,
+out-of-range ratings, unknown or missing categories -- are dropped and
+reported per row instead of failing the upload.  Empty numeric cells are
+allowed and imputed by the pipeline as before.
+"""
+import io
+
+import numpy as np
+
+COUNT = "count"
+FLOAT = "float"
+CATEGORY = "category"
+
+SCHEMA = {
+    "Number_of_Riders": COUNT,
+    "Number_of_Drivers": COUNT,
+    "Location_Category": CATEGORY,
+    "Customer_Loyalty_Status": CATEGORY,
+    "Number_of_Past_Rides": COUNT,
+    "Average_Ratings": FLOAT,
+    "Time_of_Booking": CATEGORY,
+    "Vehicle_Type": CATEGORY,
+    "Expected_Ride_Duration": COUNT,
+    "Historical_Cost_of_Ride": FLOAT,
+    "competitor_price": FLOAT,
+}
+REQUIRED = [col for col, kind in SCHEMA.items() if kind == CATEGORY]
+RANGES = {"Average_Ratings": (0.0, 5.0)}
+MAX_REPORTED_ERRORS = 100
+
+FORMATS = ("csv", "parquet", "arrow")
+_MAGIC = [(b"PAR1", "parquet"), (b"ARROW1", "arrow"), (b"\xff\xff\xff\xff", "arrow")]
+
+
+class IngestError(ValueError):
+    """The upload as a whole cannot be read (bad format, missing columns)."""
+
+
+class Batch:
+    """Validated columns for the accepted rows, and the rows that were rejected.
+
+    ``rows`` is each accepted row's 0-based index in the upload, as in ``errors``.
+    """
+
+    def __init__(self, columns, n_rows, rejected, errors, rows=None):
+        self.columns = columns
+        self.n_rows = n_rows
+        self.rejected = rejected
+        self.errors = errors
+        self.rows = np.arange(n_rows) if rows is None else rows
+
+    @property
+    def n_accepted(self):
+        return self.n_rows - self.rejected
+
+
+def detect_format(data):
+    for magic, fmt in _MAGIC:
+        if data.startswith(magic):
+            return fmt
+    return "csv"
+
+
+def read(data, pipeline, fmt=None):
+    """Ingest an upload's bytes into a Batch; the format is sniffed unless given."""
+    fmt = fmt or detect_format(data)
+    if fmt == "csv":
+        n, numeric, categorical = _parse_csv(data)
+    else:
+        n, numeric, categorical = _parse_arrow(data, fmt)
+    return _validate(n, numeric, categorical, pipeline)
+
+
+def _parse_csv(data):
+    import pandas as pd
+
+    def usecols(col):
+        return col in SCHEMA
+
+    dtype = {col: "category" if kind == CATEGORY else "float64" for col, kind in SCHEMA.items()}
+    try:
+        df = pd.read_csv(io.BytesIO(data), usecols=usecols, dtype=dtype)
+        raw = {}
+    except pd.errors.EmptyDataError:
+        raise IngestError("upload is empty") from None
+    except ValueError:
+        # Some numeric cell did not parse; re-read numbers as text to find which.
+        dtype = {col: "category" if kind == CATEGORY else object for col, kind in SCHEMA.items()}
+        try:
+            df = pd.read_csv(io.BytesIO(data), usecols=usecols, dtype=dtype)
+        except ValueError as e:
+            raise IngestError(f"unreadable CSV upload: {e}") from None
+        raw = {col: df[col].to_numpy() for col, kind in SCHEMA.items() if kind != CATEGORY and col in df}
+        for col in raw:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    numeric, categorical = {}, {}
+    for col in df.columns:
+        if SCHEMA[col] == CATEGORY:
+            values = df[col].cat
+            categorical[col] = (list(values.categories), values.codes.to_numpy(dtype=np.intp))
+        else:
+            numeric[col] = (df[col].to_numpy(dtype=np.float64), raw.get(col))
+    return len(df), numeric, categorical
+
+
+def _parse_arrow(data, fmt):
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise IngestError(f"{fmt} uploads need pyarrow installed") from None
+
+    try:
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+
+            table = pq.read_table(pa.BufferReader(data))
+        elif data.startswith(b"ARROW1"):
+            table = pa.ipc.open_file(pa.BufferReader(data)).read_all()
+        else:
+            table = pa.ipc.open_stream(pa.BufferReader(data)).read_all()
+    except pa.ArrowException as e:
+        raise IngestError(f"unreadable {fmt} upload: {e}") from None
+
+    numeric, categorical = {}, {}
+    for col in table.column_names:
+        if col not in SCHEMA:
+            continue
+        values = table.column(col)
+        if SCHEMA[col] == CATEGORY:
+            encoded = values.cast(pa.string()).combine_chunks().dictionary_encode()
+            codes = encoded.indices.fill_null(-1).to_numpy(zero_copy_only=False).astype(np.intp)
+            categorical[col] = (encoded.dictionary.to_pylist(), codes)
+            continue
+        try:
+            numeric[col] = (values.cast(pa.float64()).to_numpy(), None)
+        except pa.ArrowInvalid:
+            raw = np.asarray(values.cast(pa.string()).to_pylist(), dtype=object)
+            numbers = np.full(len(raw), np.nan)
+            for i, value in enumerate(raw):
+                try:
+                    numbers[i] = float(value)
+                except (TypeError, ValueError):
+                    pass
+            numeric[col] = (numbers, raw)
+    return table.num_rows, numeric, categorical
+
+
+def _validate(n, numeric, categorical, pipeline):
+    missing = [col for col in REQUIRED if col not in categorical]
+    if missing:
+        raise IngestError(f"missing required columns: {', '.join(missing)}")
+
+    bad = np.zeros(n, dtype=bool)
+    errors = []
+
+    def reject(col, mask, values, message):
+        rows = np.flatnonzero(mask)
+        if len(rows) == 0:
+            return
+        bad[rows] = True
+        for row in rows[:max(MAX_REPORTED_ERRORS - len(errors), 0)]:
+            value = values[row]
+            value = value.item() if isinstance(value, np.generic) else value
+            errors.append({"row": int(row), "column": col, "value": value, "error": message})
+
+    columns = {}
+    for col, (values, raw) in numeric.items():
+        if raw is not None:
+            present = np.array([v is not None and v == v and str(v).strip() != "" for v in raw], dtype=bool)
+            reject(col, present & np.isnan(values), raw, "not a number")
+        reject(col, np.isinf(values), values, "must be finite")
+        finite = np.isfinite(values)
+        reject(col, finite & (values < 0), values, "must be non-negative")
+        if SCHEMA[col] == COUNT:
+            reject(col, finite & (values != np.floor(values)), values, "must be a whole number")
+        if col in RANGES:
+            low, high = RANGES[col]
+            reject(col, finite & ((values < low) | (values > high)), values, f"must be between {low:g} and {high:g}")
+        columns[col] = values
+
+    for col, (categories, codes) in categorical.items():
+        vocab = pipeline.categories[col]
+        index = {value: i for i, value in enumerate(vocab)}
+        lookup = np.array([index.get(str(value), -1) for value in categories] + [-1], dtype=np.intp)
+        mapped = lookup[codes]  # a code of -1 (missing) hits the trailing -1
+        labels = np.array(list(categories) + [None], dtype=object)[codes]
+        reject(col, codes < 0, labels, "missing value")
+        reject(col, (codes >= 0) & (mapped < 0), labels, f"unknown value, expected one of {vocab}")
+        # Codes use the pipeline's convention: unknown -> len(vocabulary).
+        columns[col] = np.where(mapped < 0, len(vocab), mapped)
+
+    errors.sort(key=lambda error: error["row"])
+    rows = None
+    if bad.any():
+        keep = ~bad
+        columns = {col: values[keep] for col, values in columns.items()}
+        rows = np.flatnonzero(keep)
+    return Batch(columns, n, int(np.count_nonzero(bad)), errors, rows)
+
+
+class ErrorReport:
+    """Rejected-row counts and the first few row errors across a chunked upload."""
+
+    def __init__(self):
+        self.rows_seen = 0
+        self.rejected = 0
+        self.errors = []
+
+    def update(self, batch):
+        room = max(MAX_REPORTED_ERRORS - len(self.errors), 0)
+        for error in batch.errors[:room]:
+            self.errors.append({**error, "row": error["row"] + self.rows_seen})
+        self.rows_seen += batch.n_rows
+        self.rejected += batch.rejected
+        return self
+
+    def merge(self, other):
+        room = max(MAX_REPORTED_ERRORS - len(self.errors), 0)
+        self.errors.extend({**e, "row": e["row"] + self.rows_seen} for e in other.errors[:room])
+        self.rows_seen += other.rows_seen
+        self.rejected += other.rejected
+        return self
+
+    def result(self):
+        return {"rejected_rows": self.rejected, "details": self.errors}
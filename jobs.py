@@ -0,0 +1,276 @@
+"""Background batch-scoring jobs backed by a process pool and a SQLite table.
+
+Uploads are spooled to ``<root>/<job_id>.input.csv`` and scored chunk by chunk
+in a worker process, which appends rows to ``<root>/<job_id>.result.csv`` and
+records progress in ``<root>/jobs.sqlite3``.  Jobs still queued or running
+when the API stops are resubmitted from their spooled input on the next start.
+A job whose worker dies (killed, out of memory) is marked failed, and the
+broken pool is replaced before the next job is queued.
+
+The model is copied to ``<root>/model-<fingerprint><ext>`` when the manager
+starts, and every pool (including one replacing a broken pool) loads that copy
+and checks its fingerprint.  A model file rewritten in place later does not
+reach jobs, and each job summary records the model version that scored it.
+"""
+import contextlib
+import functools
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import streaming
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    filename TEXT,
+    input_path TEXT NOT NULL,
+    result_path TEXT NOT NULL,
+    bytes_total INTEGER NOT NULL DEFAULT 0,
+    bytes_processed INTEGER NOT NULL DEFAULT 0,
+    rows_processed INTEGER NOT NULL DEFAULT 0,
+    summary TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+UNFINISHED = ("queued", "running")
+
+
+class JobStore:
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        db.row_factory = sqlite3.Row
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def create(self, job_id, filename, input_path, result_path, bytes_total):
+        now = time.time()
+        with self._connect() as db:
+            db.execute(
+                "INSERT INTO jobs (id, status, filename, input_path, result_path, bytes_total, created_at, updated_at)"
+                " VALUES (?, 'queued', ?, ?, ?, ?, ?, ?)",
+                (job_id, filename, input_path, result_path, bytes_total, now, now),
+            )
+
+    def update(self, job_id, **fields):
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as db:
+            db.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def get(self, job_id):
+        with self._connect() as db:
+            row = db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def unfinished(self):
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT * FROM jobs WHERE status IN (?, ?) ORDER BY created_at", UNFINISHED
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+
+# Worker side: each pool process loads the model once and reuses it for every job.
+_worker = {}
+
+
+def _init_worker(model_path, pipeline_path, guardrail_mode, reference_path=None, segmenter_path=None,
+                 market_baseline=False, model=None):
+    from guardrails import Guardrails
+    from model_artifact import load_engine
+    from optimizer import PriceOptimizer
+    from reference_data import ReferenceStore
+    from scoring import Scorer
+    from segmenter import Segmenter
+
+    engine, pipeline = load_engine(model_path, pipeline_path)
+    fingerprint = engine.fingerprint()
+    _worker["model"] = {"name": os.path.basename(model_path), "fingerprint": fingerprint, **(model or {})}
+    if _worker["model"]["fingerprint"] != fingerprint:
+        # Raised by run_job, so each job fails with the reason instead of the pool breaking.
+        _worker["error"] = f"{model_path} has fingerprint {fingerprint}, expected {_worker['model']['fingerprint']}"
+    optimizer = PriceOptimizer()
+    guardrails = Guardrails(optimizer, guardrail_mode) if guardrail_mode else None
+    reference = ReferenceStore.from_csv(reference_path) if reference_path else None
+    segmenter = Segmenter.load(segmenter_path) if segmenter_path else None
+    _worker["scorer"] = Scorer(engine, pipeline, optimizer, guardrails, reference, segmenter, market_baseline)
+
+
+def run_job(db_path, job_id):
+    store = JobStore(db_path)
+    job = store.get(job_id)
+    store.update(job_id, status="running", rows_processed=0, bytes_processed=0, error=None)
+    summary = _worker["scorer"].summary()
+    partial = job["result_path"] + ".part"
+    try:
+        if "error" in _worker:
+            raise ValueError(_worker["error"])
+        with open(job["input_path"], "rb") as src, open(partial, "wb") as dst:
+            dst.write(streaming.encode_header("csv"))
+            for header, block in streaming.iter_csv_blocks_sync(src):
+                batch, result = streaming.score_csv_block(_worker["scorer"], header, block,
+                                                          summary.errors.rows_seen)
+                summary.update(result, batch)
+                dst.write(streaming.encode_rows(result, "csv"))
+                store.update(job_id, rows_processed=summary.kpis.count, bytes_processed=src.tell())
+        os.replace(partial, job["result_path"])
+    except Exception as e:
+        store.update(job_id, status="failed", error=f"{type(e).__name__}: {e}")
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(partial)
+        return
+    store.update(
+        job_id, status="done", bytes_processed=job["bytes_total"],
+        summary=json.dumps({**summary.result(), "model": _worker["model"]}),
+    )
+
+
+class JobManager:
+    def __init__(self, root, model_path, pipeline_path, guardrail_mode=None, workers=None, reference_path=None,
+                 segmenter_path=None, market_baseline=False, model_name=None, fingerprint=None):
+        """``fingerprint`` is that of the engine already loaded from ``model_path``; jobs refuse any other."""
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self.db_path = os.path.join(root, "jobs.sqlite3")
+        self.store = JobStore(self.db_path)
+        model = {"name": model_name or os.path.basename(model_path)}
+        if fingerprint is not None:
+            model["fingerprint"] = fingerprint
+        self.model_path = self._pin(model_path, fingerprint)
+        self._pool_args = (self.model_path, pipeline_path, guardrail_mode, reference_path, segmenter_path,
+                           market_baseline, model)
+        self._workers = workers or os.cpu_count()
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _pin(self, model_path, fingerprint):
+        """Copy ``model_path`` into the job root and drop copies pinned by earlier starts."""
+        with open(model_path, "rb") as f:
+            digest = fingerprint or hashlib.sha256(f.read()).hexdigest()[:32]
+        pinned = os.path.join(self.root, f"model-{digest}{os.path.splitext(model_path)[1]}")
+        shutil.copyfile(model_path, pinned + ".tmp")
+        os.replace(pinned + ".tmp", pinned)
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.startswith("model-") and path != pinned:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(path)
+        return pinned
+
+    @property
+    def pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self._workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=self._pool_args,
+                )
+            return self._pool
+
+    def _discard(self, pool):
+        """Drop ``pool`` once a dead worker has broken it; the next ``pool`` access starts a new one."""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False)
+
+    def _submit(self, job_id):
+        """Queue ``job_id``, retrying once on a fresh pool if the current one is broken."""
+        pool = self.pool
+        try:
+            future = pool.submit(run_job, self.db_path, job_id)
+        except BrokenProcessPool:
+            self._discard(pool)
+            pool = self.pool
+            future = pool.submit(run_job, self.db_path, job_id)
+        future.add_done_callback(functools.partial(self._finished, pool, job_id))
+        return future
+
+    def _finished(self, pool, job_id, future):
+        # run_job records its own outcome; an exception here means the worker never got to.
+        if future.cancelled() or future.exception() is None:
+            return
+        error = future.exception()
+        if isinstance(error, BrokenProcessPool):
+            self._discard(pool)
+            error = f"worker process died: {error}"
+        else:
+            error = f"{type(error).__name__}: {error}"
+        self.store.update(job_id, status="failed", error=error)
+
+    def create(self, src, filename):
+        """Spool ``src`` (a binary file object) to disk and queue it; blocking."""
+        job_id = uuid.uuid4().hex
+        input_path = os.path.join(self.root, f"{job_id}.input.csv")
+        with open(input_path, "wb") as dst:
+            shutil.copyfileobj(src, dst, streaming.CHUNK_BYTES)
+        result_path = os.path.join(self.root, f"{job_id}.result.csv")
+        self.store.create(job_id, filename, input_path, result_path, os.path.getsize(input_path))
+        try:
+            self._submit(job_id)
+        except Exception as e:
+            self.store.update(job_id, status="failed", error=f"{type(e).__name__}: {e}")
+        return job_id
+
+    def recover(self):
+        """Resubmit jobs left queued or running by a previous process."""
+        for job in self.store.unfinished():
+            if os.path.exists(job["input_path"]):
+                self.store.update(job["id"], status="queued")
+                try:
+                    self._submit(job["id"])
+                except Exception as e:
+                    self.store.update(job["id"], status="failed", error=f"{type(e).__name__}: {e}")
+            else:
+                self.store.update(job["id"], status="failed", error="input file missing after restart")
+
+    def status(self, job_id):
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        total = job["bytes_total"]
+        summary = json.loads(job["summary"]) if job["summary"] else {}
+        return {
+            "job_id": job["id"],
+            "status": job["status"],
+            "filename": job["filename"],
+            "rows_processed": job["rows_processed"],
+            "progress": round(job["bytes_processed"] / total, 4) if total else 1.0,
+            "model": summary.get("model"),
+            "kpis": summary.get("kpis"),
+            "guardrails": summary.get("guardrails"),
+            "errors": summary.get("errors"),
+            "error": job["error"],
+            "created_at": job["created_at"],
+            "updated_at": job["updated_at"],
+        }
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
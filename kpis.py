@@ -0,0 +1,199 @@
+"""Running KPI accumulators for batch and streaming scoring.
+
+``KpiAccumulator`` computes the notebook's ``compute_full_kpis`` set --
+revenue and revenue lift, gross margin, conversion and cancellation rates,
+price-change rate -- plus price moments and quantiles, one chunk of scored
+rows at a time.  Everything it holds is a sum, a count, Welford moments or a
+log-bucket quantile sketch, so partial accumulators from other chunks,
+threads or processes combine exactly with ``merge``.  The baseline is the
+policy baseline the guardrails audit against.
+"""
+import math
+
+import numpy as np
+
+QUANTILES = (0.5, 0.9, 0.99)
+RELATIVE_ACCURACY = 0.005
+
+
+class Moments:
+    """Count, mean and variance by Welford's method, merged with Chan's formula."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return self
+        other = Moments()
+        other.count = len(values)
+        other.mean = float(values.mean())
+        other.m2 = float(np.square(values - other.mean).sum())
+        return self.merge(other)
+
+    def merge(self, other):
+        if not other.count:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        return self
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / self.count) if self.count else None
+
+
+class QuantileSketch:
+    """Log-bucket histogram of positive values; quantiles within ``relative_accuracy``.
+
+    Value ``x`` lands in bucket ``ceil(log(x) / log(gamma))`` with
+    ``gamma = (1 + a) / (1 - a)``, so any value reported for a bucket is within
+    a relative ``a`` of every value in it.  Buckets are counts in one NumPy
+    array, so merging is addition.
+    """
+
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._inv_log_gamma = 1.0 / math.log(self.gamma)
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.zero_count = 0
+
+    @property
+    def count(self):
+        return int(self.counts.sum()) + self.zero_count
+
+    def _grow(self, low, high):
+        if not len(self.counts):
+            self.offset = low
+            self.counts = np.zeros(high - low + 1, dtype=np.int64)
+            return
+        new_low = min(low, self.offset)
+        new_high = max(high, self.offset + len(self.counts) - 1)
+        if new_low == self.offset and new_high == self.offset + len(self.counts) - 1:
+            return
+        counts = np.zeros(new_high - new_low + 1, dtype=np.int64)
+        counts[self.offset - new_low:self.offset - new_low + len(self.counts)] = self.counts
+        self.offset, self.counts = new_low, counts
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        positive = values[values > 0]
+        self.zero_count += len(values) - len(positive)
+        if not len(positive):
+            return self
+        keys = np.ceil(np.log(positive) * self._inv_log_gamma).astype(np.int64)
+        low, high = int(keys.min()), int(keys.max())
+        self._grow(low, high)
+        self.counts += np.bincount(keys - self.offset, minlength=len(self.counts))
+        return self
+
+    def merge(self, other):
+        if other.gamma != self.gamma:
+            raise ValueError("cannot merge sketches with different accuracy")
+        self.zero_count += other.zero_count
+        if len(other.counts):
+            self._grow(other.offset, other.offset + len(other.counts) - 1)
+            start = other.offset - self.offset
+            self.counts[start:start + len(other.counts)] += other.counts
+        return self
+
+    def quantile(self, q):
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        if rank < self.zero_count:
+            return 0.0
+        cumulative = np.cumsum(self.counts) + self.zero_count
+        key = self.offset + int(np.searchsorted(cumulative, rank, side="right"))
+        return 2.0 * self.gamma ** key / (self.gamma + 1.0)
+
+
+class KpiAccumulator:
+    """Mergeable KPI summary updated one chunk of scored rows at a time."""
+
+    def __init__(self):
+        self.count = 0
+        self.price_min = math.inf
+        self.price_max = -math.inf
+        self.price = Moments()
+        self.quantiles = QuantileSketch()
+        # Row sums; every rate below is one of these divided by count.
+        self.revenue_baseline = 0.0
+        self.revenue_scenario = 0.0
+        self.gm_baseline = 0.0
+        self.gm_scenario = 0.0
+        self.p_baseline = 0.0
+        self.p_scenario = 0.0
+        self.price_changed = 0
+
+    def update(self, result):
+        """Fold in a scoring result (the dict returned by ``Scorer.score_columns``)."""
+        price = np.asarray(result["price_recommended"], dtype=np.float64)
+        if not len(price):
+            return self
+        baseline = result["policy_baseline"]
+        p_baseline = result["p_complete_policy_baseline"]
+        cost = result["cost"]
+
+        self.count += len(price)
+        self.price_min = min(self.price_min, float(price.min()))
+        self.price_max = max(self.price_max, float(price.max()))
+        self.price.update(price)
+        self.quantiles.update(price)
+        self.revenue_baseline += float((baseline * p_baseline * result["riders"]).sum())
+        self.revenue_scenario += float(result["expected_revenue"].sum())
+        self.gm_baseline += float(((baseline - cost) / baseline).sum()) * 100.0
+        self.gm_scenario += float(result["gm_pct"].sum())
+        self.p_baseline += float(p_baseline.sum())
+        self.p_scenario += float(result["p_complete_recommended"].sum())
+        self.price_changed += int(np.count_nonzero(np.round(price, 2) != np.round(baseline, 2)))
+        return self
+
+    def merge(self, other):
+        self.count += other.count
+        self.price_min = min(self.price_min, other.price_min)
+        self.price_max = max(self.price_max, other.price_max)
+        self.price.merge(other.price)
+        self.quantiles.merge(other.quantiles)
+        for name in ("revenue_baseline", "revenue_scenario", "gm_baseline", "gm_scenario",
+                     "p_baseline", "p_scenario", "price_changed"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        return self
+
+    def result(self):
+        if not self.count:
+            return {"total_records": 0, "avg_price": None}
+        n = self.count
+        lift = (self.revenue_scenario - self.revenue_baseline) / self.revenue_baseline * 100.0 \
+            if self.revenue_baseline > 0 else 0.0
+        out = {
+            "total_records": n,
+            "avg_price": self.price.mean,
+            "min_price": self.price_min,
+            "max_price": self.price_max,
+            "std_price": self.price.std,
+        }
+        for q in QUANTILES:
+            out[f"p{round(q * 100):d}_price"] = self.quantiles.quantile(q)
+        out.update({
+            "revenue_baseline": self.revenue_baseline,
+            "revenue_scenario": self.revenue_scenario,
+            "revenue_lift_pct": lift,
+            "gm_baseline_pct": self.gm_baseline / n,
+            "gm_scenario_pct": self.gm_scenario / n,
+            "conversion_baseline_pct": self.p_baseline / n * 100.0,
+            "conversion_scenario_pct": self.p_scenario / n * 100.0,
+            "cancellation_baseline_pct": 100.0 - self.p_baseline / n * 100.0,
+            "cancellation_scenario_pct": 100.0 - self.p_scenario / n * 100.0,
+            "price_change_rate_pct": self.price_changed / n * 100.0,
+        })
+        return {key: value if isinstance(value, int) else round(value, 2) for key, value in out.items()}
@@ -1,12 +1,66 @@
-from fastapi import FastAPI, File, UploadFile
+from fastapi import FastAPI, File, Form, HTTPException, Query, Request, Response, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
-import pandas as pd
-import joblib
-import io
+import asyncio
+import contextlib
+import json
 import os
+import time
+import uuid
 
-app = FastAPI()
+import drift
+import ingest
+import metrics
+import responses
+import scenarios
+import segments
+import streaming
+from batching import MicroBatcher
+from jobs import JobManager
+from guardrails import Guardrails
+from model_artifact import load_engine
+from model_registry import ModelRegistry, ModelVersion
+from optimizer import PriceOptimizer
+from prediction_cache import PredictionCache
+from price_table import PriceTable
+from reference_data import KEY_COLUMNS, ReferenceStore
+from scoring import Scorer
+from segmenter import Segmenter
+from sharded import ShardedEngine
+from tree_engine import CompiledEnsemble
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    jobs.recover()
+    models.start()
+    drift_task = asyncio.create_task(watch_drift())
+    yield
+    drift_task.cancel()
+    jobs.shutdown()
+    models.close()
+
+app = FastAPI(lifespan=lifespan)
+
+registry = metrics.Registry()
+REQUESTS = registry.counter("price_optima_requests_total", "HTTP requests by route and status.", ("endpoint", "status"))
+REQUEST_SECONDS = registry.histogram("price_optima_request_seconds", "HTTP request latency by route.", ("endpoint",))
+STAGE_SECONDS = registry.histogram(
+    "price_optima_stage_seconds", "Time spent per scoring stage.", ("endpoint", "stage")
+)
+ROWS = registry.counter("price_optima_rows_total", "Rows scored.", ("endpoint",))
+BATCH_ROWS = registry.histogram("price_optima_batch_rows", "Rows per batch upload.", low=1, high=1e8).labels()
+ROWS_PER_SECOND = registry.histogram(
+    "price_optima_batch_rows_per_second", "Batch scoring throughput, parse to serialize.", low=1, high=1e9
+).labels()
+MODEL_SECONDS = registry.histogram(
+    "price_optima_model_request_seconds", "Request latency by model version and route.", ("version", "endpoint")
+)
+MODEL_PRICES = registry.histogram(
+    "price_optima_model_price", "Model and recommended prices by model version.", ("version", "price"),
+    low=0.01, high=1e6,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -14,50 +68,522 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(metrics.RequestMetrics, requests=REQUESTS, seconds=REQUEST_SECONDS)
+
+MODEL_PATH = os.environ.get("MODEL_PATH", "gradient_boosting_model.pkl")
+# With MODEL_DIR set, the newest model file there is served and reloaded as files change;
+# CHALLENGER_SHARE > 0 sends that share of traffic to the newest and keeps the one before as champion.
+MODEL_DIR = os.environ.get("MODEL_DIR")
+CHALLENGER_SHARE = float(os.environ.get("CHALLENGER_SHARE", "0"))
+MODEL_POLL_SECONDS = float(os.environ.get("MODEL_POLL_SECONDS", "5"))
+MODEL_RETIRE_SECONDS = float(os.environ.get("MODEL_RETIRE_SECONDS", "60"))
+PIPELINE_PATH = os.environ.get("PIPELINE_PATH", "feature_pipeline.json")
+JOBS_DIR = os.environ.get("JOBS_DIR", "jobs")
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "0")) or None
+GUARDRAIL_MODE = os.environ.get("GUARDRAIL_MODE", "clip")
+if GUARDRAIL_MODE == "off":
+    GUARDRAIL_MODE = None
+SCORING_WORKERS = int(os.environ.get("SCORING_WORKERS", "1"))
+SHARDED_MIN_ROWS = int(os.environ.get("SHARDED_MIN_ROWS", "100000"))
+MICROBATCH = os.environ.get("MICROBATCH", "0") == "1"
+MICROBATCH_WAIT_MS = float(os.environ.get("MICROBATCH_WAIT_MS", "2"))
+MICROBATCH_MAX_ROWS = int(os.environ.get("MICROBATCH_MAX_ROWS", "256"))
+PREDICTION_CACHE = os.environ.get("PREDICTION_CACHE", "0") == "1"
+PREDICTION_CACHE_STEP = float(os.environ.get("PREDICTION_CACHE_STEP", "0.01"))
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "65536"))
+# Reference data is opt-in; its market rates are competitor references, and become the
+# policy baseline only with REFERENCE_BASELINE=1.
+REFERENCE_DATA = os.environ.get("REFERENCE_DATA")
+if REFERENCE_DATA == "off":
+    REFERENCE_DATA = None
+REFERENCE_BASELINE = os.environ.get("REFERENCE_BASELINE", "0") == "1"
+REFERENCE_TTL = float(os.environ.get("REFERENCE_TTL", "3600"))
+REFERENCE_MAX_ENTRIES = int(os.environ.get("REFERENCE_MAX_ENTRIES", "1024"))
+PRICE_TABLE = os.environ.get("PRICE_TABLE")
+PRICE_TABLE_MAX_ERROR = float(os.environ.get("PRICE_TABLE_MAX_ERROR", "inf"))
+SEGMENTER_PATH = os.environ.get("SEGMENTER_PATH", "segmenter.json")
+if SEGMENTER_PATH == "off":
+    SEGMENTER_PATH = None
+SEGMENT_CACHE_SIZE = int(os.environ.get("SEGMENT_CACHE_SIZE", "32"))
+SCENARIO_MAX_ROWS = int(os.environ.get("SCENARIO_MAX_ROWS", "1000000"))
+# Drift is monitored for every model with a <model>.baseline.json next to it (see drift.py).
+DRIFT = os.environ.get("DRIFT", "1") == "1"
+DRIFT_INTERVAL_SECONDS = float(os.environ.get("DRIFT_INTERVAL_SECONDS", "5"))
+DRIFT_WINDOW_SECONDS = float(os.environ.get("DRIFT_WINDOW_SECONDS", "3600"))
+DRIFT_SAMPLE_ROWS = int(os.environ.get("DRIFT_SAMPLE_ROWS", "1024"))
+
+optimizer = PriceOptimizer()
+guardrails = Guardrails(optimizer, GUARDRAIL_MODE) if GUARDRAIL_MODE else None
+reference = (
+    ReferenceStore.from_csv(REFERENCE_DATA, ttl=REFERENCE_TTL, max_entries=REFERENCE_MAX_ENTRIES)
+    if REFERENCE_DATA else None
+)
+segmenter = Segmenter.load(SEGMENTER_PATH) if SEGMENTER_PATH else None
+price_table = PriceTable.load(PRICE_TABLE) if PRICE_TABLE else None
+if price_table is not None and (price_table.max_error or 0.0) > PRICE_TABLE_MAX_ERROR:
+    raise RuntimeError(
+        f"{PRICE_TABLE} has a max error of {price_table.max_error} against the model, "
+        f"over PRICE_TABLE_MAX_ERROR={PRICE_TABLE_MAX_ERROR}"
+    )
+
+def build_version(name, path):
+    """Load one model file with its own scorer, caches and shard pool."""
+    engine, pipeline = load_engine(path, PIPELINE_PATH)
+    # Batch scoring fans out across SCORING_WORKERS processes; single records stay in-process.
+    # Only compiled ensembles are sharded: the sklearn-served backends already predict multithreaded.
+    sharded = (
+        ShardedEngine(engine, SCORING_WORKERS, SHARDED_MIN_ROWS)
+        if SCORING_WORKERS > 1 and isinstance(engine, CompiledEnsemble) else None
+    )
+    # The table only answers for the model it was compiled from; other versions in MODEL_DIR go to the model.
+    table = price_table
+    if table is not None:
+        try:
+            table.check(engine, pipeline, PRICE_TABLE)
+        except ValueError:
+            if MODEL_DIR is None:
+                raise
+            table = None
+    monitor, drift_error = drift_monitor(path, pipeline)
+    return ModelVersion(
+        name, path, engine, pipeline,
+        Scorer(sharded or engine, pipeline, optimizer, guardrails, reference, segmenter, REFERENCE_BASELINE),
+        cache=PredictionCache(path, PREDICTION_CACHE_STEP, PREDICTION_CACHE_SIZE) if PREDICTION_CACHE else None,
+        batcher=MicroBatcher(engine.predict, MICROBATCH_WAIT_MS / 1e3, MICROBATCH_MAX_ROWS) if MICROBATCH else None,
+        price_table=table,
+        sharded=sharded,
+        drift=monitor,
+        drift_error=drift_error,
+    )
+
+def drift_monitor(path, pipeline):
+    """(monitor, error) for the model at ``path``; a missing or stale baseline only turns drift off."""
+    if not DRIFT:
+        return None, None
+    source = drift.baseline_path(path)
+    try:
+        baseline = drift.load(source)
+        if baseline is None:
+            return None, None
+        return drift.DriftMonitor(baseline, pipeline, DRIFT_WINDOW_SECONDS, DRIFT_SAMPLE_ROWS), None
+    except (OSError, KeyError, TypeError, ValueError) as e:
+        return None, f"{source}: {type(e).__name__}: {e}"
+
+def forget_version(version):
+    # Series are per file name; the registry skips this while a rewritten file of that name serves.
+    MODEL_SECONDS.remove(version.name)
+    MODEL_PRICES.remove(version.name)
+
+models = ModelRegistry(build_version, MODEL_DIR, MODEL_PATH, CHALLENGER_SHARE, MODEL_POLL_SECONDS,
+                       MODEL_RETIRE_SECONDS, on_retire=forget_version)
+# Job workers load a copy of the startup champion, so background jobs stay on it across reloads.
+jobs = JobManager(JOBS_DIR, models.champion.path, PIPELINE_PATH, GUARDRAIL_MODE, workers=JOB_WORKERS,
+                  reference_path=REFERENCE_DATA, segmenter_path=SEGMENTER_PATH, market_baseline=REFERENCE_BASELINE,
+                  model_name=models.champion.name, fingerprint=models.champion.fingerprint)
+results = responses.ResultStore()
+segment_cubes = segments.SegmentStore(SEGMENT_CACHE_SIZE)
 
-model = joblib.load("gradient_boosting_model.pkl")
+# Component stats are the champion's; per-version latency and prices are in MODEL_SECONDS/MODEL_PRICES.
+registry.gauge("price_optima_model_load_seconds", "Time to load the champion model.",
+               lambda: models.champion.load_seconds)
+registry.collect("price_optima_models", "Model registry", models.stats, counters=("reloads", "load_failures"))
+registry.collect("price_optima_microbatch", "Micro-batcher",
+                 lambda: models.champion.batcher.stats() if models.champion.batcher else {},
+                 counters=("batches", "rows"))
+registry.collect("price_optima_prediction_cache", "Prediction cache",
+                 lambda: models.champion.cache.stats() if models.champion.cache else {},
+                 counters=("hits", "misses", "evictions", "invalidations"))
+registry.collect("price_optima_price_table", "Price table", lambda: price_table.stats() if price_table else {},
+                 counters=("hits", "fallbacks"))
+registry.collect("price_optima_reference", "Reference data", lambda: reference.stats() if reference else {},
+                 counters=("hits", "misses", "evictions"))
+
+def drift_reports():
+    return [(version, version.drift.report()) for version in (models.champion, models.challenger)
+            if version is not None and version.drift is not None and version.drift.report() is not None]
+
+def drift_values(key):
+    return {(version.name, feature): entry.get(key)
+            for version, report in drift_reports() for feature, entry in report["current"]["features"].items()}
+
+def shadow_values(key):
+    return {(version.name, report["shadow"]["version"]): report["shadow"].get(key)
+            for version, report in drift_reports() if report["shadow"] is not None}
+
+registry.gauges("price_optima_drift_psi", "PSI of the current window against the training baseline.",
+                ("version", "feature"), lambda: drift_values("psi"))
+registry.gauges("price_optima_drift_ks", "Binned KS statistic of the current window against the training baseline.",
+                ("version", "feature"), lambda: drift_values("ks"))
+registry.gauges("price_optima_drift_window_rows", "Rows in the current drift window.", ("version",),
+                lambda: {(version.name,): report["current"]["rows"] for version, report in drift_reports()})
+registry.gauges("price_optima_drift_dropped", "Drift samples dropped because the queue was full.", ("version",),
+                lambda: {(version.name,): report["dropped"] for version, report in drift_reports()})
+registry.gauges("price_optima_shadow_price_mean_abs_diff",
+                "Mean absolute difference of the challenger's price from the champion's on the same rows.",
+                ("version", "challenger"), lambda: shadow_values("mean_abs_diff"))
+registry.gauges("price_optima_shadow_price_psi",
+                "PSI of the challenger's prices against the champion's on the same rows.",
+                ("version", "challenger"), lambda: shadow_values("psi"))
+DRIFT_FAILURES = registry.counter("price_optima_drift_failures_total", "Drift drains that raised.").labels()
+registry.gauge("price_optima_jobs_unfinished", "Batch jobs queued or running.", lambda: len(jobs.store.unfinished()))
+
+RECOMMEND_STAGES = {stage: STAGE_SECONDS.labels("/recommend", stage)
+                    for stage in ("encode", "predict", "optimize", "serialize")}
+BATCH_STAGES = {stage: STAGE_SECONDS.labels("/recommend_batch", stage)
+                for stage in ("parse", "encode", "predict", "optimize", "serialize")}
+RECOMMEND_ROWS = ROWS.labels("/recommend")
+BATCH_ROWS_SCORED = ROWS.labels("/recommend_batch")
 
 class Record(BaseModel):
     record: dict
 
+def route(request, key=None):
+    """The model version for a request: X-Routing-Key if sent, else ``key()``, hashed onto the split."""
+    if models.challenger is None:
+        return models.champion
+    routing_key = request.headers.get("x-routing-key")
+    return models.route(routing_key if routing_key is not None else key())
+
 @app.post("/recommend")
-def recommend(data: Record):
-    df = pd.DataFrame([data.record])
-    prediction = model.predict(df)[0]
-    return {"price_recommended": round(float(prediction), 2)}
+async def recommend(data: Record, request: Request):
+    start = time.perf_counter()
+    version = route(request, lambda: json.dumps(data.record, sort_keys=True, default=str))
+    scorer, cache, price_table, batcher = version.scorer, version.cache, version.price_table, version.batcher
+    try:
+        X, numeric = scorer.encode_record(data.record)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    encoded = time.perf_counter()
+    RECOMMEND_STAGES["encode"].observe(encoded - start)
+    headers = {"X-Model-Version": version.name}
+    prediction = None
+    if cache is not None:
+        key = cache.key(X[0])
+        prediction = cache.get(key)
+        headers["X-Cache"] = "miss" if prediction is None else "hit"
+    if prediction is None and price_table is not None:
+        prediction = price_table.lookup(data.record, numeric[0])
+        headers["X-Price-Table"] = "fallback" if prediction is None else "hit"
+    if prediction is None:
+        if batcher is None:
+            prediction = (await run_in_threadpool(version.engine.predict, X))[0]
+        else:
+            prediction, wait, size = await batcher.submit(X)
+            headers["X-Queue-Wait-Ms"] = f"{wait * 1e3:.3f}"
+            headers["X-Batch-Size"] = str(size)
+        if cache is not None:
+            cache.put(key, prediction)
+    predicted = time.perf_counter()
+    RECOMMEND_STAGES["predict"].observe(predicted - encoded)
+    try:
+        body = scorer.finish_record(prediction, numeric, data.record)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    optimized = time.perf_counter()
+    RECOMMEND_STAGES["optimize"].observe(optimized - predicted)
+    out = JSONResponse(body, headers=headers)
+    finished = time.perf_counter()
+    RECOMMEND_STAGES["serialize"].observe(finished - optimized)
+    RECOMMEND_ROWS.inc()
+    if version.drift is not None:
+        version.drift.submit_record(data.record, prediction, X)
+    MODEL_SECONDS.labels(version.name, "/recommend").observe(finished - start)
+    MODEL_PRICES.labels(version.name, "model").observe(float(prediction))
+    MODEL_PRICES.labels(version.name, "recommended").observe(body["price_recommended"])
+    return out
+
+async def stream_batch(version, file, fmt):
+    summary = version.scorer.summary()
+    yield streaming.encode_header(fmt)
+    try:
+        async for header, block in streaming.iter_csv_blocks(file):
+            batch, result = await run_in_threadpool(streaming.score_csv_block, version.scorer, header, block,
+                                                    summary.errors.rows_seen)
+            summary.update(result, batch)
+            if version.drift is not None:
+                version.drift.submit_columns(batch.columns, result["baseline_price"])
+            yield streaming.encode_rows(result, fmt)
+    except (KeyError, ValueError) as e:
+        yield streaming.encode_trailer(fmt, {"error": f"invalid batch file: {e}"})
+        return
+    finally:
+        await file.close()
+    yield streaming.encode_trailer(fmt, summary.result())
+
+def negotiate(request, fmt):
+    try:
+        return responses.negotiate(request.headers.get("accept"), fmt)
+    except responses.NotAcceptable as e:
+        raise HTTPException(status_code=406, detail=str(e))
+
+def batch_response(columns, summary, result_id, fmt, offset, limit):
+    window, meta = responses.page(columns, summary, result_id, offset, limit)
+    try:
+        body = responses.encode(window, meta, fmt)
+    except responses.NotAcceptable as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    headers = {"X-Result-Id": result_id, "X-Total-Count": str(meta["total"])}
+    return Response(body, media_type=responses.MEDIA_TYPES[fmt], headers=headers)
+
+FORMAT_PATTERN = "^(" + "|".join(responses.MEDIA_TYPES) + ")$"
 
 @app.post("/recommend_batch")
-async def recommend_batch(file: UploadFile = File(...)):
+async def recommend_batch(
+    request: Request,
+    file: UploadFile = File(...),
+    stream: str = Query(None, pattern="^(ndjson|csv)$"),
+    fmt: str = Query(None, alias="format", pattern=FORMAT_PATTERN),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(None, ge=1),
+):
+    """Score an upload; ``format``/Accept pick the encoding, ``offset``/``limit`` a window of rows.
+
+    The full result stays available under ``result_id`` at /results/{result_id}
+    for a few minutes, so further windows don't need another upload.
+    """
+    if stream:
+        if ingest.detect_format(await file.read(8)) != "csv":
+            raise HTTPException(status_code=415, detail="streaming mode accepts CSV uploads only")
+        await file.seek(0)
+        version = route(request, lambda: uuid.uuid4().hex)
+        return StreamingResponse(stream_batch(version, file, stream), media_type=streaming.MEDIA_TYPES[stream],
+                                 headers={"X-Model-Version": version.name})
+
+    fmt = negotiate(request, fmt)
     contents = await file.read()
-    df = pd.read_csv(io.StringIO(contents.decode("utf-8")))
-    predictions = model.predict(df)
-    results = [{"price_recommended": round(float(p), 2)} for p in predictions]
-    avg = round(float(sum(predictions) / len(predictions)), 2)
-    return {"recommendations": results, "kpis": {"total_records": len(results), "avg_price": avg}}
+    start = time.perf_counter()
+    dataset_id = segments.dataset_id(contents)
+    version = route(request, lambda: dataset_id)
+    scorer = version.scorer
+    timings = {}
+    try:
+        batch = ingest.read(contents, scorer.pipeline)
+        timings["parse"] = time.perf_counter() - start
+        result = scorer.score_columns(batch.columns, timings, batch.rows)
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=f"invalid batch file: {e}")
+    columns = responses.result_columns(result)
+    summary = scorer.summary().update(result, batch).result()
+    summary["dataset_id"] = dataset_id
+    cube = segments.SegmentCube(scorer.pipeline).update(batch.columns, result)
+    segment_cubes.put((dataset_id, version.fingerprint), cube)
+    serialize_started = time.perf_counter()
+    out = batch_response(columns, summary, results.put(columns, summary), fmt, offset, limit)
+    out.headers["X-Model-Version"] = version.name
+    finished = time.perf_counter()
+    timings["serialize"] = finished - serialize_started
+    for stage, seconds in timings.items():
+        BATCH_STAGES[stage].observe(seconds)
+    BATCH_ROWS_SCORED.inc(batch.n_accepted)
+    BATCH_ROWS.observe(batch.n_accepted)
+    ROWS_PER_SECOND.observe(batch.n_accepted / (finished - start))
+    MODEL_SECONDS.labels(version.name, "/recommend_batch").observe(finished - start)
+    if version.drift is not None:
+        version.drift.submit_columns(batch.columns, result["baseline_price"])
+    MODEL_PRICES.labels(version.name, "model").observe_many(result["baseline_price"])
+    MODEL_PRICES.labels(version.name, "recommended").observe_many(result["price_recommended"])
+    return out
 
-@app.get("/")
-def root():
-    return {"status": "AI Price Optima API is running"}
-```
+@app.get("/results/{result_id}")
+def get_results(
+    result_id: str,
+    request: Request,
+    fmt: str = Query(None, alias="format", pattern=FORMAT_PATTERN),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(None, ge=1),
+):
+    fmt = negotiate(request, fmt)
+    stored = results.get(result_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="result not found or expired")
+    return batch_response(*stored, result_id, fmt, offset, limit)
+
+def score_segments(version, contents):
+    scorer = version.scorer
+    batch = ingest.read(contents, scorer.pipeline)
+    return segments.SegmentCube(scorer.pipeline).update(batch.columns, scorer.score_columns(batch.columns))
+
+def segment_report(key, version, cube, by):
+    by = segments.DIMENSIONS if by is None else [col.strip() for col in by.split(",") if col.strip()]
+    try:
+        return {"dataset_id": key, "model_version": version.name, "rows": cube.rows, "by": by,
+                "segments": cube.query(by)}
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@app.post("/segments")
+async def upload_segments(request: Request, file: UploadFile = File(...), by: str = Query(None)):
+    """Mean price, conversion and revenue per segment of an upload, grouped ``by`` comma-separated dimensions.
+
+    Uploads are scored once per model version; the same bytes (or a batch
+    already sent to /recommend_batch and routed to the same version) are
+    answered from the cached segment cube.
+    """
+    contents = await file.read()
+    key = segments.dataset_id(contents)
+    version = route(request, lambda: key)
+    cube = segment_cubes.get((key, version.fingerprint))
+    if cube is None:
+        try:
+            cube = await run_in_threadpool(score_segments, version, contents)
+        except (KeyError, ValueError) as e:
+            raise HTTPException(status_code=422, detail=f"invalid batch file: {e}")
+        segment_cubes.put((key, version.fingerprint), cube)
+    return segment_report(key, version, cube, by)
+
+@app.get("/segments/{dataset_id}")
+def get_segments(dataset_id: str, request: Request, by: str = Query(None)):
+    version = route(request, lambda: dataset_id)
+    cube = segment_cubes.get((dataset_id, version.fingerprint))
+    if cube is None:
+        raise HTTPException(status_code=404, detail="dataset not scored by this model version or evicted")
+    return segment_report(dataset_id, version, cube, by)
+
+def sweep_scenarios(contents, specs):
+    scorer = models.champion.scorer
+    batch = ingest.read(contents, scorer.pipeline)
+    report = {"rows": batch.n_accepted, "scenarios": scenarios.run(scorer, batch.columns, specs, SCENARIO_MAX_ROWS)}
+    if batch.rejected:
+        report["errors"] = ingest.ErrorReport().update(batch).result()
+    return report
+
+@app.post("/scenarios")
+async def run_scenarios(file: UploadFile = File(...), scenarios_json: str = Form(..., alias="scenarios")):
+    """KPIs for an upload under each what-if scenario, plus the unperturbed base case.
+
+    ``scenarios`` is a JSON list such as
+    ``[{"name": "rush", "Number_of_Riders": 1.1, "Number_of_Drivers": 0.8}]``;
+    each factor multiplies that column for every ride.
+    """
+    contents = await file.read()
+    try:
+        specs = json.loads(scenarios_json)
+        return await run_in_threadpool(sweep_scenarios, contents, specs)
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=f"invalid scenario request: {e}")
+
+@app.post("/jobs", status_code=202)
+async def create_job(file: UploadFile = File(...)):
+    try:
+        job_id = await run_in_threadpool(jobs.create, file.file, file.filename)
+    finally:
+        await file.close()
+    return jobs.status(job_id)
 
----
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    status = jobs.status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    return status
 
-### Step 3 — Update `requirements.txt`
+@app.get("/jobs/{job_id}/result")
+def get_job_result(job_id: str):
+    status = jobs.status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    if status["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"job is {status['status']}")
+    return FileResponse(jobs.store.get(job_id)["result_path"], media_type="text/csv", filename=f"{job_id}.csv")
 
-Make sure it contains:
-```
-fastapi
-uvicorn
-joblib
-scikit-learn
-pandas
-python-multipart
-```
+@app.get("/cache/stats")
+async def cache_stats():
+    cache = models.champion.cache
+    if cache is None:
+        raise HTTPException(status_code=404, detail="prediction cache is disabled")
+    return cache.stats()
 
----
+@app.get("/price_table/stats")
+async def price_table_stats():
+    if price_table is None:
+        raise HTTPException(status_code=404, detail="price table is disabled")
+    return price_table.stats()
 
-### Step 4 — Render start command
+class Observations(BaseModel):
+    observations: list[dict]
 
-Make sure Render has:
-```
-uvicorn main:app --host 0.0.0.0 --port 8000
+@app.get("/reference/stats")
+def reference_stats():
+    if reference is None:
+        raise HTTPException(status_code=404, detail="reference data is disabled")
+    return reference.stats()
+
+@app.post("/reference/observations")
+def observe_reference(data: Observations):
+    """Fold observed rides (segment columns, price, Expected_Ride_Duration, optional competitor_price) into the rates."""
+    if reference is None:
+        raise HTTPException(status_code=404, detail="reference data is disabled")
+    try:
+        for obs in data.observations:
+            key = tuple(obs[col] for col in KEY_COLUMNS)
+            reference.observe(key, obs["price"], obs["Expected_Ride_Duration"], obs.get("competitor_price"))
+    except (KeyError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=f"invalid observation: {e}")
+    return reference.stats()
+
+def version_report(version):
+    report = version.describe()
+    for endpoint in ("/recommend", "/recommend_batch"):
+        count, _, quantiles = MODEL_SECONDS.labels(version.name, endpoint).snapshot()
+        report[endpoint] = {"requests": count}
+        if count:
+            report[endpoint].update({f"p{round(q * 100)}_ms": value * 1e3 for q, value in quantiles.items()})
+    for kind in ("model", "recommended"):
+        count, total, quantiles = MODEL_PRICES.labels(version.name, kind).snapshot()
+        report[f"{kind}_price"] = {"rows": count}
+        if count:
+            report[f"{kind}_price"].update(mean=total / count, **{f"p{round(q * 100)}": value
+                                                                   for q, value in quantiles.items()})
+    return report
+
+@app.get("/models")
+def get_models():
+    """Champion and challenger with their traffic split, load errors and per-version latency and prices."""
+    report = models.describe()
+    report["champion"] = version_report(models.champion)
+    if models.challenger is not None:
+        report["challenger"] = version_report(models.challenger)
+    return report
+
+async def watch_drift():
+    """Fold queued drift samples into the live versions' monitors every DRIFT_INTERVAL_SECONDS."""
+    while True:
+        await asyncio.sleep(DRIFT_INTERVAL_SECONDS)
+        try:
+            await run_in_threadpool(drain_drift)
+        except Exception:
+            DRIFT_FAILURES.inc()
+
+def drain_drift():
+    champion, challenger = models.champion, models.challenger
+    if champion.drift is not None:
+        champion.drift.drain(shadow=challenger)
+    if challenger is not None and challenger.drift is not None:
+        challenger.drift.drain()
+
+@app.get("/drift")
+def get_drift():
+    """Per-feature PSI, KS and live quantiles of recent traffic against each version's training baseline.
+
+    ``shadow`` compares the challenger's prices with the champion's on the champion's traffic.
+    """
+    reports = {}
+    for role, version in (("champion", models.champion), ("challenger", models.challenger)):
+        if version is None:
+            continue
+        if version.drift is not None:
+            reports[role] = {"version": version.name, **(version.drift.report() or {})}
+        elif version.drift_error is not None:
+            reports[role] = {"version": version.name, "error": version.drift_error}
+    if not reports:
+        raise HTTPException(status_code=404, detail="drift monitoring is disabled or no model has a baseline")
+    return reports
+
+@app.get("/metrics")
+async def get_metrics():
+    """Latency, throughput, cache and queue metrics in Prometheus text format."""
+    return Response(registry.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/")
+def root():
+    return {"status": "AI Price Optima API is running"}
@@ -0,0 +1,315 @@
+"""In-process metrics for the API, exposed in Prometheus text format.
+
+Counters and histograms keep one shard per thread: a thread only ever
+writes its own shard, so recording takes no lock and costs well under a
+microsecond.  Shards are summed when ``/metrics`` is scraped.
+
+Histograms are HDR-style log-linear: each power of two is split into
+``SUB_BUCKETS`` linear buckets, so any recorded value is known to within
+``1 / SUB_BUCKETS`` relative, from microseconds to minutes, in a fixed
+array.  Quantiles (p50/p95/p99) are read off the merged buckets and
+exported as Prometheus summaries.
+
+Stats that components already keep (caches, queues) are not recorded
+here; collectors read them at scrape time, so they cost nothing per
+request.
+"""
+import math
+import threading
+import time
+
+import numpy as np
+
+SUB_BUCKETS = 32
+QUANTILES = (0.5, 0.95, 0.99)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Sharded:
+    """Per-thread state, created on a thread's first write; only creation takes the lock."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = self._new_shard()
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def _snapshot(self):
+        with self._lock:
+            return list(self._shards)
+
+
+class Counter(_Sharded):
+    def _new_shard(self):
+        return [0]
+
+    def inc(self, amount=1):
+        try:
+            self._local.shard[0] += amount
+        except AttributeError:
+            self._shard()[0] += amount
+
+    @property
+    def value(self):
+        return sum(shard[0] for shard in self._snapshot())
+
+
+class _HistogramShard:
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self, size):
+        self.counts = [0] * size
+        self.count = 0
+        self.sum = 0.0
+
+
+class Histogram(_Sharded):
+    """Log-linear histogram of positive values between ``low`` and ``high`` (clamped outside)."""
+
+    def __init__(self, low=1e-6, high=1e3, sub_buckets=SUB_BUCKETS):
+        super().__init__()
+        self.sub_buckets = sub_buckets
+        self.min_exp = math.frexp(low)[1]
+        self.max_exp = math.frexp(high)[1]
+        self.size = (self.max_exp - self.min_exp + 1) * sub_buckets
+        self._scale = 2 * sub_buckets
+
+    def _new_shard(self):
+        return _HistogramShard(self.size)
+
+    def observe(self, value):
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._shard()
+        shard.count += 1
+        shard.sum += value
+        if value > 0:
+            mantissa, exp = math.frexp(value)
+            index = (exp - self.min_exp) * self.sub_buckets + int((mantissa - 0.5) * self._scale)
+            if index < 0:
+                index = 0
+            elif index >= self.size:
+                index = self.size - 1
+            shard.counts[index] += 1
+        else:
+            shard.counts[0] += 1
+
+    def observe_many(self, values):
+        """Record an array of values at once (a batch's prices, say)."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if not len(values):
+            return
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._shard()
+        mantissa, exp = np.frexp(values)
+        index = (exp - self.min_exp) * self.sub_buckets + ((mantissa - 0.5) * self._scale).astype(np.intp)
+        index[~(values > 0)] = 0
+        np.clip(index, 0, self.size - 1, out=index)
+        counts = np.bincount(index, minlength=self.size)
+        for i in np.flatnonzero(counts).tolist():
+            shard.counts[i] += int(counts[i])
+        shard.count += len(values)
+        shard.sum += float(values.sum())
+
+    def bucket_value(self, index):
+        """Midpoint of bucket ``index``."""
+        exp, sub = divmod(index, self.sub_buckets)
+        return math.ldexp(0.5 + (sub + 0.5) / (2 * self.sub_buckets), exp + self.min_exp)
+
+    def snapshot(self):
+        """(count, sum, {quantile: value}) over all threads."""
+        shards = self._snapshot()
+        count = sum(shard.count for shard in shards)
+        total = sum(shard.sum for shard in shards)
+        if not count:
+            return 0, 0.0, {q: float("nan") for q in QUANTILES}
+        cumulative = np.cumsum(np.sum([shard.counts for shard in shards], axis=0))
+        quantiles = {}
+        for q in QUANTILES:
+            index = int(np.searchsorted(cumulative, q * cumulative[-1], side="left"))
+            quantiles[q] = self.bucket_value(index)
+        return count, total, quantiles
+
+
+class Family:
+    """A metric name with one child per combination of label values."""
+
+    def __init__(self, kind, name, help, labelnames, factory):
+        self.kind = kind
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._factory = factory
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._factory())
+        return child
+
+    def remove(self, *values):
+        """Drop the children whose leading label values are ``values``."""
+        with self._lock:
+            for key in [key for key in self._children if key[:len(values)] == values]:
+                del self._children[key]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            children = list(self._children.items())
+        for values, child in children:
+            labels = dict(zip(self.labelnames, values))
+            if self.kind == "counter":
+                lines.append(f"{self.name}{_labels(labels)} {_number(child.value)}")
+                continue
+            count, total, quantiles = child.snapshot()
+            for q, value in quantiles.items():
+                lines.append(f"{self.name}{_labels({**labels, 'quantile': q})} {_number(value)}")
+            lines.append(f"{self.name}_sum{_labels(labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(labels)} {count}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name, help, value):
+        self.name = name
+        self.help = help
+        self.value = value
+
+    def render(self):
+        value = self.value()
+        if value is None:
+            return []
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {_number(value)}"]
+
+
+class GaugeFamily:
+    """Labelled gauges read at scrape time from ``values()``, a {label values: value} dict."""
+
+    def __init__(self, name, help, labelnames, values):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values = values
+
+    def render(self):
+        values = self.values()
+        if not values:
+            return []
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for labels, value in values.items():
+            if value is not None:
+                lines.append(f"{self.name}{_labels(dict(zip(self.labelnames, labels)))} {_number(value)}")
+        return lines
+
+
+class StatsCollector:
+    """Exports a component's ``stats()`` dict at scrape time, one metric per numeric key."""
+
+    def __init__(self, prefix, help, stats, counters=()):
+        self.prefix = prefix
+        self.help = help
+        self.stats = stats
+        self.counters = set(counters)
+
+    def render(self):
+        lines = []
+        for key, value in self.stats().items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            kind = "counter" if key in self.counters else "gauge"
+            name = f"{self.prefix}_{key}" + ("_total" if kind == "counter" else "")
+            lines += [f"# HELP {name} {self.help}: {key}.", f"# TYPE {name} {kind}", f"{name} {_number(value)}"]
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Family("counter", name, help, labelnames, Counter))
+
+    def histogram(self, name, help, labelnames=(), low=1e-6, high=1e3):
+        return self._register(Family("summary", name, help, labelnames, lambda: Histogram(low, high)))
+
+    def gauge(self, name, help, value):
+        """A gauge read from ``value()`` at scrape time."""
+        return self._register(Gauge(name, help, value))
+
+    def gauges(self, name, help, labelnames, values):
+        """Labelled gauges read from ``values()`` at scrape time."""
+        return self._register(GaugeFamily(name, help, labelnames, values))
+
+    def collect(self, prefix, help, stats, counters=()):
+        return self._register(StatsCollector(prefix, help, stats, counters))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+class RequestMetrics:
+    """ASGI middleware counting requests and timing them per route template and status."""
+
+    def __init__(self, app, requests, seconds):
+        self.app = app
+        self.requests = requests
+        self.seconds = seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            endpoint = getattr(route, "path", "unmatched")
+            self.requests.labels(endpoint, str(status[0])).inc()
+            self.seconds.labels(endpoint).observe(time.perf_counter() - start)
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value):
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value))
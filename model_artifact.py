@@ -0,0 +1,136 @@
+"""Flat, versioned model artifact that loads and scores with NumPy alone.
+
+Layout (little-endian)::
+
+    8 bytes   magic b"APOMODEL"
+    uint32    format version
+    uint32    header length in bytes
+    header    UTF-8 JSON: ensemble shape, feature order, the feature
+              pipeline state (scaling and encoder vocabularies) and a table
+              of arrays with their dtype, shape and byte offset
+    arrays    CompiledEnsemble node arrays in C order, each starting on a
+              64-byte boundary
+
+``load`` memory-maps the file and hands views of the mapping straight to
+``CompiledEnsemble``, so nothing is copied or unpickled and neither sklearn
+nor joblib is imported.  Export a trained model with:
+
+    python model_artifact.py gradient_boosting_model.pkl feature_pipeline.json model.apo
+"""
+import json
+import struct
+import sys
+
+import numpy as np
+
+from features import FeaturePipeline
+from tree_engine import CompiledEnsemble
+
+MAGIC = b"APOMODEL"
+VERSION = 1
+SUFFIX = ".apo"
+ALIGN = 64
+_PREAMBLE = struct.Struct("<8sII")
+# On-disk dtypes; node indices are int64 so they map onto intp without a copy.
+DTYPES = {"feature": "<i8", "threshold": "<f4", "value": "<f8"}
+
+
+def _align(offset):
+    return -(-offset // ALIGN) * ALIGN
+
+
+def is_artifact(path):
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def export(model, pipeline, path, metadata=None):
+    """Compile a fitted GradientBoostingRegressor and write it with ``pipeline`` to ``path``."""
+    engine = CompiledEnsemble.from_sklearn(model)
+    if engine.n_features != pipeline.n_features:
+        raise ValueError(
+            f"model expects {engine.n_features} features but the pipeline produces {pipeline.n_features}"
+        )
+    arrays = {name: np.ascontiguousarray(getattr(engine, name), dtype=dtype) for name, dtype in DTYPES.items()}
+    header = {
+        "estimator": type(model).__name__,
+        "n_trees": engine.n_trees,
+        "depth": engine.depth,
+        "base": engine.base,
+        "n_features": engine.n_features,
+        "feature_names": pipeline.feature_names,
+        "pipeline": pipeline.state(),
+        "metadata": metadata or {},
+    }
+
+    # Offsets are relative to the start of the data section, which follows the padded header.
+    table, offset = {}, 0
+    for name, array in arrays.items():
+        table[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset = _align(offset + array.nbytes)
+    header["arrays"] = table
+    blob = json.dumps(header).encode("utf-8")
+    blob += b" " * (_align(_PREAMBLE.size + len(blob)) - _PREAMBLE.size - len(blob))
+
+    with open(path, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, VERSION, len(blob)))
+        f.write(blob)
+        start = f.tell()
+        for name, array in arrays.items():
+            f.seek(start + table[name]["offset"])
+            f.write(array.tobytes())
+    return header
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        magic, version, length = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a model artifact")
+        if version != VERSION:
+            raise ValueError(f"{path} has artifact format version {version}, expected {VERSION}")
+        header = json.loads(f.read(length))
+    header["data_offset"] = _PREAMBLE.size + length
+    return header
+
+
+def load(path):
+    """Memory-map an artifact; returns (engine, pipeline, header)."""
+    header = read_header(path)
+    pipeline = FeaturePipeline.from_state(header["pipeline"], path)
+    if pipeline.feature_names != header["feature_names"]:
+        raise ValueError(f"{path} feature order does not match its pipeline")
+
+    mapped = np.memmap(path, dtype=np.uint8, mode="r")
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        array = np.ndarray(
+            spec["shape"], dtype=spec["dtype"], buffer=mapped, offset=header["data_offset"] + spec["offset"]
+        )
+        arrays[name] = array.astype(array.dtype.newbyteorder("="), copy=False)
+    arrays["feature"] = arrays["feature"].astype(np.intp, copy=False)
+    engine = CompiledEnsemble(
+        arrays["feature"], arrays["threshold"], arrays["value"],
+        header["base"], header["depth"], header["n_features"],
+    )
+    return engine, pipeline, header
+
+
+def load_engine(model_path, pipeline_path):
+    """(engine, pipeline) from an artifact, or from a pickle (see ``backends.load``)."""
+    if is_artifact(model_path):
+        engine, pipeline, _ = load(model_path)
+        return engine, pipeline
+    import backends
+
+    return backends.load(model_path, pipeline_path)
+
+
+if __name__ == "__main__":
+    import joblib
+
+    src = sys.argv[1] if len(sys.argv) > 1 else "gradient_boosting_model.pkl"
+    pipeline_path = sys.argv[2] if len(sys.argv) > 2 else "feature_pipeline.json"
+    dst = sys.argv[3] if len(sys.argv) > 3 else "model" + SUFFIX
+    export(joblib.load(src), FeaturePipeline.load(pipeline_path), dst, {"source": src})
+    print(f"wrote {dst}")
@@ -0,0 +1,258 @@
+"""Hot-reloaded model versions with a deterministic champion/challenger split.
+
+A ``ModelRegistry`` serves either one fixed model file or the newest files
+in a watched directory.  In a directory, the newest model file (by mtime) is
+the champion; with a ``challenger_share`` above zero, the newest is instead
+the challenger and the one before it stays champion, so dropping a new file
+in starts an A/B test and dropping the next one promotes the challenger.
+
+A watcher thread polls the directory every ``poll_seconds``.  New or
+rewritten files are loaded on that thread, off the request path, and the
+(champion, challenger) pair is then published as one tuple: a request reads
+the pair once and keeps the versions it got, so it never sees half a swap.
+Versions that drop out are closed ``retire_seconds`` later, once the
+requests already holding them have finished.  A file that fails to load is
+reported and skipped until it changes again, and the current versions keep
+serving; write new models under another name and ``os.replace`` them in.
+
+Traffic is split by hashing a routing key into [0, 1): keys below the share
+go to the challenger.  The same key always lands on the same version, and
+raising the share only moves keys from champion to challenger.
+"""
+import hashlib
+import os
+import threading
+import time
+
+SUFFIXES = (".apo", ".joblib", ".pkl")
+POLL_SECONDS = 5.0
+RETIRE_SECONDS = 60.0
+
+
+def bucket(key):
+    """Position of ``key`` (str or bytes) in [0, 1); the same in every process and across restarts."""
+    if isinstance(key, str):
+        key = key.encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big") / 2.0 ** 64
+
+
+def _signature(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+class ModelVersion:
+    """One loaded model file and everything that scores with it."""
+
+    def __init__(self, name, path, engine, pipeline, scorer, cache=None, batcher=None, price_table=None,
+                 sharded=None, drift=None, drift_error=None):
+        self.name = name
+        self.path = path
+        self.engine = engine
+        self.pipeline = pipeline
+        self.scorer = scorer
+        self.cache = cache
+        self.batcher = batcher
+        self.price_table = price_table
+        self.sharded = sharded
+        self.drift = drift
+        self.drift_error = drift_error
+        self.fingerprint = engine.fingerprint()
+        self.signature = None
+        self.loaded_at = time.time()
+        self.load_seconds = 0.0
+
+    def describe(self):
+        return {
+            "name": self.name,
+            "path": self.path,
+            "engine": type(self.engine).__name__,
+            "fingerprint": self.fingerprint,
+            "loaded_at": self.loaded_at,
+            "load_seconds": self.load_seconds,
+            "price_table": self.price_table is not None,
+            "drift": self.drift is not None,
+            "drift_error": self.drift_error,
+        }
+
+    def close(self):
+        if self.sharded is not None:
+            self.sharded.close()
+
+
+class ModelRegistry:
+    """Champion and optional challenger built by ``build(name, path)`` from ``directory`` (or ``path``).
+
+    ``on_retire(version)`` is called when a version is closed, unless a
+    version loaded from the same file name is serving by then (a file
+    rewritten in place), so state kept per name can be dropped with it.
+    """
+
+    def __init__(self, build, directory=None, path=None, challenger_share=0.0,
+                 poll_seconds=POLL_SECONDS, retire_seconds=RETIRE_SECONDS, on_retire=None):
+        if directory is None and path is None:
+            raise ValueError("need a model directory or a model path")
+        if not 0.0 <= challenger_share <= 1.0:
+            raise ValueError(f"challenger share must be between 0 and 1, not {challenger_share}")
+        self.build = build
+        self.directory = directory
+        self.path = path
+        self.challenger_share = challenger_share
+        self.poll_seconds = poll_seconds
+        self.retire_seconds = retire_seconds
+        self.on_retire = on_retire
+        self._routes = (None, None)
+        self._failed = {}
+        self._retiring = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.errors = {}
+        self.reloads = 0
+        self.load_failures = 0
+        self.refresh()
+        if self.champion is None:
+            raise RuntimeError(f"no loadable model in {directory or path}: {self.errors}")
+
+    @property
+    def champion(self):
+        return self._routes[0]
+
+    @property
+    def challenger(self):
+        return self._routes[1]
+
+    def route(self, key=None):
+        """The version serving ``key``; the champion when there is no challenger or no key."""
+        champion, challenger = self._routes
+        if challenger is None or key is None:
+            return champion
+        return challenger if bucket(key) < self.challenger_share else champion
+
+    def scan(self):
+        """[(name, path, signature)] of the model files on disk, oldest first."""
+        if self.directory is None:
+            return [(os.path.basename(self.path), self.path, _signature(self.path))]
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(SUFFIXES) and entry.is_file():
+                    st = entry.stat()
+                    files.append((st.st_mtime_ns, entry.name, entry.path, (st.st_size, st.st_mtime_ns)))
+        files.sort()
+        if not files and self.path is not None:
+            return [(os.path.basename(self.path), self.path, _signature(self.path))]
+        return [(name, path, signature) for _, name, path, signature in files]
+
+    def refresh(self):
+        """Load what changed on disk and publish the new pair; True if the routes changed."""
+        with self._lock:
+            try:
+                files = self.scan()
+            except OSError as e:
+                self.errors[self.directory or self.path] = str(e)
+                return False
+            self.errors.pop(self.directory or self.path, None)
+            current = {version.name: version for version in self._routes if version is not None}
+            wanted = 2 if self.challenger_share > 0 else 1
+            ready = []
+            for name, path, signature in reversed(files):
+                if len(ready) == wanted:
+                    break
+                version = current.get(name)
+                if version is None or version.signature != signature:
+                    if self._failed.get(name) == signature:
+                        continue
+                    version = self._load(name, path, signature)
+                    if version is None:
+                        continue
+                ready.append(version)
+            if not ready:
+                return False
+            routes = (ready[1], ready[0]) if len(ready) == 2 else (ready[0], None)
+            if routes == self._routes:
+                return False
+            previous, self._routes = self._routes, routes
+            if any(version is not None for version in previous):
+                self.reloads += 1
+            for version in previous:
+                if version is not None and version not in routes:
+                    self._retire(version)
+            return True
+
+    def _load(self, name, path, signature):
+        started = time.perf_counter()
+        try:
+            version = self.build(name, path)
+        except Exception as e:  # a half-copied or incompatible file must not take the watcher down
+            self._failed[name] = signature
+            self.errors[name] = f"{type(e).__name__}: {e}"
+            self.load_failures += 1
+            return None
+        version.signature = signature
+        version.load_seconds = time.perf_counter() - started
+        self._failed.pop(name, None)
+        self.errors.pop(name, None)
+        return version
+
+    def _retire(self, version):
+        timer = threading.Timer(self.retire_seconds, self._close, (version,))
+        timer.daemon = True
+        self._retiring[version] = timer
+        timer.start()
+
+    def _close(self, version):
+        with self._lock:
+            if self._retiring.pop(version, None) is None:
+                return
+            replaced = any(serving is not None and serving.name == version.name for serving in self._routes)
+        version.close()
+        if self.on_retire is not None and not replaced:
+            self.on_retire(version)
+
+    def start(self):
+        """Start polling the directory; a no-op when serving a single file."""
+        if self.directory is None or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._watch, name="model-registry", daemon=True)
+        self._thread.start()
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_seconds):
+            self.refresh()
+
+    def close(self):
+        """Stop the watcher and close every version, retiring or serving."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            retiring, self._retiring = list(self._retiring.items()), {}
+            routes = [version for version in self._routes if version is not None]
+        for version, timer in retiring:
+            timer.cancel()
+            version.close()
+        for version in routes:
+            version.close()
+
+    def describe(self):
+        champion, challenger = self._routes
+        return {
+            "directory": self.directory,
+            "challenger_share": self.challenger_share,
+            "poll_seconds": self.poll_seconds,
+            "reloads": self.reloads,
+            "load_failures": self.load_failures,
+            "champion": champion.describe(),
+            "challenger": challenger.describe() if challenger is not None else None,
+            "retiring": sorted(version.name for version in list(self._retiring)),
+            "errors": dict(self.errors),
+        }
+
+    def stats(self):
+        return {
+            "reloads": self.reloads,
+            "load_failures": self.load_failures,
+            "versions": sum(version is not None for version in self._routes),
+            "challenger_share": self.challenger_share if self.challenger is not None else 0.0,
+        }
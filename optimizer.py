@@ -0,0 +1,77 @@
+"""Expected-revenue price search over a per-ride grid of candidate prices.
+
+The model's price is the reference fare.  Every ride gets ``n_points``
+candidates spread across ``reference * (1 +/- band)``; completion probability
+for each candidate comes from a logistic take-rate curve anchored at the
+ride's supply-limited conversion rate (completed / booking intents, as in the
+notebook), and the candidate with the highest expected revenue
+``price * p_complete * riders`` wins.  The whole batch is scored as one
+(n_rides, n_points) matrix.
+"""
+import numpy as np
+
+from features import COST_RATIO, NUMERIC
+
+BAND = 0.15
+N_POINTS = 50
+ELASTICITY = 2.0
+
+_RIDERS = NUMERIC.index("Number_of_Riders")
+_DRIVERS = NUMERIC.index("Number_of_Drivers")
+_HISTORICAL_COST = NUMERIC.index("Historical_Cost_of_Ride")
+
+
+class PriceOptimizer:
+    def __init__(self, band=BAND, n_points=N_POINTS, elasticity=ELASTICITY, cost_ratio=COST_RATIO):
+        self.band = band
+        self.n_points = n_points
+        self.elasticity = elasticity
+        self.cost_ratio = cost_ratio
+        self.grid = 1.0 + np.linspace(-band, band, n_points)
+
+    def completion_probability(self, price, reference, base):
+        """Equals ``base`` at the reference price and falls off as price rises."""
+        slope = self.elasticity * (0.5 + base)
+        p = 2.0 * base / (1.0 + np.exp(slope * (price / reference - 1.0)))
+        return np.minimum(p, 1.0)
+
+    def _ride_terms(self, numeric):
+        riders = np.maximum(numeric[:, _RIDERS], 1.0)
+        base = np.minimum(numeric[:, _DRIVERS] / riders, 1.0)
+        cost = self.cost_ratio * numeric[:, _HISTORICAL_COST]
+        return riders, base, cost
+
+    def optimize(self, reference, numeric):
+        """Best candidate per ride from model prices and the unscaled numeric block."""
+        reference = np.maximum(np.asarray(reference, dtype=np.float64), 0.01)
+        riders, base, cost = self._ride_terms(numeric)
+
+        prices = reference[:, None] * self.grid
+        p_complete = self.completion_probability(prices, reference[:, None], base[:, None])
+        revenue = prices * p_complete * riders[:, None]
+        best = revenue.argmax(axis=1)
+        rows = np.arange(len(reference))
+
+        price = prices[rows, best]
+        return {
+            "price_recommended": price,
+            "p_complete_recommended": p_complete[rows, best],
+            "expected_revenue": revenue[rows, best],
+            "gm_pct": (price - cost) / price * 100.0,
+            "baseline_price": reference,
+            "p_complete_baseline": base,
+            "cost": cost,
+            "riders": riders,
+            "bounds_low": prices[:, 0],
+            "bounds_high": prices[:, -1],
+        }
+
+    def reprice(self, result, price, numeric):
+        """Re-evaluate an ``optimize`` result in place at externally chosen prices."""
+        riders, base, cost = self._ride_terms(numeric)
+        p_complete = self.completion_probability(price, result["baseline_price"], base)
+        result["price_recommended"] = price
+        result["p_complete_recommended"] = p_complete
+        result["expected_revenue"] = price * p_complete * riders
+        result["gm_pct"] = (price - cost) / price * 100.0
+        return result
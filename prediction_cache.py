@@ -0,0 +1,106 @@
+"""Memoized model predictions keyed on quantized feature rows.
+
+A row is encoded by the feature pipeline (numeric columns are standardized),
+divided by ``step`` and rounded, and the resulting integer vector's bytes are
+the cache key -- so ``step`` is in standard deviations and rows that agree to
+within half a step share one prediction.  ``step=0`` keys on the exact row.
+
+Entries live in an LRU ``OrderedDict`` capped at ``max_entries``.  The cache
+remembers the model pickle's size and mtime and empties itself when they
+change, checking at most once every ``check_interval`` seconds.  It is meant
+to be used from the event loop thread only and takes no locks.
+"""
+import os
+import sys
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+STEP = 0.01
+MAX_ENTRIES = 65536
+CHECK_INTERVAL = 1.0
+# OrderedDict link + hash-table slot per entry, on top of the key and value objects.
+_ENTRY_OVERHEAD = 104
+
+
+def _fingerprint(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+class PredictionCache:
+    def __init__(self, model_path=None, step=STEP, max_entries=MAX_ENTRIES,
+                 check_interval=CHECK_INTERVAL, clock=time.monotonic):
+        self.model_path = model_path
+        self.step = step
+        self.max_entries = max_entries
+        self.check_interval = check_interval
+        self.clock = clock
+        self._inv_step = 1.0 / step if step else None
+        self._entries = OrderedDict()
+        self._fingerprint = _fingerprint(model_path) if model_path else None
+        self._next_check = clock() + check_interval
+        self.memory_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def key(self, row):
+        """Cache key for one encoded feature row."""
+        if self._inv_step is None:
+            return np.ascontiguousarray(row, dtype=np.float64).tobytes()
+        return np.rint(row * self._inv_step).astype(np.int64).tobytes()
+
+    def get(self, key):
+        """Cached prediction for ``key`` or None."""
+        if self.model_path is not None and self.clock() >= self._next_check:
+            self._check_model()
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        if key in self._entries:
+            return
+        value = float(value)
+        self._entries[key] = value
+        self.memory_bytes += sys.getsizeof(key) + sys.getsizeof(value) + _ENTRY_OVERHEAD
+        while len(self._entries) > self.max_entries:
+            old_key, old_value = self._entries.popitem(last=False)
+            self.memory_bytes -= sys.getsizeof(old_key) + sys.getsizeof(old_value) + _ENTRY_OVERHEAD
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.memory_bytes = 0
+        self.invalidations += 1
+
+    def _check_model(self):
+        self._next_check = self.clock() + self.check_interval
+        try:
+            fingerprint = _fingerprint(self.model_path)
+        except OSError:
+            return
+        if fingerprint != self._fingerprint:
+            self._fingerprint = fingerprint
+            self.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "memory_bytes": self.memory_bytes,
+            "step": self.step,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,282 @@
+"""Precompiled price surface: model predictions tabulated on a grid, served by interpolation.
+
+A gradient-boosted model is a step function of a few bounded inputs, so its
+output can be tabulated once and looked up instead of walking every tree per
+request.  ``compile`` grids the chosen numeric axes (by default riders,
+drivers, ride duration and historical cost) across the training data's
+range, for every combination of the ride categories the model splits on, and
+stores the predictions as one dense array -- e.g. Location x Loyalty x Time
+x Vehicle x riders x drivers x duration x cost.  Inputs the table does not
+grid are held at the pipeline defaults, and axes or categories the ensemble
+never splits on are dropped.  ``lookup`` finds a record's cell by index
+arithmetic and interpolates multilinearly between the surrounding grid
+points; records outside the grid, or with unknown categories, return None
+and go through full inference.
+
+Interpolating a step function, and ignoring the ungridded inputs, is
+approximate, so compilation measures the error against the real model on
+random grid points and on the training rows, and keeps the report in the
+table.  Build one with:
+
+    python price_table.py model.apo feature_pipeline.json dynamic_pricing.csv price_table.npz
+"""
+import json
+import sys
+
+import numpy as np
+
+from features import CATEGORICAL, ENGINEERED_INPUTS, NUMERIC, RAW_NUMERIC
+
+SUFFIX = ".npz"
+AXES = ["Number_of_Riders", "Number_of_Drivers", "Expected_Ride_Duration", "Historical_Cost_of_Ride"]
+# Default grid points per numeric axis.
+POINTS = {
+    "Number_of_Riders": 9,
+    "Number_of_Drivers": 9,
+    "Number_of_Past_Rides": 11,
+    "Average_Ratings": 7,
+    "Expected_Ride_Duration": 9,
+    "Historical_Cost_of_Ride": 33,
+}
+MAX_CELLS = 16_000_000
+SAMPLES = 20_000
+CHUNK_ROWS = 65_536
+
+
+def fingerprint(engine):
+    """Digest of the model; ties a table to the model it was compiled from."""
+    return engine.fingerprint()
+
+
+def inputs_used(engine, pipeline):
+    """(numeric, categorical) raw inputs that some split of the ensemble depends on."""
+    used = set()
+    for index in engine.split_features():
+        name = pipeline.feature_names[index]
+        if index < len(NUMERIC):
+            used.update(ENGINEERED_INPUTS.get(name, [name]))
+        else:
+            used.update(col for col in CATEGORICAL if name.startswith(col + "_"))
+    return [col for col in RAW_NUMERIC if col in used], [col for col in CATEGORICAL if col in used]
+
+
+def _columns(categorical, codes, axes, values, n):
+    """Scoring columns for grid points; inputs the model ignores keep code 0 / their defaults."""
+    columns = {col: np.zeros(n, dtype=np.intp) for col in CATEGORICAL}
+    columns.update(zip(categorical, codes))
+    columns.update(zip(axes, values))
+    return columns
+
+
+class PriceTable:
+    def __init__(self, values, axes, lows, highs, categorical, vocabularies, model, report=None):
+        self.values = np.ascontiguousarray(values, dtype=np.float64)
+        self.axes = list(axes)
+        self.lows = np.asarray(lows, dtype=np.float64)
+        self.highs = np.asarray(highs, dtype=np.float64)
+        self.categorical = list(categorical)
+        self.vocabularies = {col: list(vocabularies[col]) for col in self.categorical}
+        self.model = model
+        self.report = report or {}
+        self.points = np.asarray(self.values.shape[len(self.categorical):], dtype=np.intp)
+        if len(self.points) != len(self.axes) or (self.points < 2).any():
+            raise ValueError("price table needs at least two grid points on every numeric axis")
+        self.steps = (self.highs - self.lows) / (self.points - 1)
+        self.hits = 0
+        self.fallbacks = 0
+
+        strides = [s // self.values.itemsize for s in self.values.strides]
+        self._cat_strides = strides[:len(self.categorical)]
+        self._num_strides = strides[len(self.categorical):]
+        self._flat = self.values.ravel()
+        self._cells = memoryview(self._flat)  # indexing yields Python floats, cheaper than NumPy scalars
+        self._index = {col: {value: i for i, value in enumerate(vocab)} for col, vocab in self.vocabularies.items()}
+        self._columns = [NUMERIC.index(col) for col in self.axes]
+        # Per numeric axis: (numeric-block column, low, step, last cell, stride), for lookup.
+        self._axes = list(zip(self._columns, self.lows.tolist(), self.steps.tolist(),
+                              (self.points - 2).tolist(), self._num_strides))
+        # Offsets of the 2^d cell corners from the lower corner; the last axis varies fastest.
+        d = len(self.axes)
+        self._corners = [
+            sum(stride for k, stride in enumerate(self._num_strides) if corner >> (d - 1 - k) & 1)
+            for corner in range(2 ** d)
+        ]
+
+    @classmethod
+    def compile(cls, engine, pipeline, data, axes=AXES, points=None):
+        """Tabulate ``engine`` over the ranges seen in ``data`` (column name -> array) and measure the error."""
+        used, categorical = inputs_used(engine, pipeline)
+        axes = [col for col in axes if col in used]
+        points = {**POINTS, **(points or {})}
+        lows, highs = [], []
+        for col in axes:
+            values = np.asarray(data[col], dtype=np.float64)
+            low, high = float(np.nanmin(values)), float(np.nanmax(values))
+            lows.append(low)
+            highs.append(high if high > low else low + 1.0)
+        grids = [np.linspace(low, high, points[col]) for col, low, high in zip(axes, lows, highs)]
+        shape = [len(pipeline.categories[col]) for col in categorical] + [len(grid) for grid in grids]
+        cells = int(np.prod(shape))
+        if cells > MAX_CELLS:
+            raise ValueError(f"a {' x '.join(map(str, shape))} grid has {cells:,} cells, over {MAX_CELLS:,}; "
+                             "use fewer points per axis")
+
+        values = np.empty(cells)
+        for start in range(0, cells, CHUNK_ROWS):
+            stop = min(start + CHUNK_ROWS, cells)
+            index = np.unravel_index(np.arange(start, stop), shape)
+            cat, num = index[:len(categorical)], index[len(categorical):]
+            columns = _columns(categorical, cat, axes, [grid[i] for grid, i in zip(grids, num)], stop - start)
+            values[start:stop] = engine.predict(pipeline.encode_columns(columns))
+
+        vocabularies = {col: pipeline.categories[col] for col in categorical}
+        table = cls(values.reshape(shape), axes, lows, highs, categorical, vocabularies, fingerprint(engine))
+        table.report = table.measure(engine, pipeline, data)
+        return table
+
+    @classmethod
+    def load(cls, path, engine=None, pipeline=None):
+        with np.load(path, allow_pickle=False) as f:
+            values = f["values"]
+            header = json.loads(f["header"].tobytes())
+        table = cls(values, header["axes"], header["lows"], header["highs"], header["categorical"],
+                    header["vocabularies"], header["model"], header["report"])
+        table.check(engine, pipeline, path)
+        return table
+
+    def check(self, engine=None, pipeline=None, name="price table"):
+        """Raise ValueError unless the table was compiled from ``engine`` with ``pipeline``'s vocabularies."""
+        if engine is not None and fingerprint(engine) != self.model:
+            raise ValueError(f"{name} was compiled from a different model")
+        if pipeline is not None and any(pipeline.categories[col] != vocab for col, vocab in self.vocabularies.items()):
+            raise ValueError(f"{name} was compiled with different category vocabularies")
+
+    def save(self, path):
+        header = {
+            "axes": self.axes,
+            "lows": self.lows.tolist(),
+            "highs": self.highs.tolist(),
+            "categorical": self.categorical,
+            "vocabularies": self.vocabularies,
+            "model": self.model,
+            "report": self.report,
+        }
+        blob = np.frombuffer(json.dumps(header).encode("utf-8"), dtype=np.uint8)
+        with open(path, "wb") as f:
+            np.savez(f, values=self.values, header=blob)
+
+    def lookup(self, record, numeric):
+        """Interpolated model price for one record, or None when it falls outside the table.
+
+        ``numeric`` is the record's unscaled numeric row from ``FeaturePipeline.encode_record``
+        (missing values already imputed).
+        """
+        base = 0
+        for col, stride in zip(self.categorical, self._cat_strides):
+            i = self._index[col].get(record.get(col))
+            if i is None:
+                self.fallbacks += 1
+                return None
+            base += i * stride
+        row = numeric.tolist()
+        fractions = []
+        for column, low, step, last, stride in self._axes:
+            t = (row[column] - low) / step
+            if not 0.0 <= t <= last + 1:
+                self.fallbacks += 1
+                return None
+            i = min(int(t), last)
+            fractions.append(t - i)
+            base += i * stride
+        self.hits += 1
+        cells = self._cells
+        values = [cells[base + offset] for offset in self._corners]
+        # Collapse one axis at a time, last axis first.
+        for f in reversed(fractions):
+            values = [a + (b - a) * f for a, b in zip(values[0::2], values[1::2])]
+        return values[0]
+
+    def interpolate(self, codes, x):
+        """Vectorized ``lookup``: (n, n_categorical) codes and (n, n_axes) values; NaN outside the table."""
+        codes = np.asarray(codes, dtype=np.intp).reshape(len(x), len(self.categorical))
+        x = np.asarray(x, dtype=np.float64)
+        sizes = np.asarray(self.values.shape[:len(self.categorical)], dtype=np.intp)
+        inside = ((x >= self.lows) & (x <= self.highs)).all(axis=1) & ((codes >= 0) & (codes < sizes)).all(axis=1)
+        t = np.clip((x - self.lows) / self.steps, 0.0, self.points - 1)
+        i = np.minimum(t.astype(np.intp), self.points - 2)
+        f = t - i
+        base = np.where(inside, codes @ np.asarray(self._cat_strides, dtype=np.intp), 0)
+        base = base + i @ np.asarray(self._num_strides, dtype=np.intp)
+        out = np.zeros(len(x))
+        for corner in range(2 ** len(self.axes)):
+            bits = [(corner >> k) & 1 for k in range(len(self.axes))]
+            weight = np.prod(np.where(bits, f, 1.0 - f), axis=1)
+            out += weight * self._flat[base + int(np.dot(bits, self._num_strides))]
+        out[~inside] = np.nan
+        return out
+
+    def measure(self, engine, pipeline, data, samples=SAMPLES, seed=0):
+        """Absolute and relative error against ``engine`` on random grid points and the rows of ``data``."""
+        rng = np.random.default_rng(seed)
+        codes = [rng.integers(0, len(self.vocabularies[col]), samples) for col in self.categorical]
+        x = self.lows + rng.random((samples, len(self.axes))) * (self.highs - self.lows)
+        columns = _columns(self.categorical, codes, self.axes, list(x.T), samples)
+        report = {"random_grid": self._errors(engine.predict(pipeline.encode_columns(columns)),
+                                              np.column_stack(codes) if codes else np.zeros((samples, 0)), x)}
+
+        X, numeric = pipeline.encode_columns(data, with_numeric=True)
+        codes = [pipeline.category_codes(col, data[col]) for col in self.categorical]
+        codes = np.column_stack(codes) if codes else np.zeros((len(X), 0))
+        report["training_rows"] = self._errors(engine.predict(X), codes, numeric[:, self._columns])
+        return report
+
+    def _errors(self, exact, codes, x):
+        approx = self.interpolate(codes, x)
+        inside = ~np.isnan(approx)
+        error = np.abs(approx[inside] - exact[inside])
+        relative = error / np.maximum(np.abs(exact[inside]), 1e-9) * 100.0
+        return {
+            "points": int(inside.sum()),
+            "outside": int((~inside).sum()),
+            "max_abs_error": float(error.max()) if len(error) else None,
+            "p99_abs_error": float(np.quantile(error, 0.99)) if len(error) else None,
+            "mean_abs_error": float(error.mean()) if len(error) else None,
+            "max_rel_error_pct": float(relative.max()) if len(error) else None,
+        }
+
+    @property
+    def max_error(self):
+        errors = [part["max_abs_error"] for part in self.report.values() if part.get("max_abs_error") is not None]
+        return max(errors) if errors else None
+
+    def stats(self):
+        lookups = self.hits + self.fallbacks
+        return {
+            "axes": dict(zip(self.axes, self.points.tolist())),
+            "categorical": self.categorical,
+            "cells": int(self.values.size),
+            "memory_bytes": int(self.values.nbytes),
+            "hits": self.hits,
+            "fallbacks": self.fallbacks,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "max_abs_error": self.max_error,
+            "report": self.report,
+        }
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    from model_artifact import load_engine
+
+    model_path = sys.argv[1] if len(sys.argv) > 1 else "model.apo"
+    pipeline_path = sys.argv[2] if len(sys.argv) > 2 else "feature_pipeline.json"
+    src = sys.argv[3] if len(sys.argv) > 3 else "dynamic_pricing.csv"
+    dst = sys.argv[4] if len(sys.argv) > 4 else "price_table" + SUFFIX
+    engine, pipeline = load_engine(model_path, pipeline_path)
+    table = PriceTable.compile(engine, pipeline, pd.read_csv(src))
+    table.save(dst)
+    print(f"wrote {dst}: {' x '.join(map(str, table.values.shape))} grid over "
+          f"{table.categorical + table.axes}, {table.values.nbytes / 2**20:.1f} MiB")
+    for name, part in table.report.items():
+        print(f"  {name}: {json.dumps(part)}")
@@ -0,0 +1,129 @@
+"""In-process reference data: baseline and competitor price rates per segment.
+
+Rates are stored per minute of ride, keyed by (Location_Category,
+Vehicle_Type, Time_of_Booking); the scorer scales them by a ride's
+Expected_Ride_Duration so they are comparable with the model's per-ride price.  The
+backing table is preloaded from a CSV shaped like ``dynamic_pricing.csv``
+(``competitor_price`` is used when present, otherwise the baseline stands in
+for it) and updated as exponentially weighted rolling means by ``observe``.
+
+A TTL + LRU cache sits in front of the table.  Reads never take the lock:
+``dict.get`` and ``OrderedDict.move_to_end`` are atomic under the GIL, and a
+concurrently evicted key simply falls through to a reload.  Hit and miss
+counters are plain integers and may drop an increment under heavy contention.
+"""
+import csv
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+import numpy as np
+
+KEY_COLUMNS = ["Location_Category", "Vehicle_Type", "Time_of_Booking"]
+TTL = 3600.0
+MAX_ENTRIES = 1024
+ALPHA = 0.05
+
+
+class ReferenceEntry:
+    __slots__ = ("baseline_rate", "competitor_rate", "expires")
+
+    def __init__(self, baseline_rate, competitor_rate, expires):
+        self.baseline_rate = baseline_rate
+        self.competitor_rate = competitor_rate
+        self.expires = expires
+
+
+class ReferenceStore:
+    def __init__(self, table=None, ttl=TTL, max_entries=MAX_ENTRIES, alpha=ALPHA, clock=time.monotonic):
+        self._table = dict(table or {})
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.alpha = alpha
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_csv(cls, path, **kwargs):
+        with open(path, newline="") as f:
+            return cls(table=_aggregate(csv.DictReader(f)), **kwargs)
+
+    def get(self, key):
+        """Cached entry for ``key``, loading it from the table on a miss; None if unknown."""
+        entry = self._cache.get(key)
+        if entry is not None and entry.expires > self.clock():
+            self.hits += 1
+            try:
+                self._cache.move_to_end(key)
+            except KeyError:
+                pass
+            return entry
+        self.misses += 1
+        return self._load(key)
+
+    def _load(self, key):
+        with self._lock:
+            rates = self._table.get(key)
+            if rates is None:
+                return None
+            entry = ReferenceEntry(rates[0], rates[1], self.clock() + self.ttl)
+            self._cache[key] = entry
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+                self.evictions += 1
+            return entry
+
+    def observe(self, key, price, duration, competitor_price=None):
+        """Fold one observed ride into the rolling rates for its segment."""
+        minutes = max(float(duration), 1.0)
+        rate = float(price) / minutes
+        competitor_rate = rate if competitor_price is None else float(competitor_price) / minutes
+        with self._lock:
+            old = self._table.get(key)
+            if old is None:
+                self._table[key] = (rate, competitor_rate)
+            else:
+                a = self.alpha
+                self._table[key] = ((1 - a) * old[0] + a * rate, (1 - a) * old[1] + a * competitor_rate)
+            self._cache.pop(key, None)
+
+    def rates(self, keys):
+        """Per-minute baseline and competitor rates for a sequence of keys; NaN if unknown."""
+        baseline = np.full(len(keys), np.nan)
+        competitor = np.full(len(keys), np.nan)
+        for i, key in enumerate(keys):
+            entry = self.get(key)
+            if entry is not None:
+                baseline[i] = entry.baseline_rate
+                competitor[i] = entry.competitor_rate
+        return baseline, competitor
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._cache),
+            "segments": len(self._table),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def _aggregate(rows):
+    """Mean per-minute baseline and competitor rates per key from CSV dict rows."""
+    sums = defaultdict(lambda: [0.0, 0.0, 0])
+    for row in rows:
+        minutes = max(float(row["Expected_Ride_Duration"]), 1.0)
+        baseline = float(row["Historical_Cost_of_Ride"]) / minutes
+        competitor = row.get("competitor_price")
+        acc = sums[tuple(row[col] for col in KEY_COLUMNS)]
+        acc[0] += baseline
+        acc[1] += float(competitor) / minutes if competitor not in (None, "") else baseline
+        acc[2] += 1
+    return {key: (baseline / n, competitor / n) for key, (baseline, competitor, n) in sums.items()}
@@ -0,0 +1,294 @@
+"""Encodings for batch results, and a short-lived store for paging through them.
+
+``/recommend_batch`` results can be returned as
+
+  json     ``{"recommendations": [{...}, ...]}``, one object per row (default)
+  columns  ``{"columns": {"price_recommended": [...], ...}}``
+  msgpack  the ``columns`` document as MessagePack
+  arrow    an Arrow IPC stream of the result columns (needs pyarrow)
+
+chosen by a ``format`` query parameter or the ``Accept`` header.  Every
+encoder works on the NumPy result columns without per-cell Python objects:
+JSON numbers are printed digit by digit into a byte matrix (``_fixed``) that
+is interleaved with the literal keys and punctuation, and MessagePack arrays
+are assembled as fixed-width NumPy records.
+"""
+import json
+import struct
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+
+from scoring import BATCH_DECIMALS, BATCH_FIELDS
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "columns": "application/vnd.price-optima.columns+json",
+    "msgpack": "application/msgpack",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+_ACCEPT = {
+    **{media: fmt for fmt, media in MEDIA_TYPES.items()},
+    "application/x-msgpack": "msgpack",
+    "application/vnd.msgpack": "msgpack",
+    "*/*": "json",
+    "application/*": "json",
+}
+MAX_RESULTS = 8
+TTL = 600.0
+
+
+class NotAcceptable(ValueError):
+    pass
+
+
+def negotiate(accept=None, fmt=None):
+    """Format name from an explicit ``fmt`` or the best match in an Accept header."""
+    if fmt:
+        return fmt
+    if not accept:
+        return "json"
+    offers = []
+    for position, part in enumerate(accept.split(",")):
+        media, *params = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if q > 0 and media.lower() in _ACCEPT:
+            offers.append((-q, position, _ACCEPT[media.lower()]))
+    if not offers:
+        raise NotAcceptable(f"none of {accept!r} can be produced; try one of {list(MEDIA_TYPES.values())}")
+    return min(offers)[2]
+
+
+def result_columns(result):
+    """The per-row output columns of a scoring result, rounded like every other output."""
+    return {
+        key: np.round(result[key], decimals) if decimals else result[key].astype(np.int64)
+        for key, decimals in BATCH_DECIMALS.items()
+    }
+
+
+def encode(columns, meta, fmt):
+    """Encode a window of result columns plus summary/paging ``meta`` as bytes."""
+    if fmt == "json":
+        return _json_rows(columns, meta)
+    if fmt == "columns":
+        return _json_columns(columns, meta)
+    if fmt == "msgpack":
+        return packb({"columns": columns, **meta})
+    if fmt == "arrow":
+        return _arrow(columns, meta)
+    raise ValueError(f"unknown format {fmt!r}")
+
+
+def _fixed(values, decimals):
+    """``values`` printed like ``%.{decimals}f`` (``%d`` for 0) as an (n, width) uint8 matrix.
+
+    Values must already be rounded to ``decimals`` (see ``result_columns``).  Rows
+    are right-aligned and padded with zero bytes, which ``_join`` drops;
+    non-finite values print as ``null``.
+    """
+    values = np.asarray(values)
+    n = len(values)
+    if values.dtype.kind == "f":
+        finite = np.isfinite(values)
+        scaled = np.rint(np.abs(np.where(finite, values, 0.0)) * 10.0 ** decimals).astype(np.int64)
+    else:
+        finite = np.ones(n, dtype=bool)
+        scaled = np.abs(values.astype(np.int64))
+    digits = max(len(str(int(scaled.max()))) if n else 1, decimals + 1)
+    point = 1 if decimals else 0
+    width = max(1 + digits + point, 4)
+    out = np.zeros((n, width), dtype=np.uint8)
+    # Digits right to left; a leading zero left of the units digit stays padding.
+    rest = scaled
+    for place in range(digits):
+        column = width - 1 - place - (point if place >= decimals else 0)
+        rest, digit = np.divmod(rest, 10)
+        out[:, column] = digit
+        out[:, column] += ord("0")
+        if place > decimals:
+            out[:, column] *= (rest > 0) | (digit > 0)
+    if decimals:
+        out[:, width - 1 - decimals] = ord(".")
+    # signbit keeps %f's "-0.00" for a negative zero.
+    out[:, width - 1 - digits - point] = np.where(np.signbit(values) & finite, ord("-"), 0)
+    if not finite.all():
+        out[~finite] = 0
+        out[~finite, -4:] = np.frombuffer(b"null", dtype=np.uint8)
+    return out
+
+
+def _join(pieces, n):
+    """Concatenate, row by row, literal strings and (n, width) ``_fixed`` matrices into one byte string."""
+    pieces = [np.frombuffer(piece.encode(), dtype=np.uint8) if isinstance(piece, str) else piece
+              for piece in pieces]
+    widths = [piece.shape[-1] for piece in pieces]
+    out = np.empty((n, sum(widths)), dtype=np.uint8)
+    at = 0
+    for piece, width in zip(pieces, widths):
+        out[:, at:at + width] = piece
+        at += width
+    out = out.ravel()
+    return out[out != 0].tobytes()
+
+
+def _json_meta(meta):
+    return json.dumps(meta)[1:-1]
+
+
+def _json_rows(columns, meta):
+    n = len(columns[BATCH_FIELDS[0]])
+    pieces = []
+    for i, (key, decimals) in enumerate(BATCH_DECIMALS.items()):
+        pieces += [("{" if i == 0 else ", ") + f'"{key}": ', _fixed(columns[key], decimals)]
+    rows = _join(pieces + ["}, "], n)[:-2]
+    rest = _json_meta(meta)
+    return b'{"recommendations": [' + rows + f']{", " + rest if rest else ""}}}'.encode()
+
+
+def _json_columns(columns, meta):
+    parts = []
+    for key, decimals in BATCH_DECIMALS.items():
+        values = columns[key]
+        parts.append(f'"{key}": ['.encode() + _join([_fixed(values, decimals), ", "], len(values))[:-2] + b"]")
+    rest = _json_meta(meta)
+    return b'{"columns": {' + b", ".join(parts) + b"}" + (", " + rest if rest else "").encode() + b"}"
+
+
+def _arrow(columns, meta):
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise NotAcceptable("Arrow responses need pyarrow installed") from None
+    table = pa.table(columns).replace_schema_metadata({"meta": json.dumps(meta)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+# MessagePack (https://github.com/msgpack/msgpack/blob/master/spec.md), enough
+# for result documents: nil, bool, int, float64, str, array, map, and NumPy
+# arrays packed without per-element Python objects.
+_FLOAT_RECORD = np.dtype([("tag", "u1"), ("value", ">f8")])
+_INT_RECORD = np.dtype([("tag", "u1"), ("value", ">i8")])
+
+
+def _container_header(n, fix, short, long):
+    if n < 16:
+        return bytes([fix | n])
+    if n < 1 << 16:
+        return struct.pack(">BH", short, n)
+    return struct.pack(">BI", long, n)
+
+
+def _pack_array(values):
+    header = _container_header(len(values), 0x90, 0xDC, 0xDD)
+    if values.dtype.kind == "f":
+        records = np.empty(len(values), dtype=_FLOAT_RECORD)
+        records["tag"] = 0xCB
+        records["value"] = values
+        return header + records.tobytes()
+    if values.dtype.kind in "iub" and len(values) and values.min() >= 0 and values.max() < 128:
+        return header + values.astype(np.uint8).tobytes()  # positive fixints
+    records = np.empty(len(values), dtype=_INT_RECORD)
+    records["tag"] = 0xD3
+    records["value"] = values
+    return header + records.tobytes()
+
+
+def _pack(obj, out):
+    if obj is None:
+        out.append(b"\xc0")
+    elif isinstance(obj, (bool, np.bool_)):
+        out.append(b"\xc3" if obj else b"\xc2")
+    elif isinstance(obj, (int, np.integer)):
+        obj = int(obj)
+        if 0 <= obj < 128:
+            out.append(bytes([obj]))
+        elif -32 <= obj < 0:
+            out.append(struct.pack(">b", obj))
+        elif obj >= 0:
+            out.append(struct.pack(">BQ", 0xCF, obj))
+        else:
+            out.append(struct.pack(">Bq", 0xD3, obj))
+    elif isinstance(obj, (float, np.floating)):
+        out.append(struct.pack(">Bd", 0xCB, float(obj)))
+    elif isinstance(obj, str):
+        data = obj.encode("utf-8")
+        n = len(data)
+        if n < 32:
+            out.append(bytes([0xA0 | n]))
+        elif n < 1 << 8:
+            out.append(struct.pack(">BB", 0xD9, n))
+        elif n < 1 << 16:
+            out.append(struct.pack(">BH", 0xDA, n))
+        else:
+            out.append(struct.pack(">BI", 0xDB, n))
+        out.append(data)
+    elif isinstance(obj, np.ndarray):
+        out.append(_pack_array(obj))
+    elif isinstance(obj, (list, tuple)):
+        out.append(_container_header(len(obj), 0x90, 0xDC, 0xDD))
+        for item in obj:
+            _pack(item, out)
+    elif isinstance(obj, dict):
+        out.append(_container_header(len(obj), 0x80, 0xDE, 0xDF))
+        for key, value in obj.items():
+            _pack(str(key), out)
+            _pack(value, out)
+    else:
+        raise TypeError(f"cannot pack {type(obj).__name__}")
+
+
+def packb(obj):
+    out = []
+    _pack(obj, out)
+    return b"".join(out)
+
+
+class ResultStore:
+    """Recently scored batches, so clients can page through them without re-uploading."""
+
+    def __init__(self, max_results=MAX_RESULTS, ttl=TTL, clock=time.monotonic):
+        self.max_results = max_results
+        self.ttl = ttl
+        self.clock = clock
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, columns, summary):
+        result_id = uuid.uuid4().hex
+        with self._lock:
+            self._results[result_id] = (columns, summary, self.clock() + self.ttl)
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+        return result_id
+
+    def get(self, result_id):
+        with self._lock:
+            entry = self._results.get(result_id)
+            if entry is None or entry[2] <= self.clock():
+                self._results.pop(result_id, None)
+                return None
+            self._results.move_to_end(result_id)
+            return entry[0], entry[1]
+
+
+def page(columns, summary, result_id, offset=0, limit=None):
+    """Slice ``columns`` to one window and build the metadata that goes with it."""
+    total = len(columns[BATCH_FIELDS[0]])
+    offset = min(offset, total)
+    stop = total if limit is None else min(offset + limit, total)
+    window = {key: values[offset:stop] for key, values in columns.items()}
+    meta = {**summary, "result_id": result_id, "total": total, "offset": offset, "limit": limit}
+    return window, meta
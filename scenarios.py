@@ -0,0 +1,69 @@
+"""What-if sweeps: one uploaded dataset scored under several demand/supply/cost perturbations.
+
+A scenario scales some of the raw numeric columns, e.g.
+``{"name": "rush", "Number_of_Riders": 1.1, "Number_of_Drivers": 0.8}``.  All
+scenarios are encoded into one stacked feature matrix, sharing the
+categorical one-hot block (see ``FeaturePipeline.encode_perturbed``), and
+scored in a single pass; each scenario's slice then gets its own KPI summary
+(``kpis.KpiAccumulator``, the notebook's ``compute_full_kpis``).  Stacks are
+capped at ``max_rows`` rows, so a large upload is swept a few scenarios at a
+time instead of materialising every copy at once.
+"""
+import math
+
+import numpy as np
+
+from features import RAW_NUMERIC
+
+PERTURBABLE = [
+    "Number_of_Riders",
+    "Number_of_Drivers",
+    "Historical_Cost_of_Ride",
+    "Expected_Ride_Duration",
+]
+MAX_SCENARIOS = 64
+MAX_ROWS = 1_000_000
+BASE = {"name": "base"}
+
+
+def parse(specs):
+    """Scenario names and a (k, len(RAW_NUMERIC)) factor matrix; the base case comes first."""
+    if not isinstance(specs, list) or not all(isinstance(spec, dict) for spec in specs):
+        raise ValueError("scenarios must be a list of objects")
+    if len(specs) > MAX_SCENARIOS:
+        raise ValueError(f"at most {MAX_SCENARIOS} scenarios per request, got {len(specs)}")
+    specs = [BASE] + specs
+    names = []
+    factors = np.ones((len(specs), len(RAW_NUMERIC)))
+    for i, spec in enumerate(specs):
+        names.append(str(spec.get("name", f"scenario_{i}")))
+        for col, factor in spec.items():
+            if col == "name":
+                continue
+            if col not in PERTURBABLE:
+                raise ValueError(f"scenario {names[-1]!r}: cannot perturb {col!r}; choose from {PERTURBABLE}")
+            if isinstance(factor, bool) or not isinstance(factor, (int, float)) \
+                    or not math.isfinite(factor) or factor < 0:
+                raise ValueError(f"scenario {names[-1]!r}: {col} factor must be a non-negative number")
+            factors[i, RAW_NUMERIC.index(col)] = factor
+    return names, factors
+
+
+def run(scorer, columns, specs, max_rows=MAX_ROWS):
+    """Per-scenario factors, KPIs and guardrail counts for ``columns``."""
+    names, factors = parse(specs)
+    n = len(columns[next(iter(columns))])
+    group = max(1, max_rows // max(n, 1))
+    out = []
+    for start in range(0, len(factors), group):
+        chunk = factors[start:start + group]
+        result = scorer.score_perturbed(columns, chunk)
+        for i in range(len(chunk)):
+            rows = slice(i * n, (i + 1) * n)
+            summary = scorer.summary().update({key: values[rows] for key, values in result.items()})
+            out.append({
+                "name": names[start + i],
+                "factors": {col: float(chunk[i, RAW_NUMERIC.index(col)]) for col in PERTURBABLE},
+                **summary.result(),
+            })
+    return out
@@ -0,0 +1,195 @@
+"""Model scoring, price optimization and guardrails, shared by every serving path."""
+import time
+
+import numpy as np
+
+from features import NUMERIC
+from guardrails import ViolationCounter
+from ingest import ErrorReport
+from kpis import KpiAccumulator
+from reference_data import KEY_COLUMNS
+
+# Per-row fields returned by the batch, streaming and job outputs; 0 decimals means integer.
+# ``row`` is the row's index in the upload, so outputs line up with inputs when rows are rejected.
+BATCH_DECIMALS = {
+    "row": 0,
+    "price_recommended": 2,
+    "p_complete_recommended": 4,
+    "gm_pct": 2,
+    "policy_flags": 0,
+    "segment_k4": 0,
+}
+BATCH_FIELDS = list(BATCH_DECIMALS)
+
+_DURATION = NUMERIC.index("Expected_Ride_Duration")
+
+
+class Scorer:
+    def __init__(self, engine, pipeline, optimizer, guardrails=None, reference=None, segmenter=None,
+                 market_baseline=False):
+        self.engine = engine
+        self.pipeline = pipeline
+        self.optimizer = optimizer
+        self.guardrails = guardrails
+        self.reference = reference
+        self.segmenter = segmenter
+        self.market_baseline = market_baseline
+
+    def score_columns(self, columns, timings=None, rows=None):
+        """Score decoded columns; ``timings``, if given, receives encode/predict/optimize seconds.
+
+        ``rows`` is each row's index in the upload (``Batch.rows``), returned as ``row``; 0..n-1 by default.
+        """
+        start = time.perf_counter()
+        X, numeric = self.pipeline.encode_columns(columns, with_numeric=True)
+        competitor = columns["competitor_price"] if "competitor_price" in columns else None
+        market = self.market_prices(columns, numeric) if self.reference is not None else None
+        encoded = time.perf_counter()
+        predictions = self.engine.predict(X)
+        predicted = time.perf_counter()
+        result = self._finish(predictions, numeric, competitor, market)
+        result["row"] = np.arange(len(predictions)) if rows is None else np.asarray(rows)
+        if timings is not None:
+            timings.update(encode=encoded - start, predict=predicted - encoded, optimize=time.perf_counter() - predicted)
+        return result
+
+    def score_perturbed(self, columns, factors):
+        """Score one copy of ``columns`` per row of ``factors`` (see ``FeaturePipeline.encode_perturbed``).
+
+        The result holds the copies one after another, ``len(factors) * n`` rows.
+        """
+        k = len(factors)
+        X, numeric = self.pipeline.encode_perturbed(columns, factors)
+        competitor = np.tile(columns["competitor_price"], k) if "competitor_price" in columns else None
+        market = None
+        if self.reference is not None:
+            minutes = np.maximum(numeric[:, _DURATION], 1.0)
+            market = tuple(np.tile(rates, k) * minutes for rates in self.market_rates(columns))
+        return self._finish(self.engine.predict(X), numeric, competitor, market)
+
+    def encode_record(self, record):
+        return self.pipeline.encode_record(record, with_numeric=True)
+
+    def score_record(self, record):
+        X, numeric = self.encode_record(record)
+        return self.finish_record(self.engine.predict(X), numeric, record)
+
+    def finish_record(self, reference, numeric, record):
+        """Optimize one ride from its model price and build the /recommend body."""
+        competitor = record.get("competitor_price")
+        competitor = None if competitor in (None, "") else [float(competitor)]
+        market = None
+        if self.reference is not None:
+            rates = self.reference.rates([tuple(record.get(col) for col in KEY_COLUMNS)])
+            minutes = max(numeric[0, _DURATION], 1.0)
+            market = (rates[0] * minutes, rates[1] * minutes)
+        result = self._finish(np.atleast_1d(reference), numeric, competitor, market)
+        row = {key: values[0] for key, values in result.items()}
+        body = {
+            "price_recommended": round(float(row["price_recommended"]), 2),
+            "p_complete_recommended": round(float(row["p_complete_recommended"]), 4),
+            "expected_revenue": round(float(row["expected_revenue"]), 2),
+            "gm_pct": round(float(row["gm_pct"]), 2),
+            "baseline_price": round(float(row["baseline_price"]), 2),
+            "bounds": {"low": round(float(row["bounds_low"]), 2), "high": round(float(row["bounds_high"]), 2)},
+        }
+        if self.reference is not None:
+            body["reference_prices"] = {
+                "baseline": _rounded(row["market_baseline"]),
+                "competitor": _rounded(row["competitor_price"]),
+            }
+        if self.segmenter is not None:
+            body["segment_k4"] = int(row["segment_k4"])
+        if self.guardrails is not None:
+            body["guardrails"] = ViolationCounter(self.guardrails.mode).update(result).result()
+        return body
+
+    def _finish(self, reference, numeric, competitor, market):
+        result = self.optimizer.optimize(reference, numeric)
+        # Assigned before guardrails so segment-specific policies can index by it; -1 when disabled.
+        if self.segmenter is not None:
+            result["segment_k4"] = self.segmenter.assign(numeric)
+        else:
+            result["segment_k4"] = np.full(len(reference), -1, dtype=np.intp)
+        # The policy baseline that guardrails and KPIs use is the model price.  Reference
+        # market rates stand in for missing competitor prices, and replace the baseline
+        # (where the segment is known) only with ``market_baseline``.
+        baseline = result["baseline_price"]
+        p_baseline = result["p_complete_baseline"]
+        if market is not None:
+            market_baseline, market_competitor = market
+            if self.market_baseline:
+                baseline = np.where(np.isnan(market_baseline), baseline, market_baseline)
+                p_baseline = self.optimizer.completion_probability(baseline, result["baseline_price"], p_baseline)
+            if competitor is None:
+                competitor = market_competitor
+            else:
+                competitor = np.asarray(competitor, dtype=np.float64)
+                competitor = np.where(np.isnan(competitor), market_competitor, competitor)
+            result["market_baseline"] = market_baseline
+            result["competitor_price"] = competitor
+        result["policy_baseline"] = baseline
+        result["p_complete_policy_baseline"] = p_baseline
+        if self.guardrails is not None:
+            self.guardrails.apply(result, numeric, competitor)
+        else:
+            result["policy_flags"] = np.zeros(len(reference), dtype=np.uint8)
+        return result
+
+    def market_prices(self, columns, numeric):
+        """Reference-data baseline and competitor prices per ride; NaN for unknown segments."""
+        minutes = np.maximum(numeric[:, _DURATION], 1.0)
+        baseline, competitor = self.market_rates(columns)
+        return baseline * minutes, competitor * minutes
+
+    def market_rates(self, columns):
+        """Per-minute reference rates per ride; each distinct segment is looked up once."""
+        codes = [self.pipeline.category_codes(col, columns[col]) for col in KEY_COLUMNS]
+        vocabs = [self.pipeline.categories[col] + [None] for col in KEY_COLUMNS]
+        shape = [len(vocab) for vocab in vocabs]
+        segments, inverse = np.unique(np.ravel_multi_index(codes, shape), return_inverse=True)
+        keys = [
+            tuple(vocab[i] for vocab, i in zip(vocabs, index))
+            for index in zip(*np.unravel_index(segments, shape))
+        ]
+        baseline, competitor = self.reference.rates(keys)
+        return baseline[inverse], competitor[inverse]
+
+    def summary(self):
+        return BatchSummary(self.guardrails.mode if self.guardrails is not None else None)
+
+
+class BatchSummary:
+    """KPIs, guardrail counts and rejected rows, accumulated chunk by chunk."""
+
+    def __init__(self, guardrail_mode=None):
+        self.kpis = KpiAccumulator()
+        self.violations = ViolationCounter(guardrail_mode) if guardrail_mode else None
+        self.errors = ErrorReport()
+
+    def update(self, result, batch=None):
+        self.kpis.update(result)
+        if self.violations is not None:
+            self.violations.update(result)
+        if batch is not None:
+            self.errors.update(batch)
+        return self
+
+    def merge(self, other):
+        self.kpis.merge(other.kpis)
+        if self.violations is not None:
+            self.violations.merge(other.violations)
+        self.errors.merge(other.errors)
+        return self
+
+    def result(self):
+        out = {"kpis": self.kpis.result()}
+        if self.violations is not None:
+            out["guardrails"] = self.violations.result()
+        if self.errors.rejected:
+            out["errors"] = self.errors.result()
+        return out
+
+
+def _rounded(value):
+    return None if np.isnan(value) else round(float(value), 2)
@@ -0,0 +1,92 @@
+"""Serving-side ride segmentation: the notebook's ``segment_k4`` KMeans.
+
+The notebook clusters rides with ``KMeans(n_clusters=4)`` over a
+StandardScaler-transformed set of engineered features.  The fitted scaler and
+centroids are frozen into JSON; at serving time a whole batch is assigned with
+one squared-distance matrix ``|x|^2 - 2 x.c + |c|^2`` (a single matmul against
+the centroids) and an argmin, reading the features straight from the
+pipeline's unscaled numeric block.
+
+Fit and write the shipped parameters from the training data with:
+
+    python segmenter.py dynamic_pricing.csv feature_pipeline.json segmenter.json
+"""
+import json
+import sys
+
+import numpy as np
+
+from features import NUMERIC
+
+# The notebook's seg_features; its Ride_Duration is Expected_Ride_Duration.
+FEATURES = [
+    "Loyalty_Score",
+    "Rider_Driver_Ratio",
+    "Driver_to_Rider_Ratio",
+    "Supply_Tightness",
+    "Cost_per_Min",
+    "Inventory_Health_Index",
+    "Expected_Ride_Duration",
+]
+N_CLUSTERS = 4
+
+
+class Segmenter:
+    def __init__(self, mean, scale, centroids):
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.centroids = np.asarray(centroids, dtype=np.float64)
+        if self.centroids.shape[1] != len(FEATURES):
+            raise ValueError(f"centroids have {self.centroids.shape[1]} features, expected {len(FEATURES)}")
+        self.n_clusters = len(self.centroids)
+        self._columns = [NUMERIC.index(col) for col in FEATURES]
+        self._norms = np.square(self.centroids).sum(axis=1)
+
+    @classmethod
+    def fit(cls, numeric, n_clusters=N_CLUSTERS, seed=42):
+        """Fit on an unscaled numeric block as produced by ``FeaturePipeline.encode_columns``."""
+        from sklearn.cluster import KMeans
+        from sklearn.preprocessing import StandardScaler
+
+        X = numeric[:, [NUMERIC.index(col) for col in FEATURES]]
+        scaler = StandardScaler().fit(X)
+        kmeans = KMeans(n_clusters=n_clusters, random_state=seed, n_init=10).fit(scaler.transform(X))
+        return cls(scaler.mean_, scaler.scale_, kmeans.cluster_centers_)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            state = json.load(f)
+        if state["features"] != FEATURES:
+            raise ValueError(f"{path} was fitted on {state['features']}, expected {FEATURES}")
+        return cls(state["mean"], state["scale"], state["centroids"])
+
+    def save(self, path):
+        state = {
+            "features": FEATURES,
+            "mean": self.mean.tolist(),
+            "scale": self.scale.tolist(),
+            "centroids": self.centroids.tolist(),
+        }
+        with open(path, "w") as f:
+            json.dump(state, f, indent=2)
+
+    def assign(self, numeric):
+        """Nearest-centroid segment per row of the unscaled numeric block."""
+        X = (numeric[:, self._columns] - self.mean) / self.scale
+        # |x|^2 is the same for every centroid, so it drops out of the argmin.
+        distances = self._norms - 2.0 * (X @ self.centroids.T)
+        return distances.argmin(axis=1)
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    from features import FeaturePipeline
+
+    src = sys.argv[1] if len(sys.argv) > 1 else "dynamic_pricing.csv"
+    pipeline_path = sys.argv[2] if len(sys.argv) > 2 else "feature_pipeline.json"
+    dst = sys.argv[3] if len(sys.argv) > 3 else "segmenter.json"
+    _, numeric = FeaturePipeline.load(pipeline_path).encode_columns(pd.read_csv(src), with_numeric=True)
+    Segmenter.fit(numeric).save(dst)
+    print(f"wrote {dst}")
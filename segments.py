@@ -0,0 +1,134 @@
+"""Segment-level aggregates of scored batches.
+
+The notebook profiles rides by location, vehicle, loyalty, time of booking
+and inventory band (``pd.cut`` of ``Driver_to_Rider_Ratio``) with a fresh
+``groupby`` per question.  Here every scored row gets one integer group code
+over all five dimensions, and ``np.bincount`` sums counts, prices,
+completion probabilities and expected revenue into a small dense cube, once
+per batch.  Any roll-up -- mean price, conversion and revenue by any subset of
+the dimensions -- is then a sum over the other cube axes, independent of the
+number of rows.  Cubes are cached per dataset hash and merge by addition.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from features import EPS
+
+# Edges between the notebook's bands (bins [0, 0.5, 0.8, 1.2, 10], right-closed).
+# Ratios above 10, which the notebook leaves unbanded, count as Loose.
+INVENTORY_EDGES = [0.5, 0.8, 1.2]
+INVENTORY_BANDS = ["Very Tight", "Tight", "Balanced", "Loose"]
+INVENTORY = "Inventory_Band"
+DIMENSIONS = ["Location_Category", "Vehicle_Type", "Customer_Loyalty_Status", "Time_of_Booking", INVENTORY]
+_MEASURES = ("price_recommended", "p_complete_recommended", "expected_revenue")
+MAX_ENTRIES = 32
+
+
+def dataset_id(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def inventory_band(columns, pipeline):
+    """Band code per row from drivers / riders, missing counts imputed like the pipeline."""
+    counts = []
+    for col in ("Number_of_Drivers", "Number_of_Riders"):
+        values = columns.get(col)
+        if values is None:
+            counts.append(np.full(len(columns[DIMENSIONS[0]]), pipeline.defaults[col]))
+        else:
+            values = np.asarray(values, dtype=np.float64)
+            counts.append(np.where(np.isnan(values), pipeline.defaults[col], values))
+    drivers, riders = counts
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = drivers / (riders + EPS)
+    ratio[~np.isfinite(ratio)] = 0.0
+    return np.searchsorted(INVENTORY_EDGES, ratio, side="left")
+
+
+class SegmentCube:
+    """Row count and measure sums per cell of the five-dimension segment grid."""
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        # Categorical axes carry a trailing slot for values outside the vocabulary.
+        self.labels = {col: pipeline.categories[col] + [None] for col in DIMENSIONS if col != INVENTORY}
+        self.labels[INVENTORY] = INVENTORY_BANDS
+        self.shape = tuple(len(self.labels[col]) for col in DIMENSIONS)
+        self.sums = np.zeros((1 + len(_MEASURES), int(np.prod(self.shape))))
+
+    @property
+    def rows(self):
+        return int(self.sums[0].sum())
+
+    def group_codes(self, columns):
+        codes = [
+            inventory_band(columns, self.pipeline) if col == INVENTORY
+            else self.pipeline.category_codes(col, columns[col])
+            for col in DIMENSIONS
+        ]
+        return np.ravel_multi_index(codes, self.shape)
+
+    def update(self, columns, result):
+        """Add a scored batch: ``columns`` as given to ``Scorer.score_columns``, and its result."""
+        groups = self.group_codes(columns)
+        size = self.sums.shape[1]
+        self.sums[0] += np.bincount(groups, minlength=size)
+        for i, key in enumerate(_MEASURES, 1):
+            self.sums[i] += np.bincount(groups, weights=result[key], minlength=size)
+        return self
+
+    def merge(self, other):
+        self.sums += other.sums
+        return self
+
+    def query(self, by=DIMENSIONS):
+        """Count, mean price, conversion and revenue per non-empty segment of ``by``."""
+        unknown = [col for col in by if col not in DIMENSIONS]
+        if unknown:
+            raise ValueError(f"unknown dimensions {unknown}; choose from {DIMENSIONS}")
+        by = [col for col in DIMENSIONS if col in by]
+        cube = self.sums.reshape((len(self.sums),) + self.shape)
+        other = tuple(1 + DIMENSIONS.index(col) for col in DIMENSIONS if col not in by)
+        rolled = cube.sum(axis=other) if other else cube
+        rolled = rolled.reshape(len(self.sums), -1)
+        shape = [len(self.labels[col]) for col in by]
+
+        segments = []
+        for cell in np.flatnonzero(rolled[0]):
+            count, price, p_complete, revenue = rolled[:, cell].tolist()
+            index = np.unravel_index(cell, shape) if shape else ()
+            segment = {col: self.labels[col][i] for col, i in zip(by, index)}
+            segment.update({
+                "count": int(count),
+                "avg_price": round(price / count, 2),
+                "conversion_pct": round(p_complete / count * 100.0, 2),
+                "revenue": round(revenue, 2),
+            })
+            segments.append(segment)
+        return segments
+
+
+class SegmentStore:
+    """Segment cubes of recently scored datasets, keyed by ``(dataset_id, model fingerprint)``."""
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._cubes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, key, cube):
+        with self._lock:
+            self._cubes[key] = cube
+            self._cubes.move_to_end(key)
+            while len(self._cubes) > self.max_entries:
+                self._cubes.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            cube = self._cubes.get(key)
+            if cube is not None:
+                self._cubes.move_to_end(key)
+            return cube
@@ -0,0 +1,139 @@
+"""Multi-process batch scoring over a CompiledEnsemble kept in shared memory.
+
+The ensemble's node arrays are copied once into a ``multiprocessing``
+shared-memory block; every pool worker maps that block and builds its own
+``CompiledEnsemble`` on views of it, so the model is never pickled to or
+duplicated in the workers.  For each large batch the parent writes the
+float32 input into a second shared block, workers score disjoint row shards
+straight into a shared output array, and only shard bounds cross the pipe.
+
+Batches under ``min_rows`` are scored in-process, where the pool round trip
+would cost more than it saves.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from tree_engine import CompiledEnsemble
+
+MIN_ROWS = 100_000
+SHARDS_PER_WORKER = 4
+_ARRAYS = ("feature", "threshold", "value")
+_ALIGN = 64
+
+
+def _views(buf, layout):
+    return {
+        name: np.ndarray(shape, dtype=dtype, buffer=buf, offset=offset)
+        for name, (dtype, shape, offset) in layout.items()
+    }
+
+
+# Worker side: the mapped model block and the engine built on it.
+_worker = {}
+
+
+def _init_worker(model_name, layout, base, depth, n_features):
+    shm = shared_memory.SharedMemory(name=model_name)
+    arrays = _views(shm.buf, layout)
+    _worker["shm"] = shm
+    _worker["engine"] = CompiledEnsemble(
+        arrays["feature"], arrays["threshold"], arrays["value"], base, depth, n_features
+    )
+
+
+def _score_shard(batch_name, n_rows, start, stop):
+    shm = shared_memory.SharedMemory(name=batch_name)
+    engine = _worker["engine"]
+    X = np.ndarray((n_rows, engine.n_features), dtype=np.float32, buffer=shm.buf)
+    out = np.ndarray(n_rows, dtype=np.float64, buffer=shm.buf, offset=X.nbytes)
+    try:
+        out[start:stop] = engine.predict(X[start:stop])
+    finally:
+        # Views must be gone before the mapping can be closed.
+        del X, out
+        shm.close()
+
+
+class ShardedEngine:
+    """Drop-in for ``CompiledEnsemble.predict`` that fans large batches out to processes."""
+
+    def __init__(self, engine, workers=None, min_rows=MIN_ROWS):
+        self.engine = engine
+        self.n_features = engine.n_features
+        self.workers = workers or os.cpu_count()
+        self.min_rows = min_rows
+        self._pool = None
+        self._shm = None
+        self._lock = threading.Lock()
+
+    def _share_model(self):
+        layout, offset = {}, 0
+        for name in _ARRAYS:
+            array = getattr(self.engine, name)
+            layout[name] = (array.dtype.str, array.shape, offset)
+            offset += -(-array.nbytes // _ALIGN) * _ALIGN
+        self._shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for name, view in _views(self._shm.buf, layout).items():
+            view[...] = getattr(self.engine, name)
+        del view
+        return layout
+
+    @property
+    def pool(self):
+        with self._lock:
+            if self._pool is None:
+                layout = self._share_model()
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self._shm.name, layout, self.engine.base, self.engine.depth, self.n_features),
+                )
+            return self._pool
+
+    def predict(self, X):
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if len(X) < self.min_rows or self.workers < 2:
+            return self.engine.predict(X)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"X has {X.shape[1]} features, but the model expects {self.n_features}")
+
+        n = len(X)
+        x_bytes = n * self.n_features * 4
+        shm = shared_memory.SharedMemory(create=True, size=x_bytes + n * 8)
+        shared_x = np.ndarray((n, self.n_features), dtype=np.float32, buffer=shm.buf)
+        try:
+            shared_x[...] = X
+            bounds = np.linspace(0, n, self.workers * SHARDS_PER_WORKER + 1, dtype=np.intp)
+            futures = [
+                self.pool.submit(_score_shard, shm.name, n, int(start), int(stop))
+                for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start
+            ]
+            wait(futures)
+            for future in futures:
+                future.result()
+            return np.ndarray(n, dtype=np.float64, buffer=shm.buf, offset=x_bytes).copy()
+        finally:
+            del shared_x
+            shm.close()
+            shm.unlink()
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
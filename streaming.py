@@ -0,0 +1,92 @@
+"""Chunked reading and result encoding for large /recommend_batch uploads.
+
+Uploads are read in fixed-size byte chunks and cut on line boundaries, so a
+CSV of any size is scored with memory bounded by ``CHUNK_BYTES``.
+"""
+import json
+
+import numpy as np
+
+import ingest
+from scoring import BATCH_DECIMALS, BATCH_FIELDS
+
+CHUNK_BYTES = 1 << 20
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+class LineSplitter:
+    """Cut a byte stream into blocks of whole CSV lines, remembering the header."""
+
+    def __init__(self):
+        self.header = None
+        self._pending = b""
+
+    def feed(self, data):
+        data = self._pending + data
+        cut = data.rfind(b"\n") + 1
+        block, self._pending = data[:cut], data[cut:]
+        if self.header is None and block:
+            nl = block.index(b"\n") + 1
+            self.header, block = block[:nl], block[nl:]
+        return block if block.strip() else None
+
+    def finish(self):
+        if self.header is not None and self._pending.strip():
+            return self._pending + b"\n"
+        return None
+
+
+async def iter_csv_blocks(file, chunk_bytes=CHUNK_BYTES):
+    """Yield ``(header, block)`` pairs from an async ``UploadFile``."""
+    splitter = LineSplitter()
+    while data := await file.read(chunk_bytes):
+        if block := splitter.feed(data):
+            yield splitter.header, block
+    if block := splitter.finish():
+        yield splitter.header, block
+
+
+def iter_csv_blocks_sync(f, chunk_bytes=CHUNK_BYTES):
+    """Yield ``(header, block)`` pairs from a binary file object."""
+    splitter = LineSplitter()
+    while data := f.read(chunk_bytes):
+        if block := splitter.feed(data):
+            yield splitter.header, block
+    if block := splitter.finish():
+        yield splitter.header, block
+
+
+def score_csv_block(scorer, header, block, first_row=0):
+    """Ingest and score one block whose first data row is row ``first_row`` of the upload.
+
+    Returns ``(batch, result)``.
+    """
+    batch = ingest.read(header + block, scorer.pipeline, "csv")
+    return batch, scorer.score_columns(batch.columns, rows=batch.rows + first_row)
+
+
+def _row_template(fmt):
+    specs = [f"%.{d}f" if d else "%d" for d in BATCH_DECIMALS.values()]
+    if fmt == "csv":
+        return ",".join(specs) + "\n"
+    return "{" + ", ".join(f'"{key}": {spec}' for key, spec in zip(BATCH_FIELDS, specs)) + "}\n"
+
+
+ROW_TEMPLATES = {fmt: _row_template(fmt) for fmt in MEDIA_TYPES}
+
+
+def encode_rows(result, fmt):
+    """Render a chunk of scored rows without building per-row objects."""
+    n = len(result[BATCH_FIELDS[0]])
+    values = np.column_stack([result[key] for key in BATCH_FIELDS]).ravel().tolist()
+    return ((ROW_TEMPLATES[fmt] * n) % tuple(values)).encode()
+
+
+def encode_header(fmt):
+    return (",".join(BATCH_FIELDS) + "\n").encode() if fmt == "csv" else b""
+
+
+def encode_trailer(fmt, payload):
+    """Final summary or error line; CSV output carries it as a ``#`` comment."""
+    body = json.dumps(payload)
+    return (body + "\n" if fmt == "ndjson" else f"# {body}\n").encode()
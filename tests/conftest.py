@@ -0,0 +1,72 @@
+"""Shared fixtures: a small model trained on dynamic_pricing.csv, exported like train.py does."""
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, ROOT)
+
+import model_artifact  # noqa: E402
+from features import FeaturePipeline  # noqa: E402
+from guardrails import Guardrails  # noqa: E402
+from optimizer import PriceOptimizer  # noqa: E402
+from scoring import Scorer  # noqa: E402
+
+DATA_PATH = os.path.join(ROOT, "dynamic_pricing.csv")
+EXAMPLE = {
+    "Location_Category": "Urban", "Vehicle_Type": "Economy", "Customer_Loyalty_Status": "Regular",
+    "Time_of_Booking": "Afternoon", "Expected_Ride_Duration": 30, "Historical_Cost_of_Ride": 200,
+    "Number_of_Riders": 50, "Number_of_Drivers": 20,
+}
+
+
+@pytest.fixture(scope="session")
+def df():
+    return pd.read_csv(DATA_PATH)
+
+
+@pytest.fixture(scope="session")
+def pipeline(df):
+    return FeaturePipeline.fit(df)
+
+
+@pytest.fixture(scope="session")
+def model_path(df, pipeline, tmp_path_factory):
+    from sklearn.ensemble import GradientBoostingRegressor
+
+    X, numeric = pipeline.encode_columns(df, with_numeric=True)
+    model = GradientBoostingRegressor(n_estimators=30, max_depth=3, random_state=0)
+    model.fit(X, df["Historical_Cost_of_Ride"].to_numpy())
+    path = str(tmp_path_factory.mktemp("models") / "model.apo")
+    model_artifact.export(model, pipeline, path)
+    return path
+
+
+@pytest.fixture(scope="session")
+def engine(model_path):
+    return model_artifact.load(model_path)[0]
+
+
+@pytest.fixture
+def load_main(monkeypatch, tmp_path):
+    """Import a fresh ``main`` configured by environment variables (paths default to the repo's files)."""
+    def load(model_path, **env):
+        env = {"MODEL_PATH": model_path, "JOBS_DIR": str(tmp_path / "jobs"),
+               "PIPELINE_PATH": os.path.join(ROOT, "feature_pipeline.json"),
+               "SEGMENTER_PATH": os.path.join(ROOT, "segmenter.json"), **env}
+        for name in ("REFERENCE_DATA", "REFERENCE_BASELINE", "MODEL_DIR"):
+            monkeypatch.delenv(name, raising=False)
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        monkeypatch.delitem(sys.modules, "main", raising=False)
+        import main
+        return main
+    return load
+
+
+@pytest.fixture
+def scorer(engine, pipeline):
+    optimizer = PriceOptimizer()
+    return Scorer(engine, pipeline, optimizer, Guardrails(optimizer, "clip"))
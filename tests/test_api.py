@@ -0,0 +1,92 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import model_artifact
+from conftest import DATA_PATH, EXAMPLE
+
+
+@pytest.fixture
+def client(load_main, model_path):
+    with TestClient(load_main(model_path).app) as client:
+        yield client
+
+
+def test_default_config_prices_above_cost(client):
+    body = client.post("/recommend", json={"record": EXAMPLE}).json()
+    assert "reference_prices" not in body
+    assert body["gm_pct"] >= 0
+    assert body["bounds"]["low"] <= body["price_recommended"] <= body["bounds"]["high"]
+
+    with open(DATA_PATH, "rb") as f:
+        batch = client.post("/recommend_batch?format=columns", files={"file": ("rides.csv", f.read())}).json()
+    assert min(batch["columns"]["gm_pct"]) >= 0
+
+
+def test_reference_rates_only_replace_the_baseline_on_request(load_main, model_path):
+    main = load_main(model_path, REFERENCE_DATA=DATA_PATH)
+    assert not main.REFERENCE_BASELINE
+    with TestClient(main.app) as client:
+        body = client.post("/recommend", json={"record": EXAMPLE}).json()
+    assert body["reference_prices"]["competitor"] is not None
+
+    scorer = main.models.champion.scorer
+    X, numeric = scorer.encode_record(EXAMPLE)
+    reference = scorer.engine.predict(X)
+    market = main.reference.rates([(EXAMPLE["Location_Category"], EXAMPLE["Vehicle_Type"],
+                                    EXAMPLE["Time_of_Booking"])])
+    market = tuple(rate * EXAMPLE["Expected_Ride_Duration"] for rate in market)
+    result = scorer._finish(reference, numeric, None, market)
+    np.testing.assert_array_equal(result["policy_baseline"], reference)
+    scorer.market_baseline = True
+    result = scorer._finish(reference, numeric, None, market)
+    np.testing.assert_array_equal(result["policy_baseline"], market[0])
+
+
+def test_segment_cubes_are_kept_per_model_version(load_main, model_path, df, pipeline, tmp_path):
+    from sklearn.ensemble import GradientBoostingRegressor
+
+    directory = tmp_path / "models"
+    directory.mkdir()
+    shutil.copy(model_path, directory / "v1.apo")
+    os.utime(directory / "v1.apo", (1, 1))
+    model = GradientBoostingRegressor(n_estimators=5, max_depth=2, random_state=0)
+    model.fit(pipeline.encode_columns(df), df["Historical_Cost_of_Ride"].to_numpy())
+    model_artifact.export(model, pipeline, str(directory / "v2.apo"))
+
+    main = load_main(model_path, MODEL_DIR=str(directory), CHALLENGER_SHARE="0.5")
+    keys = {}
+    for i in range(100):
+        keys.setdefault(main.models.route(str(i)).name, str(i))
+    assert set(keys) == {"v1.apo", "v2.apo"}
+    with open(DATA_PATH, "rb") as f:
+        contents = f.read()
+    with TestClient(main.app) as client:
+        batch = client.post("/recommend_batch?format=columns", files={"file": ("rides.csv", contents)},
+                            headers={"X-Routing-Key": keys["v1.apo"]}).json()
+        dataset_id = batch["dataset_id"]
+        v1 = client.get(f"/segments/{dataset_id}", headers={"X-Routing-Key": keys["v1.apo"]})
+        assert v1.json()["model_version"] == "v1.apo"
+        assert client.get(f"/segments/{dataset_id}", headers={"X-Routing-Key": keys["v2.apo"]}).status_code == 404
+
+        v2 = client.post("/segments", files={"file": ("rides.csv", contents)},
+                         headers={"X-Routing-Key": keys["v2.apo"]}).json()
+        assert v2["model_version"] == "v2.apo"
+        assert v2["segments"] != v1.json()["segments"]
+        assert client.get(f"/segments/{dataset_id}", headers={"X-Routing-Key": keys["v1.apo"]}).json() == v1.json()
+
+
+def test_metrics_count_requests_by_route_template(client):
+    client.post("/recommend", json={"record": EXAMPLE})
+    client.get("/jobs/missing")
+    client.get("/no-such-route")
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = response.text.splitlines()
+    assert 'price_optima_requests_total{endpoint="/recommend",status="200"} 1' in lines
+    assert 'price_optima_requests_total{endpoint="/jobs/{job_id}",status="404"} 1' in lines
+    assert 'price_optima_requests_total{endpoint="unmatched",status="404"} 1' in lines
+    assert 'price_optima_request_seconds_count{endpoint="/recommend"} 1' in lines
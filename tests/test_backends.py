@@ -0,0 +1,109 @@
+import os
+
+import joblib
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import backends
+import train
+from conftest import EXAMPLE, ROOT
+from features import CATEGORICAL, NUMERIC
+from model_artifact import load_engine
+
+PIPELINE_PATH = os.path.join(ROOT, "feature_pipeline.json")
+
+
+@pytest.fixture(scope="module")
+def training(df, pipeline):
+    X, y = train.encode(pipeline, df)
+    return train.without_target(X), y
+
+
+@pytest.fixture(scope="module")
+def hgb(training, pipeline):
+    backend = backends.BACKENDS["hgb"]
+    model = backend.fit(backend.make(max_iter=30, random_state=0), *training, pipeline)
+    return model, backend.engine(model, pipeline)
+
+
+def test_native_matrix_folds_one_hot_groups(df, pipeline, hgb):
+    frame = df.head(20).copy()
+    frame.loc[3, "Vehicle_Type"] = "Hovercraft"
+    native = hgb[1].native(pipeline.encode_columns(frame))
+    X = pipeline.encode_columns(frame)
+    np.testing.assert_array_equal(native[:, :len(NUMERIC)], X[:, :len(NUMERIC)])
+    for i, col in enumerate(CATEGORICAL):
+        codes = pipeline.category_codes(col, frame[col].to_numpy()).astype(np.float64)
+        codes[codes == len(pipeline.categories[col])] = np.nan
+        np.testing.assert_array_equal(native[:, len(NUMERIC) + i], codes)
+    assert np.isnan(native[3, len(NUMERIC) + CATEGORICAL.index("Vehicle_Type")])
+    with pytest.raises(ValueError, match="features"):
+        hgb[1].native(X[:, 1:])
+
+
+def test_engine_predicts_like_the_model(training, hgb):
+    X, _ = training
+    model, engine = hgb
+    np.testing.assert_array_equal(engine.predict(X), model.predict(engine.native(X)))
+    np.testing.assert_array_equal(engine.predict(X[0]), model.predict(engine.native(X[:1])))
+
+
+def test_columns_outside_split_features_do_not_matter(training, pipeline, hgb):
+    X, _ = training
+    engine = hgb[1]
+    used = set(engine.split_features())
+    unused = [i for i in range(pipeline.n_features) if i not in used]
+    assert unused and used
+    shuffled = X.copy()
+    shuffled[:, [i for i in unused if i < len(NUMERIC)]] = 123.0
+    np.testing.assert_array_equal(engine.predict(shuffled), engine.predict(X))
+    # A categorical split uses the whole one-hot group.
+    for offset, size in engine._groups:
+        group = set(range(offset, offset + size))
+        assert group <= used or not group & used
+
+
+def test_bundle_round_trip(tmp_path, training, pipeline, hgb):
+    X, _ = training
+    model, engine = hgb
+    path = str(tmp_path / "model.joblib")
+    backends.BACKENDS["hgb"].save(model, pipeline, path, {"r2": 0.5})
+    loaded, loaded_pipeline = load_engine(path, "unused.json")
+    assert isinstance(loaded, backends.HistGradientBoostingEngine)
+    assert loaded_pipeline.state() == pipeline.state()
+    assert loaded.fingerprint() == engine.fingerprint()
+    np.testing.assert_array_equal(loaded.predict(X), engine.predict(X))
+
+
+def test_bare_pickles_pick_their_backend(tmp_path, training, pipeline):
+    from sklearn.ensemble import GradientBoostingRegressor
+    from sklearn.linear_model import LinearRegression
+
+    from tree_engine import CompiledEnsemble
+
+    X, y = training
+    model = GradientBoostingRegressor(n_estimators=10, random_state=0).fit(X, y)
+    path = str(tmp_path / "model.pkl")
+    joblib.dump(model, path)
+    engine, _ = backends.load(path, PIPELINE_PATH)
+    assert isinstance(engine, CompiledEnsemble)
+    np.testing.assert_allclose(engine.predict(X), model.predict(X), rtol=1e-9)
+
+    joblib.dump(LinearRegression().fit(X, y), path)
+    with pytest.raises(ValueError, match="no backend"):
+        backends.load(path, PIPELINE_PATH)
+    joblib.dump(GradientBoostingRegressor(n_estimators=2).fit(X[:, :5], y), path)
+    with pytest.raises(RuntimeError, match="features"):
+        backends.load(path, PIPELINE_PATH)
+
+
+def test_api_serves_a_bundle(load_main, tmp_path, pipeline, hgb):
+    path = str(tmp_path / "model.joblib")
+    backends.BACKENDS["hgb"].save(hgb[0], pipeline, path)
+    main = load_main(path, SCORING_WORKERS="2")
+    with TestClient(main.app) as client:
+        body = client.post("/recommend", json={"record": EXAMPLE}).json()
+    assert main.models.champion.sharded is None
+    X = pipeline.encode_record(EXAMPLE)
+    assert body["baseline_price"] == pytest.approx(hgb[1].predict(X)[0], abs=0.01)
@@ -0,0 +1,73 @@
+import asyncio
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from batching import MicroBatcher
+from conftest import EXAMPLE
+
+
+class Recorder:
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    def __call__(self, rows):
+        self.calls.append(len(rows))
+        if self.fail:
+            raise RuntimeError("model unavailable")
+        return rows.sum(axis=1)
+
+
+async def _submit_all(batcher, rows):
+    return await asyncio.gather(*(batcher.submit(row) for row in rows), return_exceptions=True)
+
+
+def _rows(n):
+    return [np.full((1, 3), float(i)) for i in range(n)]
+
+
+def test_concurrent_rows_share_one_predict_and_get_their_own_result():
+    score = Recorder()
+    batcher = MicroBatcher(score, max_wait=0.01)
+    results = asyncio.run(_submit_all(batcher, _rows(10)))
+    assert score.calls == [10]
+    assert [prediction for prediction, _, _ in results] == [3.0 * i for i in range(10)]
+    assert all(size == 10 and wait >= 0 for _, wait, size in results)
+    assert batcher.stats()["batches"] == 1 and batcher.stats()["rows"] == 10
+
+
+def test_full_batches_flush_without_waiting():
+    score = Recorder()
+    batcher = MicroBatcher(score, max_wait=30.0, max_rows=4)
+    results = asyncio.run(asyncio.wait_for(_submit_all(batcher, _rows(8)), timeout=5))
+    assert score.calls == [4, 4]
+    assert [prediction for prediction, _, _ in results] == [3.0 * i for i in range(8)]
+
+
+def test_predict_errors_reach_every_waiter():
+    score = Recorder(fail=True)
+    batcher = MicroBatcher(score, max_wait=0.001)
+    results = asyncio.run(_submit_all(batcher, _rows(5)))
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    score.fail = False
+    assert asyncio.run(_submit_all(batcher, _rows(2)))[1][0] == 3.0
+    assert batcher.stats()["queued"] == 0
+
+
+def test_matches_direct_predict(engine, pipeline, df):
+    X = pipeline.encode_columns(df.head(50))
+    batcher = MicroBatcher(engine.predict)
+    results = asyncio.run(_submit_all(batcher, [X[i:i + 1] for i in range(len(X))]))
+    np.testing.assert_array_equal([prediction for prediction, _, _ in results], engine.predict(X))
+
+
+def test_recommend_reports_batching(load_main, model_path):
+    with TestClient(load_main(model_path, MICROBATCH="1").app) as client:
+        response = client.post("/recommend", json={"record": EXAMPLE})
+    assert response.headers["X-Batch-Size"] == "1"
+    assert float(response.headers["X-Queue-Wait-Ms"]) >= 0
+    unbatched = load_main(model_path).models.champion.scorer.score_record(EXAMPLE)
+    assert response.json()["price_recommended"] == pytest.approx(unbatched["price_recommended"])
@@ -0,0 +1,81 @@
+import json
+import shutil
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import drift
+import ingest
+from features import CATEGORICAL, FeaturePipeline
+
+
+class RecordingEngine:
+    def __init__(self):
+        self.seen = []
+
+    def predict(self, X):
+        self.seen.append(X)
+        return np.zeros(len(X))
+
+
+@pytest.fixture
+def monitor(df, pipeline, engine):
+    X = pipeline.encode_columns(df)
+    return drift.DriftMonitor(drift.snapshot(pipeline, X, engine.predict(X)), pipeline)
+
+
+def test_training_rows_do_not_drift(df, pipeline, engine, monitor):
+    batch = ingest.read(df.to_csv(index=False).encode(), pipeline)
+    monitor.submit_columns(batch.columns, engine.predict(pipeline.encode_columns(batch.columns)))
+    assert monitor.drain() == len(df)
+    features = monitor.report()["current"]["features"]
+    assert max(entry["psi"] for entry in features.values()) < 0.01
+
+
+def test_shadow_reencodes_codes_in_its_own_vocabulary(df, pipeline, monitor):
+    state = pipeline.state()
+    state["categories"] = {col: vocab[::-1] for col, vocab in state["categories"].items()}
+    challenger = FeaturePipeline.from_state(state)
+    shadow = SimpleNamespace(name="challenger", pipeline=challenger, engine=RecordingEngine())
+
+    rows = df.head(40)
+    record = rows.iloc[0].to_dict()
+    monitor.submit_record(record, 1.0, pipeline.encode_record(record))
+    batch = ingest.read(rows.to_csv(index=False).encode(), pipeline)
+    assert all(batch.columns[col].dtype.kind == "i" for col in CATEGORICAL)
+    monitor.submit_columns(batch.columns, np.ones(batch.n_accepted))
+    monitor.drain(shadow=shadow)
+
+    (X,) = shadow.engine.seen
+    np.testing.assert_array_equal(X[:1], challenger.encode_record(record))
+    np.testing.assert_allclose(X[1:], challenger.encode_columns(rows), atol=1e-9)
+    assert monitor.report()["shadow"]["rows"] == 1 + len(rows)
+
+
+def test_unknown_codes_stay_unknown(pipeline, monitor):
+    columns = {col: np.array([0, len(pipeline.categories[col])]) for col in CATEGORICAL}
+    labelled = monitor._labelled(columns)
+    for col in CATEGORICAL:
+        assert labelled[col].tolist() == [pipeline.categories[col][0], None]
+
+
+def test_stale_baseline_does_not_stop_serving(df, pipeline, model_path, tmp_path, load_main):
+    path = str(tmp_path / "model.apo")
+    shutil.copy(model_path, path)
+    X = pipeline.encode_columns(df)
+    baseline = drift.snapshot(pipeline, X, np.zeros(len(X)))
+    baseline["features"]["Vehicle_Type"]["categories"] = ["Scooter"]
+    drift.save(baseline, drift.baseline_path(path))
+
+    main = load_main(path)
+    from fastapi.testclient import TestClient
+
+    version = main.models.champion
+    assert version.drift is None
+    assert "different category vocabularies" in version.drift_error
+    with TestClient(main.app) as client:
+        assert client.post("/recommend", json={"record": df.iloc[0].to_dict()}).status_code == 200
+        report = client.get("/drift").json()
+        assert report["champion"]["error"] == version.drift_error
+        assert json.loads(client.get("/models").content)["champion"]["drift_error"] == version.drift_error
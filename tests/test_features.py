@@ -0,0 +1,80 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import ROOT
+from features import NUMERIC, RAW_NUMERIC, FeaturePipeline
+
+
+def _as_columns(records):
+    frame = pd.DataFrame(records)
+    return {col: frame[col].to_numpy() for col in frame.columns}
+
+
+def test_record_matches_batch(df, pipeline):
+    records = df.head(50).to_dict("records")
+    X, numeric = pipeline.encode_columns(_as_columns(records), with_numeric=True)
+    for i, record in enumerate(records):
+        row, row_numeric = pipeline.encode_record(record, with_numeric=True)
+        np.testing.assert_allclose(row[0], X[i], rtol=1e-12, atol=1e-12)
+        np.testing.assert_allclose(row_numeric[0], numeric[i], rtol=1e-12, atol=1e-12)
+
+
+def test_missing_and_nan_are_imputed_alike(df, pipeline):
+    record = df.iloc[0].to_dict()
+    record["Number_of_Riders"] = math.nan
+    record["Expected_Ride_Duration"] = None
+    X = pipeline.encode_columns(_as_columns([record]))
+    assert np.array_equal(pipeline.encode_record(record), X)
+
+    imputed = dict(record, Number_of_Riders=pipeline.defaults["Number_of_Riders"],
+                   Expected_Ride_Duration=pipeline.defaults["Expected_Ride_Duration"])
+    np.testing.assert_allclose(pipeline.encode_record(record), pipeline.encode_record(imputed))
+
+
+def test_out_of_range_record_matches_batch(df, pipeline):
+    record = df.iloc[0].to_dict()
+    record.update(Number_of_Riders=1000, Historical_Cost_of_Ride=-5, Customer_Loyalty_Status="Platinum")
+    X, numeric = pipeline.encode_columns(_as_columns([record]), with_numeric=True)
+    row, row_numeric = pipeline.encode_record(record, with_numeric=True)
+    np.testing.assert_allclose(row, X, rtol=1e-12)
+    np.testing.assert_allclose(row_numeric, numeric, rtol=1e-12)
+
+
+def test_shipped_pipeline_is_current(df, pipeline):
+    shipped = FeaturePipeline.load(f"{ROOT}/feature_pipeline.json")
+    assert shipped.bounds is not None
+    np.testing.assert_allclose(shipped.bounds, pipeline.bounds)
+    assert shipped.driver_mean == pytest.approx(pipeline.driver_mean)
+    np.testing.assert_allclose(shipped.scale, pipeline.scale)
+
+
+def test_save_load_round_trip(df, pipeline, tmp_path):
+    path = str(tmp_path / "pipeline.json")
+    pipeline.save(path)
+    loaded = FeaturePipeline.load(path)
+    assert loaded.state() == pipeline.state()
+    np.testing.assert_array_equal(loaded.encode_columns(df), pipeline.encode_columns(df))
+
+
+def test_unknown_category_has_no_one_hot_column(df, pipeline):
+    record = dict(df.iloc[0].to_dict(), Vehicle_Type="Limousine", Location_Category=None)
+    known = pipeline.encode_record(df.iloc[0].to_dict())
+    X = pipeline.encode_record(record)
+    np.testing.assert_array_equal(X[0, :len(NUMERIC)], known[0, :len(NUMERIC)])
+    assert X[0, len(NUMERIC):].sum() == known[0, len(NUMERIC):].sum() - 2
+
+
+def test_perturbed_copies_match_scaled_columns(df, pipeline):
+    columns = _as_columns(df.head(40).to_dict("records"))
+    factors = np.ones((3, len(RAW_NUMERIC)))
+    factors[1, RAW_NUMERIC.index("Number_of_Riders")] = 1.5
+    factors[2, RAW_NUMERIC.index("Historical_Cost_of_Ride")] = 0.8
+    X, numeric = pipeline.encode_perturbed(columns, factors)
+    for i, row in enumerate(factors):
+        scaled = dict(columns, **{col: columns[col] * f for col, f in zip(RAW_NUMERIC, row)})
+        expected_X, expected_numeric = pipeline.encode_columns(scaled, with_numeric=True)
+        np.testing.assert_allclose(X[i * 40:(i + 1) * 40], expected_X, rtol=1e-12, atol=1e-12)
+        np.testing.assert_allclose(numeric[i * 40:(i + 1) * 40], expected_numeric, rtol=1e-12)
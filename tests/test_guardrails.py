@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from features import NUMERIC
+from guardrails import RULES, Guardrails
+from optimizer import PriceOptimizer
+
+
+def _numeric(cost, riders=50.0, drivers=20.0):
+    numeric = np.zeros((len(cost), len(NUMERIC)))
+    numeric[:, NUMERIC.index("Number_of_Riders")] = riders
+    numeric[:, NUMERIC.index("Number_of_Drivers")] = drivers
+    numeric[:, NUMERIC.index("Historical_Cost_of_Ride")] = cost
+    return numeric
+
+
+def _apply(mode, reference, cost, competitor=None):
+    optimizer = PriceOptimizer()
+    numeric = _numeric(np.asarray(cost, dtype=np.float64))
+    result = optimizer.optimize(np.asarray(reference, dtype=np.float64), numeric)
+    result["policy_baseline"] = result["baseline_price"]
+    result["p_complete_policy_baseline"] = result["p_complete_baseline"]
+    return Guardrails(optimizer, mode).apply(result, numeric, competitor)
+
+
+def _failed(flags, rule):
+    return bool(flags & (1 << RULES.index(rule)))
+
+
+def test_gm_floor_beats_the_stability_cap():
+    result = _apply("clip", [100.0], [300.0])
+    assert result["gm_pct"][0] == pytest.approx(12.0)
+    assert _failed(result["policy_flags"][0], "stab_ok")
+    assert result["bounds_low"][0] <= result["price_recommended"][0] <= result["bounds_high"][0]
+
+
+def test_gm_floor_beats_the_competitor_cap():
+    result = _apply("clip", [200.0], [150.0], competitor=[60.0])
+    assert result["gm_pct"][0] == pytest.approx(12.0)
+    assert _failed(result["policy_flags"][0], "comp_up_ok")
+
+
+def test_competitor_cap_still_wins_over_the_stability_floor():
+    result = _apply("clip", [200.0], [50.0], competitor=[100.0])
+    assert result["price_recommended"][0] == pytest.approx(120.0)
+    assert result["gm_pct"][0] > 12.0
+    assert _failed(result["policy_flags"][0], "stab_ok")
+    assert result["bounds_high"][0] == pytest.approx(120.0)
+
+
+def test_clip_never_loses_money_and_bounds_hold_the_price():
+    rng = np.random.default_rng(0)
+    n = 10_000
+    reference = rng.uniform(20, 800, n)
+    cost = reference * rng.uniform(0.2, 3.0, n)
+    competitor = np.where(rng.random(n) < 0.3, np.nan, reference * rng.uniform(0.3, 2.0, n))
+    result = _apply("clip", reference, cost, competitor)
+    assert (result["gm_pct"] >= 12.0 - 1e-9).all()
+    assert (result["bounds_low"] <= result["price_recommended"] + 1e-9).all()
+    assert (result["price_recommended"] <= result["bounds_high"] + 1e-9).all()
+    assert not (result["policy_flags"] & (1 << RULES.index("gm12_ok"))).any()
+
+
+def test_flag_mode_only_flags():
+    reference, cost = np.array([100.0, 100.0]), np.array([300.0, 10.0])
+    flagged = _apply("flag", reference, cost)
+    plain = PriceOptimizer().optimize(reference, _numeric(cost))
+    np.testing.assert_array_equal(flagged["price_recommended"], plain["price_recommended"])
+    assert _failed(flagged["policy_flags"][0], "gm12_ok")
+    assert not flagged["policy_clipped"].any()
@@ -0,0 +1,22 @@
+import json
+import os
+import subprocess
+import sys
+
+from conftest import EXAMPLE, ROOT
+
+CHILD = """
+import json, sys
+import main
+main.models.champion.scorer.score_record(%r)
+print(json.dumps([name for name in ("pandas", "sklearn", "scipy", "joblib") if name in sys.modules]))
+""" % (EXAMPLE,)
+
+
+def test_artifact_serving_path_stays_numpy_only(model_path, tmp_path):
+    env = {key: value for key, value in os.environ.items()
+           if key not in ("REFERENCE_DATA", "MODEL_DIR", "PRICE_TABLE")}
+    env.update(MODEL_PATH=model_path, JOBS_DIR=str(tmp_path / "jobs"))
+    out = subprocess.run([sys.executable, "-c", CHILD], cwd=ROOT, env=env, check=True, capture_output=True,
+                         text=True).stdout
+    assert json.loads(out.splitlines()[-1]) == []
@@ -0,0 +1,92 @@
+import io
+
+import numpy as np
+import pytest
+
+import ingest
+
+
+def _bad_rows(df):
+    frame = df.head(6).astype({"Number_of_Riders": object, "Average_Ratings": object})
+    frame.loc[1, "Number_of_Riders"] = "many"
+    frame.loc[2, "Average_Ratings"] = 7.5
+    frame.loc[3, "Vehicle_Type"] = "Limousine"
+    frame.loc[4, "Location_Category"] = None
+    frame.loc[5, "Number_of_Riders"] = -3
+    return frame
+
+
+def _check_rejections(batch, df):
+    assert (batch.n_rows, batch.rejected, batch.n_accepted) == (6, 5, 1)
+    np.testing.assert_array_equal(batch.rows, [0])
+    assert [(e["row"], e["column"], e["error"]) for e in batch.errors] == [
+        (1, "Number_of_Riders", "not a number"),
+        (2, "Average_Ratings", "must be between 0 and 5"),
+        (3, "Vehicle_Type", "unknown value, expected one of ['Economy', 'Premium']"),
+        (4, "Location_Category", "missing value"),
+        (5, "Number_of_Riders", "must be non-negative"),
+    ]
+    assert batch.errors[1]["value"] == 7.5
+    assert batch.columns["Number_of_Riders"].tolist() == [df["Number_of_Riders"][0]]
+
+
+def test_csv_round_trip(df, pipeline):
+    batch = ingest.read(df.to_csv(index=False).encode(), pipeline)
+    assert (batch.n_rows, batch.rejected) == (len(df), 0)
+    # pandas' default CSV float parser can be off in the last bit.
+    np.testing.assert_allclose(batch.columns["Historical_Cost_of_Ride"], df["Historical_Cost_of_Ride"], rtol=1e-15)
+    np.testing.assert_allclose(pipeline.encode_columns(batch.columns), pipeline.encode_columns(df), rtol=1e-12)
+
+
+def test_csv_reject_rows(df, pipeline):
+    _check_rejections(ingest.read(_bad_rows(df).to_csv(index=False).encode(), pipeline), df)
+
+
+def test_missing_required_column(df, pipeline):
+    with pytest.raises(ingest.IngestError, match="Vehicle_Type"):
+        ingest.read(df.drop(columns="Vehicle_Type").to_csv(index=False).encode(), pipeline)
+
+
+def test_error_report_offsets_rows_across_chunks(df, pipeline):
+    report = ingest.ErrorReport()
+    for _ in range(2):
+        report.update(ingest.read(_bad_rows(df).to_csv(index=False).encode(), pipeline))
+    assert report.result()["rejected_rows"] == 10
+    assert [e["row"] for e in report.result()["details"]] == [1, 2, 3, 4, 5, 7, 8, 9, 10, 11]
+
+
+def _arrow_bytes(frame, fmt):
+    pa = pytest.importorskip("pyarrow")
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    sink = io.BytesIO()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        pq.write_table(table, sink)
+    else:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue()
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_arrow_formats_match_csv(df, pipeline, fmt):
+    data = _arrow_bytes(df, fmt)
+    assert ingest.detect_format(data) == fmt
+    batch = ingest.read(data, pipeline)
+    assert batch.rejected == 0
+    np.testing.assert_array_equal(pipeline.encode_columns(batch.columns), pipeline.encode_columns(df))
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_arrow_formats_reject_rows(df, pipeline, fmt):
+    frame = _bad_rows(df)
+    frame["Number_of_Riders"] = frame["Number_of_Riders"].astype(str)
+    frame["Average_Ratings"] = frame["Average_Ratings"].astype(float)
+    _check_rejections(ingest.read(_arrow_bytes(frame, fmt), pipeline), df)
+
+
+def test_unreadable_parquet(pipeline):
+    pytest.importorskip("pyarrow")
+    with pytest.raises(ingest.IngestError, match="unreadable parquet"):
+        ingest.read(b"PAR1" + b"\0" * 32, pipeline)
@@ -0,0 +1,115 @@
+import io
+import os
+import shutil
+import time
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from jobs import UNFINISHED, JobManager
+
+
+@pytest.fixture
+def manager(tmp_path, model_path):
+    manager = JobManager(str(tmp_path), model_path, None, "clip", workers=1)
+    yield manager
+    manager.shutdown()
+
+
+@pytest.fixture(scope="module")
+def upload(df):
+    return df.head(200).to_csv(index=False).encode()
+
+
+def _wait(manager, job_id, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = manager.status(job_id)
+        if status["status"] not in UNFINISHED:
+            return status
+        time.sleep(0.1)
+    raise AssertionError(f"job {job_id} still {status['status']}")
+
+
+def test_job_runs(manager, upload):
+    status = _wait(manager, manager.create(io.BytesIO(upload), "rides.csv"))
+    assert status["status"] == "done"
+    assert status["rows_processed"] == 200
+
+
+def test_dead_worker_fails_job_and_pool_is_replaced(manager, upload):
+    broken = manager.pool
+    broken.submit(os._exit, 1)
+    status = _wait(manager, manager.create(io.BytesIO(upload), "rides.csv"))
+    assert status["status"] == "failed"
+    assert "worker process died" in status["error"]
+
+    status = _wait(manager, manager.create(io.BytesIO(upload), "rides.csv"))
+    assert status["status"] == "done"
+    assert manager.pool is not broken
+
+
+def test_submit_on_broken_pool_retries(manager, upload):
+    killed = manager.pool.submit(os._exit, 1)
+    with pytest.raises(BrokenProcessPool):
+        killed.result(timeout=120)
+    status = _wait(manager, manager.create(io.BytesIO(upload), "rides.csv"))
+    assert status["status"] == "done"
+
+
+def test_failed_future_marks_running_job_failed(manager, upload):
+    job_id = "stuck"
+    manager.store.create(job_id, "rides.csv", "in.csv", "out.csv", 0)
+    manager.store.update(job_id, status="running")
+    future = Future()
+    future.add_done_callback(lambda f: manager._finished(manager.pool, job_id, f))
+    future.set_exception(MemoryError("out of memory"))
+    status = manager.status(job_id)
+    assert status["status"] == "failed"
+    assert status["error"] == "MemoryError: out of memory"
+
+
+def test_submit_failure_does_not_leave_a_queued_job(manager, upload):
+    manager.pool.shutdown()
+    job_id = manager.create(io.BytesIO(upload), "rides.csv")
+    status = manager.status(job_id)
+    assert status["status"] == "failed"
+    assert "RuntimeError" in status["error"]
+    assert not manager.store.unfinished()
+
+
+def test_failed_job_removes_partial_result(manager, df):
+    upload = df.drop(columns="Vehicle_Type").head(200).to_csv(index=False).encode()
+    job_id = manager.create(io.BytesIO(upload), "rides.csv")
+    status = _wait(manager, job_id)
+    assert status["status"] == "failed"
+    result_path = manager.store.get(job_id)["result_path"]
+    assert not os.path.exists(result_path)
+    assert not os.path.exists(result_path + ".part")
+
+
+def test_jobs_stay_on_the_pinned_model(tmp_path, model_path, engine, upload):
+    path = str(tmp_path / "champion.apo")
+    shutil.copyfile(model_path, path)
+    manager = JobManager(str(tmp_path / "jobs"), path, None, "clip", workers=1, model_name="champion.apo",
+                         fingerprint=engine.fingerprint())
+    try:
+        with open(path, "wb") as f:
+            f.write(b"rewritten in place")
+        manager._discard(manager.pool)
+        status = _wait(manager, manager.create(io.BytesIO(upload), "rides.csv"))
+        assert status["status"] == "done"
+        assert status["model"] == {"name": "champion.apo", "fingerprint": engine.fingerprint()}
+    finally:
+        manager.shutdown()
+
+
+def test_pinned_model_with_another_fingerprint_fails_jobs(tmp_path, model_path, upload):
+    manager = JobManager(str(tmp_path), model_path, None, "clip", workers=1, fingerprint="0" * 32)
+    try:
+        status = _wait(manager, manager.create(io.BytesIO(upload), "rides.csv"))
+        assert status["status"] == "failed"
+        assert "expected " + "0" * 32 in status["error"]
+    finally:
+        manager.shutdown()
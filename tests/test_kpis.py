@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from kpis import QUANTILES, RELATIVE_ACCURACY, KpiAccumulator, Moments, QuantileSketch
+
+
+def _columns(frame):
+    return {col: frame[col].to_numpy() for col in frame.columns}
+
+
+@pytest.fixture
+def chunks(df, scorer):
+    return [scorer.score_columns(_columns(df[start:start + 143])) for start in range(0, len(df), 143)]
+
+
+def test_moments_match_numpy():
+    values = np.random.default_rng(0).lognormal(3, 1, size=10_001)
+    merged = Moments()
+    for part in np.array_split(values, 13):
+        merged.merge(Moments().update(part))
+    assert merged.count == len(values)
+    assert merged.mean == pytest.approx(values.mean(), rel=1e-12)
+    assert merged.std == pytest.approx(values.std(), rel=1e-9)
+    assert Moments().update([]).std is None
+
+
+def test_sketch_quantiles_within_relative_accuracy():
+    values = np.random.default_rng(1).lognormal(3, 1, size=50_000)
+    sketch = QuantileSketch().update(values)
+    ordered = np.sort(values)
+    for q in (0.0, 0.1, 0.5, 0.9, 0.99, 1.0):
+        exact = ordered[int(q * (len(values) - 1))]
+        assert abs(sketch.quantile(q) - exact) <= RELATIVE_ACCURACY * exact
+
+
+def test_sketch_merge_equals_single_pass():
+    values = np.concatenate([np.zeros(50), np.random.default_rng(2).lognormal(0, 3, size=20_000)])
+    whole = QuantileSketch().update(values)
+    merged = QuantileSketch()
+    for part in np.array_split(np.random.default_rng(3).permutation(values), 9):
+        merged.merge(QuantileSketch().update(part))
+    assert merged.zero_count == whole.zero_count == 50
+    assert merged.offset == whole.offset
+    np.testing.assert_array_equal(merged.counts, whole.counts)
+    assert merged.quantile(0.001) == 0.0
+    with pytest.raises(ValueError, match="accuracy"):
+        merged.merge(QuantileSketch(relative_accuracy=0.01))
+
+
+def test_accumulator_merge_equals_single_pass(df, scorer, chunks):
+    whole = KpiAccumulator().update(scorer.score_columns(_columns(df))).result()
+    merged = KpiAccumulator()
+    for result in chunks:
+        merged.merge(KpiAccumulator().update(result))
+    assert merged.result() == whole
+    sequential = KpiAccumulator()
+    for result in chunks:
+        sequential.update(result)
+    assert sequential.result() == whole
+
+
+def test_accumulator_matches_direct_computation(df, scorer):
+    result = scorer.score_columns(_columns(df))
+    kpis = KpiAccumulator().update(result).result()
+    price = result["price_recommended"]
+    baseline = result["policy_baseline"]
+    p_baseline = result["p_complete_policy_baseline"]
+    revenue_baseline = (baseline * p_baseline * result["riders"]).sum()
+    revenue_scenario = result["expected_revenue"].sum()
+
+    assert kpis["total_records"] == len(df)
+    assert kpis["avg_price"] == round(price.mean(), 2)
+    assert kpis["std_price"] == pytest.approx(price.std(), abs=0.006)
+    assert kpis["min_price"] == round(price.min(), 2)
+    assert kpis["max_price"] == round(price.max(), 2)
+    for q in QUANTILES:
+        exact = np.sort(price)[int(q * (len(price) - 1))]
+        assert kpis[f"p{round(q * 100):d}_price"] == pytest.approx(exact, rel=RELATIVE_ACCURACY, abs=0.006)
+    assert kpis["revenue_lift_pct"] == pytest.approx(
+        (revenue_scenario - revenue_baseline) / revenue_baseline * 100, abs=0.006)
+    assert kpis["gm_scenario_pct"] == pytest.approx(result["gm_pct"].mean(), abs=0.006)
+    assert kpis["conversion_scenario_pct"] == pytest.approx(result["p_complete_recommended"].mean() * 100, abs=0.006)
+    assert kpis["cancellation_baseline_pct"] == pytest.approx(100 - p_baseline.mean() * 100, abs=0.006)
+    changed = np.mean(np.round(price, 2) != np.round(baseline, 2)) * 100
+    assert kpis["price_change_rate_pct"] == pytest.approx(changed, abs=0.006)
+
+
+def test_empty_accumulator():
+    assert KpiAccumulator().result() == {"total_records": 0, "avg_price": None}
+    assert KpiAccumulator().merge(KpiAccumulator()).result()["total_records"] == 0
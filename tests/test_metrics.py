@@ -0,0 +1,107 @@
+import threading
+
+import numpy as np
+import pytest
+
+import metrics
+
+
+def _quantile(values, q):
+    ordered = np.sort(values)
+    return ordered[max(int(np.ceil(q * len(values))) - 1, 0)]
+
+
+def test_histogram_quantiles_within_bucket_accuracy():
+    values = np.random.default_rng(0).lognormal(-5, 2, size=20_000)
+    histogram = metrics.Histogram()
+    for value in values.tolist():
+        histogram.observe(value)
+    count, total, quantiles = histogram.snapshot()
+    assert count == len(values)
+    assert total == pytest.approx(values.sum())
+    for q, value in quantiles.items():
+        assert value == pytest.approx(_quantile(values, q), rel=1 / metrics.SUB_BUCKETS)
+
+
+def test_observe_many_matches_observe():
+    values = np.concatenate([np.random.default_rng(1).lognormal(3, 1, size=5000), [0.0, -1.0, 1e-9, 1e6]])
+    one, many = metrics.Histogram(low=1, high=1e4), metrics.Histogram(low=1, high=1e4)
+    for value in values.tolist():
+        one.observe(value)
+    many.observe_many(values)
+    many.observe_many([])
+    assert one._snapshot()[0].counts == many._snapshot()[0].counts
+    assert one.snapshot()[:2] == pytest.approx(many.snapshot()[:2])
+
+
+def test_shards_sum_across_threads():
+    counter, histogram = metrics.Counter(), metrics.Histogram()
+
+    def work():
+        for _ in range(1000):
+            counter.inc()
+            histogram.observe(0.01)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counter.value == 8000
+    assert len(counter._snapshot()) == 8
+    assert histogram.snapshot()[0] == 8000
+
+
+def test_exposition_format():
+    registry = metrics.Registry()
+    requests = registry.counter("requests_total", "Requests.", ("endpoint", "status"))
+    requests.labels("/predict", "200").inc(3)
+    requests.labels('/a"b\\', "500").inc()
+    seconds = registry.histogram("seconds", "Latency.", ("endpoint",))
+    seconds.labels("/predict").observe(0.5)
+    seconds.labels("/idle")
+    registry.gauge("up", "Up.", lambda: 1)
+    registry.gauge("absent", "Not reported.", lambda: None)
+    registry.collect("cache", "Cache", lambda: {"hits": 4, "ratio": 0.5, "enabled": True, "name": "x"},
+                     counters=("hits",))
+    lines = registry.render().splitlines()
+
+    assert lines[:4] == [
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{endpoint="/predict",status="200"} 3',
+        'requests_total{endpoint="/a\\"b\\\\",status="500"} 1',
+    ]
+    assert "# TYPE seconds summary" in lines
+    median = seconds.labels("/predict").snapshot()[2][0.5]
+    assert median == pytest.approx(0.5, rel=1 / metrics.SUB_BUCKETS)
+    assert f'seconds{{endpoint="/predict",quantile="0.5"}} {median!r}' in lines
+    assert 'seconds_sum{endpoint="/predict"} 0.5' in lines
+    assert 'seconds_count{endpoint="/predict"} 1' in lines
+    assert 'seconds{endpoint="/idle",quantile="0.99"} NaN' in lines
+    assert 'seconds_count{endpoint="/idle"} 0' in lines
+    assert "up 1" in lines and not any("absent" in line for line in lines)
+    assert lines[-6:] == [
+        "# HELP cache_hits_total Cache: hits.", "# TYPE cache_hits_total counter", "cache_hits_total 4",
+        "# HELP cache_ratio Cache: ratio.", "# TYPE cache_ratio gauge", "cache_ratio 0.5",
+    ]
+
+
+def test_remove_drops_series_by_leading_labels():
+    family = metrics.Family("counter", "rows_total", "Rows.", ("version", "endpoint"), metrics.Counter)
+    for version in ("v1", "v2"):
+        for endpoint in ("/predict", "/batch"):
+            family.labels(version, endpoint).inc()
+    family.remove("v1")
+    assert [line.split("{")[1] for line in family.render()[2:]] == [
+        'version="v2",endpoint="/predict"} 1', 'version="v2",endpoint="/batch"} 1']
+    family.remove("v2", "/batch")
+    assert len(family.render()) == 3
+    assert family.labels("v1", "/predict").value == 0
+
+
+def test_gauge_family_skips_missing_values():
+    family = metrics.GaugeFamily("psi", "PSI.", ("version", "feature"),
+                                 lambda: {("v1", "riders"): 0.25, ("v1", "drivers"): None})
+    assert family.render()[2:] == ['psi{version="v1",feature="riders"} 0.25']
+    assert metrics.GaugeFamily("psi", "PSI.", ("version",), dict).render() == []
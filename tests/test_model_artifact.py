@@ -0,0 +1,65 @@
+import struct
+
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor
+
+import model_artifact
+from features import FeaturePipeline
+from tree_engine import CompiledEnsemble
+
+
+@pytest.fixture(scope="module")
+def fitted(df, pipeline):
+    X = pipeline.encode_columns(df)
+    model = GradientBoostingRegressor(n_estimators=25, max_depth=4, random_state=0)
+    return model.fit(X, df["Historical_Cost_of_Ride"].to_numpy()), X
+
+
+def test_round_trip_predicts_like_sklearn(fitted, pipeline, tmp_path):
+    model, X = fitted
+    path = str(tmp_path / "model.apo")
+    model_artifact.export(model, pipeline, path, {"source": "test"})
+    assert model_artifact.is_artifact(path)
+
+    engine, loaded, header = model_artifact.load(path)
+    compiled = CompiledEnsemble.from_sklearn(model)
+    assert engine.fingerprint() == compiled.fingerprint()
+    assert not engine.value.flags.owndata and not engine.threshold.flags.owndata  # views of the mapping
+    np.testing.assert_array_equal(engine.predict(X), model.predict(X))
+    assert loaded.state() == pipeline.state()
+    assert (header["n_trees"], header["depth"], header["metadata"]) == (25, 4, {"source": "test"})
+    for spec in header["arrays"].values():
+        assert (header["data_offset"] + spec["offset"]) % model_artifact.ALIGN == 0
+
+
+def test_load_engine_serves_both_formats(fitted, pipeline, tmp_path):
+    import joblib
+
+    model, X = fitted
+    apo, pkl, pipeline_path = (str(tmp_path / name) for name in ("m.apo", "m.pkl", "pipeline.json"))
+    model_artifact.export(model, pipeline, apo)
+    joblib.dump(model, pkl)
+    pipeline.save(pipeline_path)
+    for path in (apo, pkl):
+        engine, loaded = model_artifact.load_engine(path, pipeline_path)
+        np.testing.assert_array_equal(engine.predict(X), model.predict(X))
+
+
+def test_rejects_mismatched_and_foreign_files(fitted, df, pipeline, tmp_path):
+    model, _ = fitted
+    narrow = FeaturePipeline.fit(df[df["Vehicle_Type"] == "Economy"])
+    with pytest.raises(ValueError, match="features"):
+        model_artifact.export(model, narrow, str(tmp_path / "narrow.apo"))
+
+    path = tmp_path / "model.apo"
+    model_artifact.export(model, pipeline, str(path))
+    data = bytearray(path.read_bytes())
+    data[8:12] = struct.pack("<I", model_artifact.VERSION + 1)
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError, match="format version"):
+        model_artifact.load(str(path))
+    path.write_bytes(b"not a model at all")
+    assert not model_artifact.is_artifact(str(path))
+    with pytest.raises(ValueError, match="not a model artifact"):
+        model_artifact.read_header(str(path))
@@ -0,0 +1,61 @@
+import numpy as np
+
+from features import NUMERIC
+from optimizer import PriceOptimizer
+
+
+def _numeric(riders, drivers, cost):
+    numeric = np.zeros((len(riders), len(NUMERIC)))
+    numeric[:, NUMERIC.index("Number_of_Riders")] = riders
+    numeric[:, NUMERIC.index("Number_of_Drivers")] = drivers
+    numeric[:, NUMERIC.index("Historical_Cost_of_Ride")] = cost
+    return numeric
+
+
+def _rides(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    numeric = _numeric(rng.integers(1, 100, n), rng.integers(1, 100, n), rng.uniform(25, 840, n))
+    return numeric[:, NUMERIC.index("Historical_Cost_of_Ride")] * rng.uniform(0.8, 1.2, n), numeric
+
+
+def test_completion_curve_is_anchored_and_falls_with_price():
+    optimizer = PriceOptimizer()
+    base = np.array([0.2, 0.5, 0.9])
+    np.testing.assert_allclose(optimizer.completion_probability(100.0, 100.0, base), base)
+    prices = np.linspace(50, 150, 21)
+    p = optimizer.completion_probability(prices[:, None], 100.0, base)
+    assert (np.diff(p, axis=0) <= 0).all() and (p <= 1).all()
+
+
+def test_best_candidate_is_the_grid_argmax():
+    optimizer = PriceOptimizer(n_points=11)
+    reference, numeric = _rides()
+    result = optimizer.optimize(reference, numeric)
+    riders = numeric[:, NUMERIC.index("Number_of_Riders")]
+    base = np.minimum(numeric[:, NUMERIC.index("Number_of_Drivers")] / riders, 1.0)
+    for i in range(0, len(reference), 50):
+        prices = reference[i] * optimizer.grid
+        revenue = prices * optimizer.completion_probability(prices, reference[i], base[i]) * riders[i]
+        assert result["price_recommended"][i] == prices[revenue.argmax()]
+        assert result["expected_revenue"][i] == revenue.max()
+    np.testing.assert_allclose(result["bounds_low"], reference * (1 - optimizer.band))
+    np.testing.assert_allclose(result["bounds_high"], reference * (1 + optimizer.band))
+    assert ((result["price_recommended"] >= result["bounds_low"])
+            & (result["price_recommended"] <= result["bounds_high"])).all()
+
+
+def test_reprice_at_the_chosen_price_is_a_no_op():
+    optimizer = PriceOptimizer()
+    reference, numeric = _rides()
+    result = optimizer.optimize(reference, numeric)
+    repriced = optimizer.reprice(dict(result), result["price_recommended"].copy(), numeric)
+    for key in ("p_complete_recommended", "expected_revenue", "gm_pct"):
+        np.testing.assert_allclose(repriced[key], result[key], rtol=1e-12)
+
+
+def test_scarce_supply_prices_higher():
+    optimizer = PriceOptimizer()
+    reference = np.full(2, 200.0)
+    result = optimizer.optimize(reference, _numeric([100, 100], [5, 95], [200, 200]))
+    assert result["price_recommended"][0] > result["price_recommended"][1]
+    np.testing.assert_allclose(result["cost"], 200 * optimizer.cost_ratio)
@@ -0,0 +1,74 @@
+import io
+import time
+
+import numpy as np
+
+import ingest
+import responses
+import streaming
+from jobs import UNFINISHED, JobManager
+
+REJECTED = [1, 4, 7]
+
+
+def _upload(df):
+    frame = df.head(12).copy()
+    frame.loc[1, "Number_of_Riders"] = -3
+    frame.loc[4, "Vehicle_Type"] = "Hovercraft"
+    frame.loc[7, "Average_Ratings"] = 9.5
+    return frame.to_csv(index=False).encode()
+
+
+def _accepted(n):
+    return [i for i in range(n) if i not in REJECTED]
+
+
+def test_batch_rows_skip_rejected_rows(df, pipeline, scorer):
+    batch = ingest.read(_upload(df), pipeline)
+    assert [error["row"] for error in batch.errors] == REJECTED
+    assert batch.rows.tolist() == _accepted(12)
+
+    columns = responses.result_columns(scorer.score_columns(batch.columns, rows=batch.rows))
+    assert columns["row"].tolist() == _accepted(12)
+    body = responses.encode(columns, {}, "json").decode()
+    assert body.startswith('{"recommendations": [{"row": 0, ')
+
+
+def test_streamed_blocks_keep_upload_row_numbers(df, pipeline, scorer):
+    summary = scorer.summary()
+    lines = []
+    for header, block in streaming.iter_csv_blocks_sync(io.BytesIO(_upload(df)), chunk_bytes=200):
+        batch, result = streaming.score_csv_block(scorer, header, block, summary.errors.rows_seen)
+        summary.update(result, batch)
+        lines += streaming.encode_rows(result, "csv").decode().splitlines()
+    assert summary.errors.rows_seen == 12
+    assert [int(line.split(",")[0]) for line in lines] == _accepted(12)
+    assert [error["row"] for error in summary.errors.errors] == REJECTED
+
+
+def test_single_block_matches_whole_upload(df, pipeline, scorer):
+    upload = _upload(df)
+    header, block = next(streaming.iter_csv_blocks_sync(io.BytesIO(upload)))
+    batch, result = streaming.score_csv_block(scorer, header, block)
+    whole = ingest.read(upload, pipeline)
+    expected = scorer.score_columns(whole.columns, rows=whole.rows)
+    for key in streaming.BATCH_FIELDS:
+        np.testing.assert_array_equal(result[key], expected[key])
+
+
+def test_job_result_rows_line_up_with_input(df, tmp_path, model_path):
+    manager = JobManager(str(tmp_path), model_path, None, "clip", workers=1)
+    try:
+        job_id = manager.create(io.BytesIO(_upload(df)), "rides.csv")
+        deadline = time.monotonic() + 120
+        while manager.status(job_id)["status"] in UNFINISHED and time.monotonic() < deadline:
+            time.sleep(0.1)
+        status = manager.status(job_id)
+    finally:
+        manager.shutdown()
+    assert status["status"] == "done"
+    assert status["errors"]["rejected_rows"] == len(REJECTED)
+    with open(manager.store.get(job_id)["result_path"]) as f:
+        header, *rows = f.read().splitlines()
+    assert header.split(",")[0] == "row"
+    assert [int(row.split(",")[0]) for row in rows] == _accepted(12)
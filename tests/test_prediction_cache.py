@@ -0,0 +1,85 @@
+import os
+import shutil
+
+import numpy as np
+from fastapi.testclient import TestClient
+from sklearn.ensemble import GradientBoostingRegressor
+
+import model_artifact
+from conftest import EXAMPLE
+from prediction_cache import PredictionCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_rows_within_half_a_step_share_a_key():
+    cache = PredictionCache(step=0.1)
+    row = np.array([0.5, -1.23, 2.0])
+    assert cache.key(row) == cache.key(row + 0.04) != cache.key(row + 0.06)
+    exact = PredictionCache(step=0)
+    assert exact.key(row) != exact.key(row + 1e-12)
+
+
+def test_lru_eviction_and_memory_accounting():
+    cache = PredictionCache(step=1.0, max_entries=2)
+    keys = [cache.key(np.array([float(i)])) for i in range(3)]
+    cache.put(keys[0], 10.0)
+    cache.put(keys[1], 11.0)
+    assert cache.get(keys[0]) == 10.0  # keys[1] is now least recently used
+    cache.put(keys[2], 12.0)
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == 10.0 and cache.get(keys[2]) == 12.0
+    stats = cache.stats()
+    assert (stats["entries"], stats["evictions"], stats["hits"], stats["misses"]) == (2, 1, 3, 1)
+    cache.clear()
+    assert cache.memory_bytes == 0 and cache.stats()["invalidations"] == 1
+
+
+def test_rewritten_model_file_empties_the_cache(tmp_path):
+    path = tmp_path / "model.apo"
+    path.write_bytes(b"one")
+    os.utime(path, (1, 1))
+    clock = Clock()
+    cache = PredictionCache(str(path), step=0.01, check_interval=5.0, clock=clock)
+    key = cache.key(np.zeros(3))
+    cache.put(key, 1.0)
+
+    path.write_bytes(b"two")
+    os.utime(path, (2, 2))
+    clock.now = 4.0
+    assert cache.get(key) == 1.0  # not checked again yet
+    clock.now = 5.0
+    assert cache.get(key) is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_reloaded_model_is_not_answered_from_the_old_cache(load_main, model_path, df, pipeline, tmp_path):
+    directory = tmp_path / "models"
+    directory.mkdir()
+    shutil.copy(model_path, directory / "model.apo")
+    os.utime(directory / "model.apo", (1, 1))
+    main = load_main(model_path, MODEL_DIR=str(directory), PREDICTION_CACHE="1")
+    with TestClient(main.app) as client:
+        first = client.post("/recommend", json={"record": EXAMPLE})
+        second = client.post("/recommend", json={"record": EXAMPLE})
+        assert (first.headers["X-Cache"], second.headers["X-Cache"]) == ("miss", "hit")
+        assert second.json() == first.json()
+
+        model = GradientBoostingRegressor(n_estimators=5, max_depth=2, random_state=0)
+        model.fit(pipeline.encode_columns(df), df["Historical_Cost_of_Ride"].to_numpy() * 2)
+        model_artifact.export(model, pipeline, str(directory / "model.tmp"))
+        os.utime(directory / "model.tmp", (2, 2))
+        os.replace(directory / "model.tmp", directory / "model.apo")
+        assert main.models.refresh()
+
+        reloaded = client.post("/recommend", json={"record": EXAMPLE})
+        assert reloaded.headers["X-Cache"] == "miss"
+        expected = main.models.champion.scorer.score_record(EXAMPLE)
+        assert reloaded.json()["price_recommended"] == expected["price_recommended"]
+        assert reloaded.json()["price_recommended"] != first.json()["price_recommended"]
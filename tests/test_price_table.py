@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor
+
+import train
+from features import CATEGORICAL
+from price_table import PriceTable
+from tree_engine import CompiledEnsemble
+
+POINTS = {"Number_of_Riders": 5, "Number_of_Drivers": 5, "Expected_Ride_Duration": 5, "Historical_Cost_of_Ride": 9}
+
+
+@pytest.fixture(scope="module")
+def engine(pipeline, df):
+    # The shared model is fitted on its own target and splits on nothing else; this one splits on the ride.
+    X, y = train.encode(pipeline, df)
+    return CompiledEnsemble.from_sklearn(
+        GradientBoostingRegressor(n_estimators=30, max_depth=3, random_state=0).fit(train.without_target(X), y))
+
+
+@pytest.fixture(scope="module")
+def table(engine, pipeline, df):
+    return PriceTable.compile(engine, pipeline, df, points=POINTS)
+
+
+def _lookup(table, pipeline, record):
+    return table.lookup(record, pipeline.encode_record(record, with_numeric=True)[1][0])
+
+
+def test_grid_nodes_are_exact(table, engine, pipeline):
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        record = {col: pipeline.categories[col][0] for col in CATEGORICAL}
+        record.update({col: rng.choice(pipeline.categories[col]) for col in table.categorical})
+        record.update({col: float(rng.choice(np.linspace(low, high, points)))
+                       for col, low, high, points in zip(table.axes, table.lows, table.highs, table.points)})
+        exact = engine.predict(pipeline.encode_record(record))[0]
+        assert _lookup(table, pipeline, record) == pytest.approx(exact, rel=1e-9)
+
+
+def test_interpolation_error_is_within_the_report(table, engine, pipeline, df):
+    records = df.to_dict("records")
+    hits = table.hits
+    exact = engine.predict(pipeline.encode_columns(df))
+    looked_up = np.array([_lookup(table, pipeline, record) for record in records], dtype=np.float64)
+    report = table.report["training_rows"]
+    assert report["points"] == len(df) and report["outside"] == 0
+    error = np.abs(looked_up - exact)
+    assert error.max() == pytest.approx(report["max_abs_error"])
+    assert error.mean() == pytest.approx(report["mean_abs_error"])
+    assert table.max_error >= report["max_abs_error"]
+    assert table.hits == hits + len(df)
+
+
+def test_lookup_matches_interpolate(table, pipeline, df):
+    codes = [pipeline.category_codes(col, df[col]) for col in table.categorical]
+    codes = np.column_stack(codes) if codes else np.zeros((len(df), 0))
+    _, numeric = pipeline.encode_columns(df, with_numeric=True)
+    vectorized = table.interpolate(codes, numeric[:, table._columns])
+    scalar = [_lookup(table, pipeline, record) for record in df.to_dict("records")]
+    np.testing.assert_allclose(vectorized, scalar, rtol=1e-12)
+
+
+def test_records_outside_the_grid_fall_back(table, pipeline, df):
+    record = df.iloc[0].to_dict()
+    fallbacks = table.fallbacks
+    assert table.categorical and table.axes
+    assert _lookup(table, pipeline, dict(record, **{table.axes[0]: table.highs[0] * 2})) is None
+    assert _lookup(table, pipeline, dict(record, **{table.categorical[0]: "Hovercraft"})) is None
+    assert table.fallbacks == fallbacks + 2
+    x = np.array([table.highs * 2])
+    assert np.isnan(table.interpolate(np.zeros((1, len(table.categorical))), x)).all()
+
+
+def test_save_and_load_check_the_model(table, engine, pipeline, df, tmp_path):
+    path = str(tmp_path / "table.npz")
+    table.save(path)
+    loaded = PriceTable.load(path, engine, pipeline)
+    np.testing.assert_array_equal(loaded.values, table.values)
+    assert loaded.report == table.report
+    record = df.iloc[3].to_dict()
+    assert _lookup(loaded, pipeline, record) == _lookup(table, pipeline, record)
+
+    model = GradientBoostingRegressor(n_estimators=5).fit(pipeline.encode_columns(df), df["Historical_Cost_of_Ride"])
+    other = CompiledEnsemble.from_sklearn(model)
+    with pytest.raises(ValueError, match="different model"):
+        PriceTable.load(path, other, pipeline)
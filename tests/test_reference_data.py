@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from conftest import DATA_PATH
+from reference_data import KEY_COLUMNS, ReferenceStore
+
+KEY = ("Urban", "Economy", "Night")
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_csv_rates_are_per_minute_means(df):
+    store = ReferenceStore.from_csv(DATA_PATH)
+    rates = (df["Historical_Cost_of_Ride"] / df["Expected_Ride_Duration"].clip(lower=1)).groupby(
+        [df[col] for col in KEY_COLUMNS]).mean()
+    assert store.stats()["segments"] == len(rates)
+    baseline, competitor = store.rates(list(rates.index) + [("Mars", "Economy", "Night")])
+    np.testing.assert_allclose(baseline[:-1], rates.to_numpy(), rtol=1e-12)
+    # Without a competitor_price column the baseline stands in for it.
+    np.testing.assert_array_equal(competitor, baseline)
+    assert np.isnan(baseline[-1])
+
+
+def test_entries_expire_after_the_ttl():
+    clock = Clock()
+    store = ReferenceStore({KEY: (2.0, 3.0)}, ttl=10, clock=clock)
+    assert store.get(KEY).baseline_rate == 2.0
+    store._table[KEY] = (4.0, 5.0)
+    clock.now = 9.9
+    assert store.get(KEY).baseline_rate == 2.0
+    clock.now = 10.0
+    assert store.get(KEY).baseline_rate == 4.0
+    assert store.stats()["hits"] == 1 and store.stats()["misses"] == 2
+
+
+def test_least_recently_used_entries_are_evicted():
+    keys = [("Urban", vehicle, "Night") for vehicle in ("Economy", "Premium", "Luxury")]
+    store = ReferenceStore({key: (i, i) for i, key in enumerate(keys)}, max_entries=2)
+    store.get(keys[0])
+    store.get(keys[1])
+    store.get(keys[0])
+    store.get(keys[2])
+    assert list(store._cache) == [keys[0], keys[2]]
+    assert store.stats()["evictions"] == 1
+    assert store.get(("Mars", "Economy", "Night")) is None
+    assert store.stats()["entries"] == 2
+
+
+def test_observations_update_rolling_rates_at_once():
+    store = ReferenceStore({KEY: (2.0, 2.0)}, alpha=0.5)
+    store.get(KEY)
+    store.observe(KEY, price=40.0, duration=10, competitor_price=60.0)
+    entry = store.get(KEY)
+    assert (entry.baseline_rate, entry.competitor_rate) == pytest.approx((3.0, 4.0))
+    new = ("Rural", "Premium", "Morning")
+    store.observe(new, price=30.0, duration=0)
+    assert (store.get(new).baseline_rate, store.get(new).competitor_rate) == (30.0, 30.0)
@@ -0,0 +1,101 @@
+import hashlib
+import os
+import time
+
+import pytest
+
+import metrics
+from model_registry import ModelRegistry, ModelVersion
+
+
+class FakeEngine:
+    def __init__(self, data):
+        self.data = data
+
+    def fingerprint(self):
+        return hashlib.sha256(self.data).hexdigest()[:32]
+
+
+def build(name, path):
+    with open(path, "rb") as f:
+        data = f.read()
+    if data == b"garbage":
+        raise ValueError("not a model")
+    return ModelVersion(name, path, FakeEngine(data), None, None)
+
+
+def _write(path, data, mtime):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.utime(tmp, (mtime, mtime))
+    os.replace(tmp, path)
+
+
+def _wait(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def prices():
+    return metrics.Registry().histogram("price", "Prices.", ("version", "price"))
+
+
+def _registry(directory, prices, **kwargs):
+    return ModelRegistry(build, str(directory), poll_seconds=3600, retire_seconds=0.0,
+                         on_retire=lambda version: prices.remove(version.name), **kwargs)
+
+
+def test_in_place_reload_keeps_the_live_series(tmp_path, prices):
+    path = str(tmp_path / "v1.apo")
+    _write(path, b"one", 1)
+    models = _registry(tmp_path, prices)
+    try:
+        old = models.champion
+        prices.labels(old.name, "model").observe(10.0)
+        _write(path, b"two", 2)
+        assert models.refresh()
+        assert models.champion is not old and models.champion.name == "v1.apo"
+        _wait(lambda: not models.describe()["retiring"])
+        prices.labels("v1.apo", "model").observe(20.0)
+        assert prices.labels("v1.apo", "model").snapshot()[0] == 2
+    finally:
+        models.close()
+
+
+def test_replaced_file_name_is_forgotten(tmp_path, prices):
+    _write(str(tmp_path / "v1.apo"), b"one", 1)
+    models = _registry(tmp_path, prices)
+    try:
+        prices.labels("v1.apo", "model").observe(10.0)
+        _write(str(tmp_path / "v2.apo"), b"two", 2)
+        assert models.refresh()
+        assert models.champion.name == "v2.apo"
+        _wait(lambda: "v1.apo" not in "\n".join(prices.render()))
+    finally:
+        models.close()
+
+
+def test_challenger_split_and_promotion(tmp_path, prices):
+    _write(str(tmp_path / "a.apo"), b"a", 1)
+    _write(str(tmp_path / "b.apo"), b"b", 2)
+    models = _registry(tmp_path, prices, challenger_share=0.5)
+    try:
+        assert (models.champion.name, models.challenger.name) == ("a.apo", "b.apo")
+        routed = {models.route(f"rider-{i}").name for i in range(200)}
+        assert routed == {"a.apo", "b.apo"}
+        assert models.route("rider-7") is models.route("rider-7")
+
+        _write(str(tmp_path / "c.apo"), b"garbage", 3)
+        assert not models.refresh()
+        assert "c.apo" in models.errors
+
+        _write(str(tmp_path / "d.apo"), b"d", 4)
+        assert models.refresh()
+        assert (models.champion.name, models.challenger.name) == ("b.apo", "d.apo")
+    finally:
+        models.close()
@@ -0,0 +1,111 @@
+import json
+
+import numpy as np
+import pytest
+
+import responses
+from scoring import BATCH_DECIMALS, BATCH_FIELDS
+
+
+def _columns(n, seed=0):
+    rng = np.random.default_rng(seed)
+    result = {
+        "row": np.arange(n),
+        "price_recommended": rng.uniform(-1e3, 1e6, n) * rng.choice([1.0, 1e-4, 1e-7], n),
+        "p_complete_recommended": rng.uniform(0, 1, n),
+        "gm_pct": rng.uniform(-0.01, 0.01, n),  # rounds to -0.0 as well as 0.0
+        "policy_flags": rng.integers(0, 64, n).astype(np.uint8),
+        "segment_k4": rng.integers(0, 4, n),
+    }
+    return responses.result_columns(result)
+
+
+def _printf(values, decimals):
+    spec = f"%.{decimals}f" if decimals else "%d"
+    return [spec % value for value in values.tolist()]
+
+
+@pytest.mark.parametrize("n", [0, 1, 1000])
+def test_json_encoders_match_printf(n):
+    columns, meta = _columns(n), {"total": n}
+    printed = {key: _printf(columns[key], decimals) for key, decimals in BATCH_DECIMALS.items()}
+    rows = ", ".join(
+        "{" + ", ".join(f'"{key}": {printed[key][i]}' for key in BATCH_FIELDS) + "}" for i in range(n)
+    )
+    assert responses.encode(columns, meta, "json") == f'{{"recommendations": [{rows}], "total": {n}}}'.encode()
+    body = ", ".join(f'"{key}": [' + ", ".join(printed[key]) + "]" for key in BATCH_FIELDS)
+    assert responses.encode(columns, {}, "columns") == ('{"columns": {' + body + "}}").encode()
+
+    decoded = json.loads(responses.encode(columns, meta, "columns"))["columns"]
+    for key in BATCH_FIELDS:
+        np.testing.assert_array_equal(decoded[key], columns[key])
+
+
+def test_fixed_point_edge_cases():
+    values = np.array([-0.0, 0.0, -0.5, 0.05, 999.99, 1e6, np.nan, -np.inf])
+    assert responses._join([responses._fixed(values, 2), ","], len(values)) == (
+        b"-0.00,0.00,-0.50,0.05,999.99,1000000.00,null,null,")
+    assert responses._join([responses._fixed(np.array([0, 7, -12, 10**12]), 0), ","], 4) == b"0,7,-12,1000000000000,"
+
+
+@pytest.mark.parametrize("accept, fmt", [
+    (None, "json"),
+    ("*/*", "json"),
+    ("application/msgpack", "msgpack"),
+    ("application/x-msgpack;q=0.5, application/vnd.price-optima.columns+json", "columns"),
+    ("application/vnd.apache.arrow.stream;q=0.9, application/json;q=0.1", "arrow"),
+    ("text/html, application/*;q=0.2", "json"),
+])
+def test_negotiate(accept, fmt):
+    assert responses.negotiate(accept) == fmt
+    assert responses.negotiate(accept, "msgpack") == "msgpack"
+
+
+def test_negotiate_rejects_unknown_media():
+    with pytest.raises(responses.NotAcceptable):
+        responses.negotiate("text/html, application/json;q=0")
+
+
+def test_page_windows():
+    columns = _columns(10)
+    window, meta = responses.page(columns, {"kpis": {}}, "r1", offset=8, limit=5)
+    assert meta == {"kpis": {}, "result_id": "r1", "total": 10, "offset": 8, "limit": 5}
+    np.testing.assert_array_equal(window["row"], [8, 9])
+    window, meta = responses.page(columns, {}, "r1", offset=20)
+    assert meta["offset"] == 10
+    assert all(len(values) == 0 for values in window.values())
+
+
+def test_result_store_expires_and_evicts():
+    now = [0.0]
+    store = responses.ResultStore(max_results=2, ttl=10.0, clock=lambda: now[0])
+    first, second = store.put({"a": 1}, {}), store.put({"b": 2}, {})
+    assert store.get(first) == ({"a": 1}, {})
+    store.put({"c": 3}, {})  # evicts the least recently read: second
+    assert store.get(second) is None
+    now[0] = 10.0
+    assert store.get(first) is None
+
+
+def test_msgpack_encoding():
+    assert responses.packb({"a": [1, -1, None, True], "b": 1.5}) == (
+        b"\x82\xa1a\x94\x01\xff\xc0\xc3\xa1b\xcb" + np.float64(1.5).byteswap().tobytes())
+    assert responses.packb(np.array([1, 200])) == (
+        b"\x92\xd3" + (1).to_bytes(8, "big") + b"\xd3" + (200).to_bytes(8, "big"))
+    assert responses.packb(np.array([1, 2], dtype=np.uint8)) == b"\x92\x01\x02"
+
+    msgpack = pytest.importorskip("msgpack")
+    columns = _columns(100)
+    decoded = msgpack.unpackb(responses.encode(columns, {"total": 100}, "msgpack"))
+    assert decoded["total"] == 100
+    for key in BATCH_FIELDS:
+        np.testing.assert_array_equal(decoded["columns"][key], columns[key])
+
+
+def test_arrow_encoding():
+    pa = pytest.importorskip("pyarrow")
+    columns = _columns(100)
+    table = pa.ipc.open_stream(pa.BufferReader(responses.encode(columns, {"total": 100}, "arrow"))).read_all()
+    assert json.loads(table.schema.metadata[b"meta"]) == {"total": 100}
+    for key in BATCH_FIELDS:
+        np.testing.assert_array_equal(table.column(key).to_numpy(), columns[key])
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+import scenarios
+from features import RAW_NUMERIC
+
+SPECS = [
+    {"name": "rush", "Number_of_Riders": 1.3, "Number_of_Drivers": 0.7},
+    {"name": "fuel", "Historical_Cost_of_Ride": 1.15},
+    {"Expected_Ride_Duration": 0.5, "Number_of_Riders": 0},
+]
+
+
+def _columns(frame):
+    return {col: frame[col].to_numpy() for col in frame.columns}
+
+
+def _scaled(columns, spec):
+    return {col: values * spec.get(col, 1) if col in scenarios.PERTURBABLE else values
+            for col, values in columns.items()}
+
+
+def test_grid_matches_per_row_scoring(df, scorer):
+    columns = _columns(df)
+    stacked = scorer.score_perturbed(columns, scenarios.parse(SPECS)[1])
+    for i, spec in enumerate([scenarios.BASE] + SPECS):
+        alone = scorer.score_columns(_scaled(columns, spec))
+        for key in ("price_recommended", "expected_revenue", "gm_pct", "p_complete_recommended"):
+            np.testing.assert_allclose(stacked[key][i * len(df):(i + 1) * len(df)], alone[key], rtol=1e-12)
+
+
+@pytest.mark.parametrize("max_rows", [10 ** 6, 2000, 1])
+def test_run_summaries_match_separate_uploads(df, scorer, max_rows):
+    columns = _columns(df)
+    out = scenarios.run(scorer, columns, SPECS, max_rows=max_rows)
+    assert [case["name"] for case in out] == ["base", "rush", "fuel", "scenario_3"]
+    for case, spec in zip(out, [scenarios.BASE] + SPECS):
+        expected = scorer.summary().update(scorer.score_columns(_scaled(columns, spec))).result()
+        assert {key: case[key] for key in expected} == expected
+        assert case["factors"] == {col: float(spec.get(col, 1)) for col in scenarios.PERTURBABLE}
+
+
+def test_parse_rejects_bad_specs():
+    names, factors = scenarios.parse([])
+    assert names == ["base"] and factors.shape == (1, len(RAW_NUMERIC))
+    for specs, match in [
+        ({"name": "x"}, "list"),
+        ([{"Vehicle_Type": 2}], "cannot perturb"),
+        ([{"Number_of_Riders": -1}], "non-negative"),
+        ([{"Number_of_Riders": True}], "non-negative"),
+        ([{"Number_of_Riders": float("nan")}], "non-negative"),
+        ([{}] * (scenarios.MAX_SCENARIOS + 1), "at most"),
+    ]:
+        with pytest.raises(ValueError, match=match):
+            scenarios.parse(specs)
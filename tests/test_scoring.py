@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from features import NUMERIC, RAW_NUMERIC
+from optimizer import PriceOptimizer
+from scoring import Scorer
+
+RIDERS = NUMERIC.index("Number_of_Riders")
+COST = NUMERIC.index("Historical_Cost_of_Ride")
+
+
+def _columns(frame):
+    return {col: frame[col].to_numpy() for col in frame.columns}
+
+
+def test_capping_only_reaches_the_model(df, pipeline, engine):
+    upper = pipeline.bounds[1, RAW_NUMERIC.index("Historical_Cost_of_Ride")]
+    frame = pd.concat([df.head(1)] * 2, ignore_index=True)
+    frame["Historical_Cost_of_Ride"] = [upper * 4, upper * 10]
+    frame["Number_of_Riders"] = 1000
+    X, numeric = pipeline.encode_columns(_columns(frame), with_numeric=True)
+    np.testing.assert_array_equal(X[0], X[1])
+    np.testing.assert_array_equal(numeric[:, COST], frame["Historical_Cost_of_Ride"])
+    np.testing.assert_array_equal(numeric[:, RIDERS], 1000)
+
+    result = Scorer(engine, pipeline, PriceOptimizer()).score_columns(_columns(frame))
+    assert result["cost"][1] > result["cost"][0]
+    assert result["gm_pct"][1] < result["gm_pct"][0]
+    np.testing.assert_array_equal(result["riders"], 1000)
+
+
+def test_record_numeric_is_uncapped(df, pipeline):
+    record = dict(df.iloc[0].to_dict(), Number_of_Riders=1000)
+    X, numeric = pipeline.encode_record(record, with_numeric=True)
+    assert numeric[0, RIDERS] == 1000
+    capped = dict(record, Number_of_Riders=pipeline.bounds[1, RAW_NUMERIC.index("Number_of_Riders")])
+    np.testing.assert_allclose(X, pipeline.encode_record(capped))
+
+
+def test_scenario_factors_are_not_capped(df, pipeline, engine):
+    columns = _columns(df.head(100))
+    upper = pipeline.bounds[1, RAW_NUMERIC.index("Number_of_Riders")]
+    factors = np.ones((2, len(RAW_NUMERIC)))
+    factors[1, RAW_NUMERIC.index("Number_of_Riders")] = 10.0
+    X, numeric = pipeline.encode_perturbed(columns, factors)
+    np.testing.assert_allclose(numeric[100:, RIDERS], columns["Number_of_Riders"] * 10.0)
+    assert (X[100:, RIDERS] * pipeline.scale[RIDERS] + pipeline.mean[RIDERS]).max() <= upper + 1e-9
+
+    result = Scorer(engine, pipeline, PriceOptimizer()).score_perturbed(columns, factors)
+    np.testing.assert_allclose(result["riders"][100:], result["riders"][:100] * 10.0)
@@ -0,0 +1,46 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from conftest import ROOT
+from features import NUMERIC
+from segmenter import FEATURES, Segmenter
+
+
+def test_round_trip_assigns_the_same_segments(df, pipeline, tmp_path):
+    _, numeric = pipeline.encode_columns(df, with_numeric=True)
+    segmenter = Segmenter.fit(numeric)
+    path = str(tmp_path / "segmenter.json")
+    segmenter.save(path)
+    np.testing.assert_array_equal(Segmenter.load(path).assign(numeric), segmenter.assign(numeric))
+
+
+def test_load_rejects_other_features(tmp_path):
+    with open(os.path.join(ROOT, "segmenter.json")) as f:
+        state = json.load(f)
+    assert state["features"] == FEATURES
+    state["features"] = FEATURES[::-1]
+    path = str(tmp_path / "segmenter.json")
+    with open(path, "w") as f:
+        json.dump(state, f)
+    with pytest.raises(ValueError):
+        Segmenter.load(path)
+
+
+def test_assign_matches_kmeans_predict(df, pipeline):
+    from sklearn.cluster import KMeans
+    from sklearn.preprocessing import StandardScaler
+
+    _, numeric = pipeline.encode_columns(df, with_numeric=True)
+    X = numeric[:, [NUMERIC.index(col) for col in FEATURES]]
+    scaler = StandardScaler().fit(X)
+    kmeans = KMeans(n_clusters=4, random_state=42, n_init=10).fit(scaler.transform(X))
+    segmenter = Segmenter(scaler.mean_, scaler.scale_, kmeans.cluster_centers_)
+    np.testing.assert_array_equal(segmenter.assign(numeric), kmeans.predict(scaler.transform(X)))
+
+    shipped = Segmenter.load(os.path.join(ROOT, "segmenter.json"))
+    scaled = (X - shipped.mean) / shipped.scale
+    brute = np.linalg.norm(scaled[:, None, :] - shipped.centroids[None], axis=2).argmin(axis=1)
+    np.testing.assert_array_equal(shipped.assign(numeric), brute)
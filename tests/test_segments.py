@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from segments import DIMENSIONS, INVENTORY, INVENTORY_BANDS, SegmentCube, SegmentStore, inventory_band
+
+
+def _columns(frame):
+    return {col: frame[col].to_numpy() for col in frame.columns}
+
+
+@pytest.fixture
+def scored(df, scorer):
+    return _columns(df), scorer.score_columns(_columns(df))
+
+
+def test_chunked_merge_equals_whole_batch(df, pipeline, scorer, scored):
+    whole = SegmentCube(pipeline).update(*scored)
+    merged = SegmentCube(pipeline)
+    for start in range(0, len(df), 143):
+        columns = _columns(df[start:start + 143])
+        merged.merge(SegmentCube(pipeline).update(columns, scorer.score_columns(columns)))
+    assert merged.rows == whole.rows == len(df)
+    np.testing.assert_allclose(merged.sums, whole.sums, rtol=1e-12)
+    for by in (DIMENSIONS, ["Vehicle_Type"], [INVENTORY, "Location_Category"], []):
+        assert merged.query(by) == whole.query(by)
+
+
+def test_inventory_bands_match_the_notebook_cut(df, pipeline):
+    ratio = df["Number_of_Drivers"] / (df["Number_of_Riders"] + 1e-6)
+    expected = pd.cut(ratio, bins=[0, 0.5, 0.8, 1.2, 10], labels=INVENTORY_BANDS).astype(str)
+    bands = np.array(INVENTORY_BANDS)[inventory_band(_columns(df), pipeline)]
+    inside = ratio.between(0, 10, inclusive="right").to_numpy()
+    np.testing.assert_array_equal(bands[inside], expected[inside])
+
+
+def test_query_matches_groupby(df, pipeline, scored):
+    columns, result = scored
+    frame = df.assign(price=result["price_recommended"], p=result["p_complete_recommended"],
+                      revenue=result["expected_revenue"])
+    grouped = frame.groupby(["Location_Category", "Vehicle_Type"]).agg(
+        count=("price", "size"), avg_price=("price", "mean"), conversion=("p", "mean"), revenue=("revenue", "sum"))
+    segments = SegmentCube(pipeline).update(columns, result).query(["Vehicle_Type", "Location_Category"])
+    assert len(segments) == len(grouped)
+    for segment in segments:
+        row = grouped.loc[(segment["Location_Category"], segment["Vehicle_Type"])]
+        assert segment["count"] == row["count"]
+        assert segment["avg_price"] == pytest.approx(row["avg_price"], abs=0.006)
+        assert segment["conversion_pct"] == pytest.approx(row["conversion"] * 100, abs=0.006)
+        assert segment["revenue"] == pytest.approx(row["revenue"], abs=0.006)
+
+
+def test_unseen_categories_and_unknown_dimensions(df, pipeline, scorer):
+    frame = df.head(3).copy()
+    frame["Vehicle_Type"] = "Hovercraft"
+    columns = _columns(frame)
+    cube = SegmentCube(pipeline).update(columns, scorer.score_columns(columns))
+    assert cube.query(["Vehicle_Type"]) == [dict(cube.query(["Vehicle_Type"])[0], Vehicle_Type=None, count=3)]
+    with pytest.raises(ValueError, match="unknown dimensions"):
+        cube.query(["Surge"])
+
+
+def test_store_evicts_least_recently_used(pipeline):
+    store = SegmentStore(max_entries=2)
+    cubes = [SegmentCube(pipeline) for _ in range(3)]
+    store.put(("a", "v1"), cubes[0])
+    store.put(("b", "v1"), cubes[1])
+    assert store.get(("a", "v1")) is cubes[0]
+    store.put(("c", "v1"), cubes[2])
+    assert store.get(("b", "v1")) is None
+    assert store.get(("a", "v1")) is cubes[0]
+    assert store.get(("a", "v2")) is None
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from sharded import ShardedEngine
+
+
+@pytest.fixture(scope="module")
+def sharded(engine):
+    sharded = ShardedEngine(engine, workers=2, min_rows=1)
+    yield sharded
+    sharded.close()
+
+
+@pytest.mark.parametrize("n", [1, 7, 10_001])
+def test_matches_the_in_process_engine(engine, sharded, n):
+    X = np.random.default_rng(n).normal(size=(n, engine.n_features))
+    np.testing.assert_array_equal(sharded.predict(X), engine.predict(X))
+
+
+def test_worker_errors_reach_the_caller(engine, sharded):
+    with pytest.raises(ValueError, match="features"):
+        sharded.predict(np.zeros((10, engine.n_features + 1)))
+    X = np.zeros((100, engine.n_features))
+    X[73, 2] = np.nan
+    with pytest.raises(ValueError, match="NaN"):
+        sharded.predict(X)
+    np.testing.assert_array_equal(sharded.predict(X[:50]), engine.predict(X[:50]))
+
+
+def test_small_batches_stay_in_process(engine):
+    sharded = ShardedEngine(engine, workers=2, min_rows=1000)
+    X = np.zeros((10, engine.n_features))
+    np.testing.assert_array_equal(sharded.predict(X), engine.predict(X))
+    assert sharded._pool is None
+    sharded.close()
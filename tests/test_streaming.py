@@ -0,0 +1,59 @@
+import io
+import json
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import streaming
+from conftest import DATA_PATH
+
+
+@pytest.fixture(scope="module")
+def upload():
+    with open(DATA_PATH, "rb") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("chunk_bytes", [1, 7, 100, 1 << 20])
+def test_blocks_hold_every_line_once(upload, chunk_bytes):
+    blocks = list(streaming.iter_csv_blocks_sync(io.BytesIO(upload.rstrip(b"\n")), chunk_bytes))
+    header = upload[:upload.index(b"\n") + 1]
+    assert all(h == header for h, _ in blocks)
+    assert header + b"".join(block for _, block in blocks) == upload.rstrip(b"\n") + b"\n"
+
+
+def test_header_only_upload_has_no_blocks():
+    assert list(streaming.iter_csv_blocks_sync(io.BytesIO(b"a,b\n"))) == []
+
+
+@pytest.fixture
+def client(load_main, model_path):
+    with TestClient(load_main(model_path).app) as client:
+        yield client
+
+
+def test_streamed_rows_match_the_batch_response(client, upload):
+    batch = client.post("/recommend_batch?format=columns", files={"file": ("rides.csv", upload)}).json()
+    lines = client.post("/recommend_batch?stream=ndjson", files={"file": ("rides.csv", upload)}).text.splitlines()
+    rows, trailer = [json.loads(line) for line in lines[:-1]], json.loads(lines[-1])
+    assert len(rows) == batch["total"] == 1000
+    for key, values in batch["columns"].items():
+        np.testing.assert_allclose([row[key] for row in rows], values, atol=1e-9)
+    assert trailer["kpis"] == batch["kpis"]
+
+    text = client.post("/recommend_batch?stream=csv", files={"file": ("rides.csv", upload)}).text
+    lines = text.splitlines()
+    assert lines[0] == ",".join(streaming.BATCH_FIELDS)
+    assert len(lines) == 1002 and lines[-1].startswith("# ")
+    assert json.loads(lines[-1][2:])["kpis"] == batch["kpis"]
+
+
+def test_stream_reports_an_unreadable_upload_in_the_trailer(client):
+    lines = client.post("/recommend_batch?stream=ndjson", files={"file": ("rides.csv", b"a,b\n1,2\n")}).text
+    assert "missing required columns" in json.loads(lines.splitlines()[-1])["error"]
+
+
+def test_stream_accepts_csv_only(client):
+    response = client.post("/recommend_batch?stream=csv", files={"file": ("rides.parquet", b"PAR1" + b"\0" * 16)})
+    assert response.status_code == 415
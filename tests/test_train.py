@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from sklearn.model_selection import train_test_split
+
+import train
+from conftest import DATA_PATH
+from features import NUMERIC, FeaturePipeline
+
+
+def test_pipeline_is_fitted_on_training_rows_only(df, tmp_path):
+    path, pipeline, hit = train.prepare(DATA_PATH, str(tmp_path))
+    assert not hit
+    train_rows, test_rows = train_test_split(np.arange(len(df)), test_size=train.TEST_SIZE, random_state=train.SEED)
+    assert pipeline.state() == FeaturePipeline.fit(df.iloc[train_rows]).state()
+    assert pipeline.state() != FeaturePipeline.fit(df).state()
+
+    with np.load(path) as cached:
+        assert len(cached["X_train"]) == len(train_rows)
+        assert len(cached["X_test"]) == len(test_rows)
+        np.testing.assert_array_equal(cached["X_test"], pipeline.encode_columns(df.iloc[test_rows]))
+        np.testing.assert_array_equal(cached["y_test"], train.encode(pipeline, df.iloc[test_rows])[1])
+
+    assert train.prepare(DATA_PATH, str(tmp_path))[2]
+
+
+def _result(r2, size, servable=True, latency=100.0):
+    return {"r2": r2, "size_bytes": size, "servable": servable, "backend": "gbr" if servable else None,
+            "latency_single_us": latency}
+
+
+def test_candidates_never_split_on_the_target(tmp_path):
+    path, pipeline, _ = train.prepare(DATA_PATH, str(tmp_path))
+    train._init_worker(path)
+    result = train.evaluate("GradientBoostingRegressor", {"n_estimators": 20, "max_depth": 3})
+    assert result["r2"] < train.DEGENERATE_R2
+
+    model = train.make_model("GradientBoostingRegressor", {"n_estimators": 20, "max_depth": 3})
+    train.fit(model, train._worker["X_train"], train._worker["y_train"], pipeline)
+    engine, _ = train.serving_engine(model, pipeline)
+    leaky = {NUMERIC.index(col) for col in train.LEAKY}
+    assert leaky == {NUMERIC.index("Historical_Cost_of_Ride"), NUMERIC.index("Cost_per_Min")}
+    assert not leaky & set(engine.split_features())
+
+
+def test_choose_refuses_a_degenerate_search():
+    with pytest.raises(ValueError, match="leaking"):
+        train.choose([_result(0.9999, 10), _result(0.5, 1)])
+    assert train.choose([_result(0.85, 10), _result(0.848, 5), _result(0.9, 1, servable=False)])["size_bytes"] == 5
+
+
+def test_choose_skips_candidates_too_slow_for_single_rides():
+    fast, slow = _result(0.85, 10), _result(0.86, 5, latency=train.MAX_LATENCY_SINGLE_US * 40)
+    assert train.choose([fast, slow]) is fast
+    assert train.choose([fast, slow], max_latency_single_us=float("inf")) is slow
+    with pytest.raises(ValueError, match="per ride"):
+        train.choose([slow])
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.linear_model import LinearRegression
+
+from tree_engine import CompiledEnsemble
+
+
+@pytest.fixture(scope="module")
+def data(df, pipeline):
+    return pipeline.encode_columns(df), df["Historical_Cost_of_Ride"].to_numpy()
+
+
+def _ties(model, X):
+    """Rows whose values sit exactly on, and one float32 step either side of, every split threshold."""
+    thresholds = [(est.tree_.feature[node], est.tree_.threshold[node])
+                  for est in model.estimators_[:, 0] for node in np.flatnonzero(est.tree_.children_left != -1)]
+    rows = []
+    for i, (feature, threshold) in enumerate(thresholds):
+        t32 = np.float32(threshold)
+        below, above = np.nextafter(t32, np.float32(-np.inf)), np.nextafter(t32, np.float32(np.inf))
+        for value in (threshold, t32, below, above):
+            row = X[i % len(X)].copy()
+            row[feature] = value
+            rows.append(row)
+    return np.array(rows)
+
+
+@pytest.mark.parametrize("params", [
+    {"n_estimators": 30, "max_depth": 3},
+    {"n_estimators": 20, "max_depth": 6, "min_samples_leaf": 40, "subsample": 0.7},  # uneven leaf depths
+    {"n_estimators": 10, "max_depth": 2, "init": "zero", "loss": "huber"},
+])
+def test_matches_sklearn_exactly(data, params):
+    X, y = data
+    model = GradientBoostingRegressor(random_state=0, **params).fit(X, y)
+    engine = CompiledEnsemble.from_sklearn(model)
+    ties = _ties(model, X)
+    for rows in (X, ties, np.random.default_rng(0).normal(size=(500, X.shape[1]))):
+        np.testing.assert_array_equal(engine.predict(rows), model.predict(rows))
+    np.testing.assert_array_equal(engine.predict(X[0]), model.predict(X[:1]))
+
+
+def test_rejects_what_it_cannot_compile(data):
+    X, y = data
+    with pytest.raises(ValueError, match="constant init"):
+        CompiledEnsemble.from_sklearn(GradientBoostingRegressor(n_estimators=2, init=LinearRegression()).fit(X, y))
+    with pytest.raises(ValueError, match="deeper"):
+        CompiledEnsemble.from_sklearn(GradientBoostingRegressor(n_estimators=1, max_depth=14).fit(X, y))
+
+
+def test_rejects_bad_input(engine):
+    with pytest.raises(ValueError, match="features"):
+        engine.predict(np.zeros((2, engine.n_features + 1)))
+    X = np.zeros((2, engine.n_features))
+    X[1, 0] = np.nan
+    with pytest.raises(ValueError, match="NaN"):
+        engine.predict(X)
+
+
+def test_fingerprint_and_split_features(data, engine, model_path):
+    import model_artifact
+
+    X, y = data
+    assert model_artifact.load(model_path)[0].fingerprint() == engine.fingerprint()
+    model = GradientBoostingRegressor(n_estimators=5, max_depth=2, random_state=1).fit(X[:, :3], y)
+    compiled = CompiledEnsemble.from_sklearn(model)
+    used = {f for est in model.estimators_[:, 0] for f in est.tree_.feature[est.tree_.children_left != -1]}
+    assert compiled.split_features() == sorted(used)
+    smaller = GradientBoostingRegressor(n_estimators=4, max_depth=2, random_state=1).fit(X[:, :3], y)
+    assert CompiledEnsemble.from_sklearn(smaller).fingerprint() != compiled.fingerprint()
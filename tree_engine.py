@@ -0,0 +1,141 @@
+"""Array-backed inference for a fitted GradientBoostingRegressor.
+
+At load time every tree is padded out to a perfect binary tree of the
+ensemble's depth and flattened into contiguous node arrays (feature,
+threshold, value).  Children are implicit -- node ``i`` of a tree has
+children ``2i + 1`` and ``2i + 2`` -- so a batch is scored by stepping all
+rows through all trees one level at a time with a handful of ``np.take``
+calls and no per-row Python.
+
+Results are bit-identical to ``model.predict``: inputs are cast to float32
+like sklearn does, thresholds are rounded down to the float32 grid (which
+preserves every ``x <= threshold`` decision for float32 ``x``), and leaf
+values are accumulated tree by tree in estimator order.
+"""
+import hashlib
+
+import numpy as np
+
+BLOCK_ROWS = 128
+MAX_DEPTH = 12
+
+
+def _floor_float32(values):
+    out = values.astype(np.float32)
+    return np.where(out > values, np.nextafter(out, np.float32(-np.inf)), out)
+
+
+class CompiledEnsemble:
+    def __init__(self, feature, threshold, value, base, depth, n_features):
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self.base = float(base)
+        self.depth = int(depth)
+        self.n_features = int(n_features)
+        self.tree_size = 2 ** (self.depth + 1) - 1
+        self.n_trees = len(feature) // self.tree_size
+
+        self._tree_offset = np.arange(self.n_trees, dtype=np.intp) * self.tree_size
+        # Child of global node g (in the tree starting at b) is 2g - b + 1 (+1 if right).
+        self._child_shift = 1 - self._tree_offset
+
+    @classmethod
+    def from_sklearn(cls, model):
+        from sklearn.dummy import DummyRegressor
+
+        if model.estimators_.shape[1] != 1:
+            raise ValueError("only single-output regressors can be compiled")
+        if not (model.init_ == "zero" or isinstance(model.init_, DummyRegressor)):
+            raise ValueError("only constant init estimators can be compiled")
+
+        trees = [est.tree_ for est in model.estimators_[:, 0]]
+        depth = max(tree.max_depth for tree in trees)
+        if depth > MAX_DEPTH:
+            raise ValueError(f"trees deeper than {MAX_DEPTH} levels cannot be compiled")
+
+        n_internal = 2 ** depth - 1
+        size = 2 ** (depth + 1) - 1
+        feature = np.zeros((len(trees), size), dtype=np.intp)
+        threshold = np.full((len(trees), size), np.inf, dtype=np.float32)
+        value = np.zeros((len(trees), size), dtype=np.float64)
+
+        for i, tree in enumerate(trees):
+            # src[p] is the sklearn node that perfect-tree position p stands for;
+            # a leaf reached early is copied down into both of its padding children.
+            src = np.zeros(size, dtype=np.intp)
+            for level in range(depth):
+                lo, hi = 2 ** level - 1, 2 ** (level + 1) - 1
+                parent = src[lo:hi]
+                leaf = tree.children_left[parent] == -1
+                src[2 * lo + 1:2 * hi:2] = np.where(leaf, parent, tree.children_left[parent])
+                src[2 * lo + 2:2 * hi + 1:2] = np.where(leaf, parent, tree.children_right[parent])
+
+            inner = src[:n_internal]
+            split = tree.children_left[inner] != -1
+            feature[i, :n_internal] = np.where(split, tree.feature[inner], 0)
+            threshold[i, :n_internal] = np.where(
+                split, _floor_float32(tree.threshold[inner]), np.float32(np.inf)
+            )
+            value[i, n_internal:] = model.learning_rate * tree.value[src[n_internal:], 0, 0]
+
+        n_features = model.n_features_in_
+        base = model._raw_predict_init(np.zeros((1, n_features), dtype=np.float32))[0, 0]
+        return cls(feature.ravel(), threshold.ravel(), value.ravel(), base, depth, n_features)
+
+    def fingerprint(self):
+        """Digest of the node arrays; identifies the model independently of where it was loaded from."""
+        digest = hashlib.sha256()
+        for array in (self.feature, self.threshold, self.value):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        digest.update(repr(self.base).encode())
+        return digest.hexdigest()[:32]
+
+    def split_features(self):
+        """Input columns that some split depends on."""
+        return np.unique(self.feature[np.isfinite(self.threshold)]).tolist()
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(
+                f"X has {X.shape[1]} features, but the model expects {self.n_features}"
+            )
+        if not np.isfinite(X).all():
+            raise ValueError("Input X contains NaN or infinity.")
+
+        X = np.ascontiguousarray(X)
+        out = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), BLOCK_ROWS):
+            stop = start + BLOCK_ROWS
+            out[start:stop] = self._predict_block(X[start:stop])
+        return out
+
+    def _predict_block(self, X):
+        n = len(X)
+        flat = X.ravel()
+        row_offset = (np.arange(n, dtype=np.intp) * self.n_features)[:, None]
+
+        node = np.empty((n, self.n_trees), dtype=np.intp)
+        node[:] = self._tree_offset
+        index = np.empty_like(node)
+        x = np.empty(node.shape, dtype=np.float32)
+        threshold = np.empty(node.shape, dtype=np.float32)
+        go_right = np.empty(node.shape, dtype=bool)
+        for _ in range(self.depth):
+            np.take(self.feature, node, out=index)
+            index += row_offset
+            np.take(flat, index, out=x)
+            np.take(self.threshold, node, out=threshold)
+            np.greater(x, threshold, out=go_right)
+            node *= 2
+            node += self._child_shift
+            node += go_right
+
+        # cumsum is a strict left-to-right sum, matching sklearn's accumulation order.
+        leaves = np.empty((n, self.n_trees + 1), dtype=np.float64)
+        leaves[:, 0] = self.base
+        np.take(self.value, node, out=leaves[:, 1:])
+        return np.cumsum(leaves, axis=1)[:, -1]